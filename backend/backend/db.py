@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+
+def sqlite_pragma_statements(pragmas):
+    """`PRAGMA name = value` statements for a SQLITE_PRAGMAS-style mapping."""
+    return [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    connection_created receiver: tune every new SQLite connection with
+    settings.SQLITE_PRAGMAS (WAL, synchronous, mmap, cache, busy timeout).
+    """
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None)
+    if connection.vendor != "sqlite" or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for statement in sqlite_pragma_statements(pragmas):
+            cursor.execute(statement)
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    transaction.atomic() for write endpoints. On the backend.sqlite3 engine
+    the outermost block starts with BEGIN IMMEDIATE, taking the write lock up
+    front: a deferred transaction that reads first and then writes cannot
+    wait on busy_timeout for the lock and fails with "database is locked".
+    Elsewhere this is plain atomic().
+    """
+    connection = transaction.get_connection(using)
+    if not hasattr(connection, "begin_immediate"):
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    # Only the outermost block issues BEGIN, inside atomic.__enter__
+    connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            connection.begin_immediate = False
+            yield
+    finally:
+        connection.begin_immediate = False
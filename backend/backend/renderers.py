@@ -0,0 +1,83 @@
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to DRF's stdlib encoder
+    orjson = None
+
+
+def wrap_response_data(data, status_code):
+    """
+    Build the standard {success, message, data} envelope for a response body.
+    """
+    # If already wrapped, do not wrap again
+    if isinstance(data, dict) and ("success" in data and "data" in data):
+        return data
+
+    # Determine success flag
+    success = 200 <= status_code < 400
+
+    # Extract message from response data if available
+    message = None
+
+    if isinstance(data, dict):
+        data = dict(data)
+
+        # Check for common error message fields
+        if "message" in data:
+            message = data.pop("message")
+        elif "detail" in data:
+            message = data.pop("detail")
+        elif "error" in data:
+            message = data.pop("error")
+        elif not success and "non_field_errors" in data:
+            message = data.pop("non_field_errors")[0] if data["non_field_errors"] else None
+
+        # If no message found and it's an error, use the whole dict as message
+        if not message and not success and len(data) == 1:
+            message = list(data.values())[0]
+            if isinstance(message, list) and len(message) > 0:
+                message = message[0]
+            data = None
+
+    return {
+        "success": success,
+        "message": message,
+        "data": data,
+    }
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed and enabled
+    through settings.API_JSON_ENCODER = "orjson". Indented (browsable/debug)
+    output and installs without orjson use DRF's stdlib encoder.
+    """
+    orjson_options = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and getattr(settings, "API_JSON_ENCODER", "json") == "orjson"
+            and not self.get_indent(accepted_media_type, renderer_context or {})
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.use_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        # DRF's encoder keeps datetime/Decimal/UUID/lazy-string output identical
+        return orjson.dumps(data, default=self.encoder_class().default, option=self.orjson_options)
+
+
+class EnvelopeJSONRenderer(FastJSONRenderer):
+    """
+    Applies the {success, message, data} envelope while rendering, so every
+    API response body is encoded exactly once.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            data = wrap_response_data(data, response.status_code)
+        return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,93 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+
+# Set while a view that opted in with ReplicaReadMixin handles a read
+_read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+def replica_alias():
+    """The configured replica alias, or None when no replica is set up."""
+    alias = getattr(settings, "REPLICA_DATABASE_ALIAS", "replica")
+    return alias if alias in connections.settings else None
+
+
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user):
+    """Send `user`'s replica-eligible reads to the primary for REPLICA_STICKY_SECONDS."""
+    seconds = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+    if seconds > 0 and user is not None and user.is_authenticated:
+        cache.set(_pin_key(user.pk), True, seconds)
+
+
+def is_pinned(user):
+    return bool(user is not None and user.is_authenticated and cache.get(_pin_key(user.pk)))
+
+
+class ReplicaRouter:
+    """
+    Reads go to the replica only while a ReplicaReadMixin view handles a
+    read; everything else, and every write, uses `default`.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes: after a successful write by an authenticated user,
+    pin that user's reads to the primary for a short window so they never
+    see a replica that has not caught up yet.
+
+    The pin lives in the cache; use a shared cache backend when running
+    several worker processes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # DRF copies the authenticated user onto the Django request
+            pin_to_primary(getattr(request, "user", None))
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    APIView mixin for read-only analytics, reports and exports: GET/HEAD
+    queries run against the replica unless the user wrote recently.
+
+    Querysets evaluated after the view returns (streaming responses) must
+    be bound with `.using()` while the view runs.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replica_alias() and not is_pinned(request.user):
+            self._replica_token = _read_from_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _read_from_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
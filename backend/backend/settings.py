@@ -57,9 +57,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'backend.routers.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'backend.middleware.response_wrapper.ResponseWrapperMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -95,13 +95,47 @@ if os.getenv('DATABASE_URL'):
         )
     }
 else:
+    # Single-node mode: the stock SQLite backend plus BEGIN IMMEDIATE support
+    # for write endpoints (backend.db.immediate_atomic)
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'backend.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
 
+# Applied to every new SQLite connection by backend.db.apply_sqlite_pragmas.
+# WAL lets readers run alongside the single writer, and busy_timeout makes
+# concurrent writers (e.g. several gunicorn workers) wait instead of failing
+# with "database is locked". Set SQLITE_TUNING=0 to keep SQLite's defaults.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    # Negative values are KiB
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KB', str(64 * 1024))),
+    'temp_store': 'MEMORY',
+} if os.getenv('SQLITE_TUNING', '1') != '0' else {}
+
+# Optional read replica for analytics, reports and exports (views opt in with
+# backend.routers.ReplicaReadMixin). Locally two SQLite files work, e.g.
+# REPLICA_DATABASE_URL=sqlite:///replica.sqlite3
+REPLICA_DATABASE_ALIAS = 'replica'
+if os.getenv('REPLICA_DATABASE_URL'):
+    import dj_database_url
+    DATABASES[REPLICA_DATABASE_ALIAS] = dj_database_url.parse(
+        os.getenv('REPLICA_DATABASE_URL'),
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    DATABASES[REPLICA_DATABASE_ALIAS]['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -159,23 +193,65 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication, minus the per-request user query
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Wraps every body in {success, message, data} while rendering
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.EnvelopeJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+# JSON encoder for API responses: "orjson" (used when installed) or "json"
+API_JSON_ENCODER = os.getenv('API_JSON_ENCODER', 'orjson')
+
 
 from datetime import timedelta
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.getenv('ACCESS_TOKEN_LIFETIME', '60'))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.getenv('REFRESH_TOKEN_LIFETIME', '1'))),
+    # Re-reads role / student profile / batch claims on refresh
+    'TOKEN_REFRESH_SERIALIZER': 'users.tokens.ClaimsTokenRefreshSerializer',
 }
 
+# Cache shared by every worker process. Claims-staleness markers and cached
+# users (users.authentication), cached profiles (users.services) and replica
+# pins (backend.routers) are only correct if all workers see the same
+# entries, so the per-process default (LocMemCache) must not be used. A
+# directory works for workers on one host; set REDIS_URL (needs the redis
+# package) when running on several hosts.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))},
+        }
+    }
+
+# Tests run against a temporary cache directory
+TEST_RUNNER = 'backend.test_runner.TempCacheTestRunner'
+
+# Seconds a full User row loaded for a claims-authenticated request is cached
+AUTH_USER_CACHE_SECONDS = int(os.getenv('AUTH_USER_CACHE_SECONDS', '30'))
+
+# Seconds the composed /users/me profile is cached; saves invalidate it early
+USER_PROFILE_CACHE_SECONDS = int(os.getenv('USER_PROFILE_CACHE_SECONDS', '300'))
+
 # CORS Configuration for production
 # CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:5173').split(',')
 CORS_ALLOW_ALL_ORIGINS = True
@@ -191,6 +267,16 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 SERVER_EMAIL = EMAIL_HOST_USER
 INVITATION_EMAIL_ENABLED = os.getenv("INVITATION_EMAIL_ENABLED", "False").lower() == "true"
+# Seconds before an unresponsive SMTP server fails a send
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '30'))
+
+# Bulk invitations are delivered in the background (users/delivery.py): by
+# a thread in the web process, or by `manage.py send_invitations --loop`
+# when INVITATION_EMAIL_WORKER_THREAD is False
+INVITATION_EMAIL_WORKER_THREAD = os.getenv('INVITATION_EMAIL_WORKER_THREAD', 'True') == 'True'
+INVITATION_EMAIL_MAX_ATTEMPTS = int(os.getenv('INVITATION_EMAIL_MAX_ATTEMPTS', '3'))
+# Delay before the first retry; doubles on each later one
+INVITATION_EMAIL_RETRY_SECONDS = int(os.getenv('INVITATION_EMAIL_RETRY_SECONDS', '60'))
 
 # Frontend URL for invitation links
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
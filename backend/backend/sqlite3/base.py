@@ -0,0 +1,13 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The stock SQLite backend, plus a per-connection switch that makes the
+    next atomic() block open with BEGIN IMMEDIATE (see backend.db.immediate_atomic).
+    """
+
+    begin_immediate = False
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE" if self.begin_immediate else "BEGIN")
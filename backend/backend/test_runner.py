@@ -0,0 +1,29 @@
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TempCacheTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner that points the shared cache (settings.CACHES) at a
+    temporary directory for the run, so tests neither read entries left in
+    the project's cache/ nor write into it.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.mkdtemp(prefix="test-cache-")
+        self._cache_settings = override_settings(CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": self._cache_dir,
+            }
+        })
+        self._cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_settings.disable()
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'students'
+
+    def ready(self):
+        # Version counters for conditional GET
+        from students import signals  # noqa: F401
+
+        # SQLite tuning (settings.SQLITE_PRAGMAS) on every new connection
+        from django.db.backends.signals import connection_created
+        from backend.db import apply_sqlite_pragmas
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="apply_sqlite_pragmas")
+
+        # FTS5 sync triggers lost when a migration remakes the profile table
+        from django.db.models.signals import post_migrate
+        from students.services.search_service import recreate_search_triggers
+        post_migrate.connect(recreate_search_triggers, sender=self, dispatch_uid="recreate_search_triggers")
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.models import Batch
+from students.services.archive_service import (
+    ARCHIVE_AFTER_DAYS, ARCHIVE_CHUNK_SIZE, archivable_batches, archive_batch, pending_rows
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move attendance and submission rows of batches that ended long ago "
+        "into the archive tables, in chunked transactions, and leave "
+        "per-student rollups behind. Reports read the archive with "
+        "?include_archived=true."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS,
+            help="Archive batches whose end_date is at least this many days old"
+        )
+        parser.add_argument(
+            "--batch", type=int, action="append", dest="batch_ids",
+            help="Archive this batch id (repeatable); must have an end_date"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE,
+            help="Rows moved per transaction"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would move")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        if options["batch_ids"]:
+            batches = list(Batch.objects.filter(id__in=options["batch_ids"]).order_by("id"))
+            missing = set(options["batch_ids"]) - {batch.id for batch in batches}
+            if missing:
+                raise CommandError(f"Unknown batch id(s): {', '.join(map(str, sorted(missing)))}")
+            unfinished = [batch.name for batch in batches if batch.end_date is None]
+            if unfinished:
+                raise CommandError(f"Batches without an end_date cannot be archived: {', '.join(unfinished)}")
+        else:
+            batches = list(archivable_batches(options["older_than_days"]))
+
+        if not batches:
+            self.stdout.write("No batches to archive")
+            return
+
+        for batch in batches:
+            if options["dry_run"]:
+                counts = pending_rows(batch)
+            else:
+                counts = archive_batch(batch, options["chunk_size"])
+            summary = ", ".join(f"{label}: {count}" for label, count in counts.items())
+            verb = "would move" if options["dry_run"] else "moved"
+            self.stdout.write(self.style.SUCCESS(f"{batch.name} (ended {batch.end_date}) {verb} {summary}"))
@@ -0,0 +1,120 @@
+import json
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from students.models import Attendance, AssessmentSubmission, Assessment, Batch, StudentProfile
+from students.serializers import (
+    AttendanceSerializer, AssessmentSubmissionSerializer, StudentProfileSerializer
+)
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-row CPU cost of the ModelSerializer and values() read paths "
+        "for the attendance, batch score and student list endpoints. Seeds "
+        "synthetic rows in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=50, help="Students to seed")
+        parser.add_argument("--days", type=int, default=40, help="Attendance days per student")
+        parser.add_argument("--assessments", type=int, default=20, help="Assessments to seed")
+        parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is kept)")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                batch = self.seed(options)
+                self.run(batch, options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def seed(self, options):
+        batch = Batch.objects.create(name="__benchmark__", start_date=date(2020, 1, 1))
+        users = User.objects.bulk_create([
+            User(username=f"__bench_{i}", role=User.Roles.STUDENT)
+            for i in range(options["students"])
+        ])
+        students = StudentProfile.objects.bulk_create([
+            StudentProfile(
+                user=user, first_name=f"First{i}", last_name=f"Last{i}",
+                roll_no=f"__B{i}", batch=batch, city="City", phone="9999999999",
+            )
+            for i, user in enumerate(users)
+        ])
+        start = date(2021, 1, 1)
+        Attendance.objects.bulk_create([
+            Attendance(
+                student=student,
+                batch=batch,
+                date=start + timedelta(days=d),
+                status="present" if (d + student.id) % 3 else "absent",
+            )
+            for student in students
+            for d in range(options["days"])
+        ])
+        assessments = Assessment.objects.bulk_create([
+            Assessment(title=f"Bench {i}", batch=batch, questionnaire={}, answer_key={})
+            for i in range(options["assessments"])
+        ])
+        AssessmentSubmission.objects.bulk_create([
+            AssessmentSubmission(
+                assessment=assessment, student=student, batch=batch,
+                answers={"q1": "a"}, score=float((assessment.id + student.id) % 10),
+            )
+            for assessment in assessments
+            for student in students
+        ])
+        return batch
+
+    def run(self, batch, repeat):
+        cases = [
+            ("attendance", AttendanceSerializer,
+             Attendance.objects.filter(batch=batch)),
+            ("batch scores", AssessmentSubmissionSerializer,
+             AssessmentSubmission.objects.filter(batch=batch)),
+            ("students", StudentProfileSerializer,
+             StudentProfile.objects.filter(batch=batch)),
+        ]
+
+        self.stdout.write(f"{'endpoint':<14}{'rows':>8}{'serializer us/row':>20}{'values us/row':>16}{'speedup':>10}")
+        for name, serializer_class, queryset in cases:
+            plan = serializer_class.values_plan()
+
+            def serializer_path():
+                rows = list(serializer_class.setup_eager_loading(queryset))
+                return serializer_class(rows, many=True).data
+
+            def values_path():
+                return plan.to_representation(list(plan.values(queryset)))
+
+            before_data, before = self.best_of(serializer_path, repeat)
+            after_data, after = self.best_of(values_path, repeat)
+
+            if json.dumps(before_data) != json.dumps(after_data):
+                raise CommandError(f"{name}: values() output differs from the serializer")
+
+            rows = len(before_data) or 1
+            self.stdout.write(
+                f"{name:<14}{rows:>8}{before / rows * 1e6:>20.2f}"
+                f"{after / rows * 1e6:>16.2f}{before / after:>9.1f}x"
+            )
+
+    def best_of(self, func, repeat):
+        best = None
+        data = None
+        for _ in range(max(repeat, 1)):
+            started = time.process_time()
+            data = func()
+            elapsed = time.process_time() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return data, best
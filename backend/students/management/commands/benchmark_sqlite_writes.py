@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.db import sqlite_pragma_statements
+
+
+SCHEMA = """
+CREATE TABLE attendance (
+    id INTEGER PRIMARY KEY,
+    student_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    UNIQUE (student_id, date)
+);
+CREATE TABLE version (key TEXT PRIMARY KEY, version INTEGER NOT NULL);
+INSERT INTO version VALUES ('attendance', 0);
+"""
+
+
+def _mark_attendance(cursor, worker, request, students):
+    # Same statements as BulkAttendanceView: look up each row, then write it
+    day = f"w{worker}-r{request}"
+    for student_id in range(students):
+        row = cursor.execute(
+            "SELECT id FROM attendance WHERE student_id = ? AND date = ?", (student_id, day)
+        ).fetchone()
+        if row is None:
+            cursor.execute(
+                "INSERT INTO attendance (student_id, date, status) VALUES (?, ?, 'present')",
+                (student_id, day),
+            )
+        cursor.execute("UPDATE version SET version = version + 1 WHERE key = 'attendance'")
+
+
+def _worker(path, mode, pragmas, worker, requests, students, results):
+    # Stand-in for one gunicorn worker. Django opens SQLite in autocommit
+    # mode with a 5 second lock timeout.
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    cursor = connection.cursor()
+    for statement in sqlite_pragma_statements(pragmas):
+        cursor.execute(statement)
+
+    committed = locked = 0
+    started = time.perf_counter()
+    for request in range(requests):
+        if mode == "default":
+            # One deferred transaction per row, as update_or_create() does
+            # in autocommit mode
+            units = [(request * students + student_id, 1) for student_id in range(students)]
+            begin = "BEGIN"
+        else:
+            units = [(request, students)]
+            begin = "BEGIN IMMEDIATE"
+        failed = False
+        for day, rows in units:
+            try:
+                cursor.execute(begin)
+                _mark_attendance(cursor, worker, day, rows)
+                cursor.execute("COMMIT")
+            except sqlite3.OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                if connection.in_transaction:
+                    cursor.execute("ROLLBACK")
+                locked += 1
+                failed = True
+        committed += not failed
+    elapsed = time.perf_counter() - started
+    connection.close()
+    results.put((committed, locked, elapsed))
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent bulk-attendance style writers against a scratch SQLite "
+        "file, once with SQLite's defaults (rollback journal, deferred "
+        "per-row transactions) and once in single-node mode (SQLITE_PRAGMAS, "
+        "one BEGIN IMMEDIATE transaction per request), and compare throughput "
+        "and 'database is locked' failures. The project database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent writer processes")
+        parser.add_argument("--requests", type=int, default=50, help="Requests per worker")
+        parser.add_argument("--students", type=int, default=30, help="Rows written per request")
+
+    def handle(self, *args, **options):
+        tuned = getattr(settings, "SQLITE_PRAGMAS", None) or {}
+        modes = [
+            ("default", {"journal_mode": "DELETE", "synchronous": "FULL"}),
+            ("tuned", tuned),
+        ]
+
+        self.stdout.write(
+            f"{'mode':<10}{'requests/s':>12}{'rows/s':>10}{'locked':>8}{'seconds':>10}"
+        )
+        for mode, pragmas in modes:
+            elapsed, committed, locked = self.run(mode, pragmas, options)
+            # committed counts requests whose every transaction succeeded
+            self.stdout.write(
+                f"{mode:<10}{committed / elapsed:>12.1f}"
+                f"{committed * options['students'] / elapsed:>10.0f}"
+                f"{locked:>8}{elapsed:>10.2f}"
+            )
+
+    def run(self, mode, pragmas, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.sqlite3")
+            connection = sqlite3.connect(path)
+            connection.executescript(SCHEMA)
+            connection.close()
+
+            context = multiprocessing.get_context("spawn")
+            results = context.Queue()
+            processes = [
+                context.Process(
+                    target=_worker,
+                    args=(
+                        path, mode, pragmas, worker,
+                        options["requests"], options["students"], results,
+                    ),
+                )
+                for worker in range(options["workers"])
+            ]
+            for process in processes:
+                process.start()
+            outcomes = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+        committed = sum(outcome[0] for outcome in outcomes)
+        locked = sum(outcome[1] for outcome in outcomes)
+        elapsed = max(outcome[2] for outcome in outcomes)
+        return elapsed, committed, locked
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.services.batch_sync import (
+    BATCH_DENORMALIZED_MODELS, SYNC_CHUNK_SIZE, resync_batch_ids, stale_rows
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill or repair the denormalized batch_id on attendance and "
+        "submission rows from each student's current batch. With --check, "
+        "only report rows that are out of sync (exit status 1 if any)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Report drift without writing")
+        parser.add_argument(
+            "--chunk-size", type=int, default=SYNC_CHUNK_SIZE,
+            help="Primary key range updated per statement"
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            drift = {}
+            for model in BATCH_DENORMALIZED_MODELS:
+                count = stale_rows(model).count()
+                drift[model._meta.label] = count
+                self.stdout.write(f"{model._meta.label}: {count} row(s) out of sync")
+            if any(drift.values()):
+                raise CommandError("batch_id is out of sync; run `manage.py sync_batch_ids`")
+            self.stdout.write(self.style.SUCCESS("batch_id is in sync"))
+            return
+
+        for model in BATCH_DENORMALIZED_MODELS:
+            total = 0
+            for last_id, updated in resync_batch_ids(model, options["chunk_size"]):
+                total += updated
+                if updated and options["verbosity"] > 1:
+                    self.stdout.write(f"{model._meta.label}: up to id {last_id}, {updated} updated")
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.label}: {total} row(s) updated"))
@@ -0,0 +1,85 @@
+from django.db import migrations
+
+
+# PostgreSQL: trigram GIN indexes on the expressions Django's icontains
+# lookup compares (UPPER(col::text) LIKE UPPER('%x%')).
+POSTGRESQL_FORWARDS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS students_profile_first_name_trgm ON students_studentprofile '
+    'USING gin (UPPER("first_name"::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS students_profile_last_name_trgm ON students_studentprofile '
+    'USING gin (UPPER("last_name"::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS students_profile_roll_no_trgm ON students_studentprofile '
+    'USING gin (UPPER("roll_no"::text) gin_trgm_ops)',
+]
+
+POSTGRESQL_BACKWARDS = [
+    "DROP INDEX IF EXISTS students_profile_first_name_trgm",
+    "DROP INDEX IF EXISTS students_profile_last_name_trgm",
+    "DROP INDEX IF EXISTS students_profile_roll_no_trgm",
+]
+
+# SQLite: external-content FTS5 table with the trigram tokenizer (substring
+# matching, SQLite >= 3.34), kept in sync by triggers. SQLite drops the
+# triggers when Django remakes students_studentprofile for an ALTER; the
+# post_migrate hook (search_service.ensure_search_triggers) recreates them.
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS students_studentprofile_fts USING fts5("
+    "first_name, last_name, roll_no, "
+    "content='students_studentprofile', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS students_studentprofile_fts_ai "
+    "AFTER INSERT ON students_studentprofile BEGIN "
+    "INSERT INTO students_studentprofile_fts(rowid, first_name, last_name, roll_no) "
+    "VALUES (new.id, new.first_name, new.last_name, new.roll_no); END",
+    "CREATE TRIGGER IF NOT EXISTS students_studentprofile_fts_ad "
+    "AFTER DELETE ON students_studentprofile BEGIN "
+    "INSERT INTO students_studentprofile_fts(students_studentprofile_fts, rowid, first_name, last_name, roll_no) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.roll_no); END",
+    "CREATE TRIGGER IF NOT EXISTS students_studentprofile_fts_au "
+    "AFTER UPDATE ON students_studentprofile BEGIN "
+    "INSERT INTO students_studentprofile_fts(students_studentprofile_fts, rowid, first_name, last_name, roll_no) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.roll_no); "
+    "INSERT INTO students_studentprofile_fts(rowid, first_name, last_name, roll_no) "
+    "VALUES (new.id, new.first_name, new.last_name, new.roll_no); END",
+    "INSERT INTO students_studentprofile_fts(students_studentprofile_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS students_studentprofile_fts_ai",
+    "DROP TRIGGER IF EXISTS students_studentprofile_fts_ad",
+    "DROP TRIGGER IF EXISTS students_studentprofile_fts_au",
+    "DROP TABLE IF EXISTS students_studentprofile_fts",
+]
+
+
+def _sqlite_supports_trigram(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        has_fts5 = cursor.fetchone()[0]
+    return has_fts5 and connection.Database.sqlite_version_info >= (3, 34, 0)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        sql = statements.get(connection.vendor, [])
+        # Without FTS5 trigram support search falls back to LIKE
+        if connection.vendor == "sqlite" and not _sqlite_supports_trigram(connection):
+            sql = []
+        for statement in sql:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_resourceversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"postgresql": POSTGRESQL_FORWARDS, "sqlite": SQLITE_FORWARDS}),
+            run({"postgresql": POSTGRESQL_BACKWARDS, "sqlite": SQLITE_BACKWARDS}),
+        ),
+    ]
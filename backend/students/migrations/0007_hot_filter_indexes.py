@@ -0,0 +1,29 @@
+# Generated by Django 4.2.26 on 2026-10-19 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_student_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(fields=['batch', 'test_type'], name='assessment_batch_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assessmentsubmission',
+            index=models.Index(fields=['student', '-submitted_at'], name='submission_student_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'status'], name='attendance_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'student'], name='attendance_date_student_idx'),
+        ),
+    ]
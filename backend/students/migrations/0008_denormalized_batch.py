@@ -0,0 +1,43 @@
+# Generated by Django 4.2.26 on 2026-10-19 00:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_batch_ids(apps, schema_editor):
+    # One UPDATE per table; `manage.py sync_batch_ids` repairs in chunks later
+    StudentProfile = apps.get_model('students', 'StudentProfile')
+    student_batch = models.Subquery(
+        StudentProfile.objects.filter(pk=models.OuterRef('student_id')).values('batch_id')[:1]
+    )
+    for name in ('Attendance', 'AssessmentSubmission'):
+        apps.get_model('students', name).objects.update(batch_id=student_batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessmentsubmission',
+            name='batch',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assessment_submissions', to='students.batch'),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='batch',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_records', to='students.batch'),
+        ),
+        migrations.AddIndex(
+            model_name='assessmentsubmission',
+            index=models.Index(fields=['batch', '-submitted_at'], name='submission_batch_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['batch', 'date'], name='attendance_batch_date_idx'),
+        ),
+        migrations.RunPython(backfill_batch_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.26 on 2026-10-19 00:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_denormalized_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attendance_total', models.PositiveIntegerField(default=0)),
+                ('attendance_present', models.PositiveIntegerField(default=0)),
+                ('submission_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_rollups', to='students.batch')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_rollups', to='students.studentprofile')),
+            ],
+            options={
+                'unique_together': {('batch', 'student')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSubmission',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('answers', models.JSONField()),
+                ('score', models.FloatField(default=0)),
+                ('submitted_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('assessment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.assessment')),
+                ('batch', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='students.batch')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.studentprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'submitted_at'], name='archived_sub_student_idx'), models.Index(fields=['batch', 'submitted_at'], name='archived_sub_batch_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent')], max_length=10)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('batch', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='students.batch')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.studentprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'date'], name='archived_att_student_idx'), models.Index(fields=['batch', 'date'], name='archived_att_batch_idx')],
+            },
+        ),
+    ]
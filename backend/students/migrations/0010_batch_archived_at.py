@@ -0,0 +1,30 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:15
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+
+def mark_archived_batches(apps, schema_editor):
+    # Batches archive_batches already ran on
+    Batch = apps.get_model('students', 'Batch')
+    ArchiveRollup = apps.get_model('students', 'ArchiveRollup')
+    Batch.objects.filter(
+        Exists(ArchiveRollup.objects.filter(batch=OuterRef('pk')))
+    ).update(archived_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0009_batch_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batch',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_archived_batches, migrations.RunPython.noop),
+    ]
@@ -15,6 +15,8 @@ class Batch(models.Model):
     description = models.TextField(blank=True, null=True)
     start_date = models.DateField()
     end_date = models.DateField(blank=True, null=True)
+    # Set once `manage.py archive_batches` starts moving its rows
+    archived_at = models.DateTimeField(blank=True, null=True, editable=False)
 
     def __str__(self):
         return self.name
@@ -62,6 +64,17 @@ class StudentProfile(models.Model):
         return f"{self.roll_no} - {self.first_name} {self.last_name}"
 
 
+def stamp_batch(instance, save_kwargs):
+    """
+    Record the student's current batch on a row about to be saved. Rows
+    written with bulk_create()/update() must set batch_id themselves.
+    """
+    instance.batch_id = instance.student.batch_id
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields is not None:
+        save_kwargs['update_fields'] = {*update_fields, 'batch'}
+
+
 class Attendance(models.Model):
     STATUS_CHOICES = [
         ('present', 'Present'),
@@ -78,10 +91,31 @@ class Attendance(models.Model):
 
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
 
+    # Copy of student.batch so batch-level queries need no join; kept in
+    # sync by save(), the StudentProfile signal and `manage.py sync_batch_ids`
+    batch = models.ForeignKey(
+        Batch,
+        on_delete=models.SET_NULL,
+        null=True,
+        editable=False,
+        related_name='attendance_records'
+    )
+
     # To prevent duplicate attendance for same day
     class Meta:
         unique_together = ('student', 'date')
         ordering = ['-date']
+        indexes = [
+            # Present/total counts per student
+            models.Index(fields=['student', 'status'], name='attendance_student_status_idx'),
+            # Batch-wide day / month windows
+            models.Index(fields=['date', 'student'], name='attendance_date_student_idx'),
+            models.Index(fields=['batch', 'date'], name='attendance_batch_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        stamp_batch(self, kwargs)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.student.roll_no} - {self.date} - {self.status}"
@@ -114,6 +148,11 @@ class Assessment(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['batch', 'test_type'], name='assessment_batch_type_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.get_test_type_display()})"
 
@@ -128,8 +167,101 @@ class AssessmentSubmission(models.Model):
 
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    # Copy of student.batch, see Attendance.batch
+    batch = models.ForeignKey(
+        Batch,
+        on_delete=models.SET_NULL,
+        null=True,
+        editable=False,
+        related_name='assessment_submissions'
+    )
+
     class Meta:
         unique_together = ('assessment', 'student')
+        indexes = [
+            # A student's history, newest first
+            models.Index(fields=['student', '-submitted_at'], name='submission_student_recent_idx'),
+            models.Index(fields=['batch', '-submitted_at'], name='submission_batch_recent_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        stamp_batch(self, kwargs)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.student.roll_no} → {self.assessment.title} = {self.score}"
+
+
+class ResourceVersion(models.Model):
+    """
+    Monotonic version counter per table or per batch (e.g. "batches",
+    "assessment:12"), bumped on every write. Conditional GET validators
+    (ETag / Last-Modified) are built from these, see students/services/versioning.py.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+# Cold storage for finished batches, filled by `manage.py archive_batches`
+# (students/services/archive_service.py). Rows keep their original id.
+
+class ArchivedAttendance(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='+')
+    batch = models.ForeignKey(Batch, on_delete=models.SET_NULL, null=True, related_name='+')
+    date = models.DateField()
+    status = models.CharField(max_length=10, choices=Attendance.STATUS_CHOICES)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'date'], name='archived_att_student_idx'),
+            models.Index(fields=['batch', 'date'], name='archived_att_batch_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.date} - {self.status} (archived)"
+
+
+class ArchivedSubmission(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE, related_name='+')
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='+')
+    batch = models.ForeignKey(Batch, on_delete=models.SET_NULL, null=True, related_name='+')
+    answers = models.JSONField()
+    score = models.FloatField(default=0)
+    submitted_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'submitted_at'], name='archived_sub_student_idx'),
+            models.Index(fields=['batch', 'submitted_at'], name='archived_sub_batch_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} → {self.assessment_id} = {self.score} (archived)"
+
+
+class ArchiveRollup(models.Model):
+    """
+    Per-student totals for an archived batch, so summaries (attendance
+    percentage, average score) never have to read the archive tables.
+    """
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE, related_name='archive_rollups')
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='archive_rollups')
+    attendance_total = models.PositiveIntegerField(default=0)
+    attendance_present = models.PositiveIntegerField(default=0)
+    submission_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('batch', 'student')
+
+    def __str__(self):
+        return f"{self.batch_id} / {self.student_id} rollup"
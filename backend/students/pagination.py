@@ -0,0 +1,145 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class StandardPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed, unique ordering such as
+    ('-date', '-id').
+
+    Each page is fetched with a `WHERE (date, id) < (last_date, last_id)`
+    style predicate instead of COUNT(*) + OFFSET, so every page costs the same
+    no matter how deep the client has paged. The opaque `cursor` param
+    encodes the boundary row and the paging direction.
+
+    Response shape: {"next": url|null, "previous": url|null, "results": [...]}
+    """
+    page_size = StandardPagination.page_size
+    page_size_query_param = StandardPagination.page_size_query_param
+    max_page_size = StandardPagination.max_page_size
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering):
+        # The last field must be unique (normally the primary key)
+        self.ordering = tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, payload['v'], strict=True)
+            ]
+            return values, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        values = []
+        for field in self.ordering:
+            # Rows are model instances, or dicts on the values() read path
+            name = field.lstrip('-')
+            value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'v': values, 'r': 1 if reverse else 0}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def seek_filter(self, ordering, values):
+        """(a, b, c) "after" (x, y, z) as a disjunction of prefix equalities."""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_field, prev_value in zip(ordering[:i], values[:i]):
+                term &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= term
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(f[1:] if f.startswith('-') else f'-{f}' for f in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, values))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def get_next_link(self):
+        if not (self.has_next and self.last):
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.first:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+def get_list_paginator(request, cursor_ordering):
+    """
+    Page-number pagination by default; keyset pagination over
+    `cursor_ordering` when the client opts in with ?pagination=cursor
+    (or follows a `cursor` link).
+    """
+    if (
+        request.GET.get('pagination') == 'cursor'
+        or KeysetPagination.cursor_query_param in request.GET
+    ):
+        return KeysetPagination(cursor_ordering)
+    return StandardPagination()
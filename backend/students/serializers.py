@@ -1,13 +1,238 @@
 from rest_framework import serializers
 from students.models import Batch, StudentProfile, Attendance, Assessment, AssessmentSubmission
+from users.authentication import student_profile_of
 
 
-class BatchSerializer(serializers.ModelSerializer):
+def get_sparse_field_names(request, available):
+    """
+    Resolve ?fields=a,b / ?exclude=c against the `available` field names.
+
+    Only GET requests are narrowed. Returns None when no sparse fieldset
+    was requested, otherwise the set of field names to keep.
+    """
+    if request is None or request.method != "GET":
+        return None
+    params = getattr(request, "query_params", request.GET)
+    fields = params.get("fields")
+    exclude = params.get("exclude")
+    if not fields and not exclude:
+        return None
+
+    names = set(available)
+    if fields:
+        names &= {name.strip() for name in fields.split(",")}
+    if exclude:
+        names -= {name.strip() for name in exclude.split(",")}
+    return names
+
+
+class SparseFieldsMixin:
+    """
+    Drops the fields not selected by ?fields= / ?exclude= (read from the
+    request in the serializer context), so they are neither computed nor
+    sent.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sparse_names = get_sparse_field_names(self.context.get("request"), self.fields)
+        if self._sparse_names is not None:
+            for name in list(self.fields):
+                if name not in self._sparse_names:
+                    self.fields.pop(name)
+
+    def filter_sparse(self, data):
+        """For serializers that build their representation by hand."""
+        if self._sparse_names is None:
+            return data
+        return {key: value for key, value in data.items() if key in self._sparse_names}
+
+    def to_representation(self, instance):
+        return self.filter_sparse(super().to_representation(instance))
+
+
+class EagerLoadingMixin:
+    """
+    Lets a list view load exactly what the serializer reads.
+
+    Serializers list the relations their fields traverse in
+    `select_related_fields`; `setup_eager_loading(queryset, request)` joins
+    the ones the selected fields need and narrows the loaded columns with
+    `.only()` to the fields' sources. Serializers with method fields
+    (source "*") keep all joins and instead `.defer()` whichever of their
+    `deferrable_fields` (heavy columns) were not selected.
+    """
+    select_related_fields = ()
+    deferrable_fields = ()
+
+    @classmethod
+    def get_loading_plan(cls, fields):
+        """Return (select_related, only, defer) for the given bound fields."""
+        related = set()
+        for path in cls.select_related_fields:
+            parts = path.split("__")
+            related.update("__".join(parts[:i]) for i in range(1, len(parts) + 1))
+
+        readable = [field for field in fields.values() if not field.write_only]
+        if any(field.source == "*" for field in readable):
+            defer = [name for name in cls.deferrable_fields if name not in fields]
+            return list(cls.select_related_fields), None, defer
+
+        joins = set()
+        only = set()
+        for field in readable:
+            parts = field.source.split(".")
+            # Keep the deepest prefix that is actually joined
+            for i in range(len(parts), 0, -1):
+                if i == 1 or "__".join(parts[:i - 1]) in related:
+                    only.add("__".join(parts[:i]))
+                    joins.update("__".join(parts[:j]) for j in range(1, i))
+                    break
+
+        return sorted(joins), sorted(only | joins), []
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        plans = cls.__dict__.get("_loading_plans")
+        if plans is None:
+            plans = cls._loading_plans = {}
+
+        fields = cls(context={"request": request}).fields
+        key = frozenset(fields)
+        if key not in plans:
+            plans[key] = cls.get_loading_plan(fields)
+        select_related, only, defer = plans[key]
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if only:
+            queryset = queryset.only(*only)
+        if defer:
+            queryset = queryset.defer(*defer)
+        return queryset
+
+
+# Fields whose to_representation() is a no-op for the values the database
+# driver already returns, so the values() read path can copy them as-is.
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField,
+    serializers.FloatField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class ValuesPlan:
+    """
+    Precompiled mapping from a values() row to a serializer's output.
+
+    Each step is (output key, values() key, converter, null-relation key);
+    the step is skipped the way DRF skips it when the nullable relation the
+    source goes through is empty.
+    """
+
+    def __init__(self, values_keys, steps):
+        self.values_keys = values_keys
+        self.steps = steps
+
+    def values(self, queryset, *extra):
+        """values() queryset with every key the plan reads, plus `extra`."""
+        keys = list(self.values_keys)
+        keys += [key for key in extra if key not in keys]
+        return queryset.values(*keys)
+
+    def to_representation(self, rows):
+        steps = self.steps
+        data = []
+        for row in rows:
+            item = {}
+            for key, source, convert, guard, allow_null in steps:
+                if guard is not None and row[guard] is None:
+                    if allow_null:
+                        item[key] = None
+                    continue
+                value = row[source]
+                item[key] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+
+class ValuesReadMixin:
+    """
+    Fast read path for hot list endpoints: rows are read with values() and
+    mapped through a ValuesPlan instead of instantiating model objects and
+    running every field's get_attribute()/to_representation().
+
+    The output is identical to the serializer's. `values_plan()` returns None
+    for serializers it cannot mirror (method fields, custom
+    to_representation), in which case callers use the serializer.
+    """
+
+    @classmethod
+    def build_values_plan(cls, fields):
+        model = cls.Meta.model
+        values_keys = []
+        steps = []
+
+        def add(key):
+            if key not in values_keys:
+                values_keys.append(key)
+            return key
+
+        for field in fields.values():
+            if field.write_only:
+                continue
+            if field.source == "*":
+                return None
+
+            parts = field.source.split(".")
+            guard = None
+            if len(parts) == 1:
+                source = add(parts[0])
+            elif len(parts) == 2 and parts[1] in ("id", "pk"):
+                # user.id -> the user_id column, no join
+                source = add(parts[0])
+            elif len(parts) == 2:
+                relation = model._meta.get_field(parts[0])
+                source = add("__".join(parts))
+                if relation.null:
+                    guard = add(parts[0])
+            else:
+                return None
+
+            if isinstance(field, PASSTHROUGH_FIELDS):
+                convert = None
+            elif isinstance(field, serializers.JSONField) and not field.binary:
+                convert = None
+            else:
+                convert = field.to_representation
+            steps.append((field.field_name, source, convert, guard, field.allow_null))
+
+        return ValuesPlan(values_keys, steps)
+
+    @classmethod
+    def values_plan(cls, request=None):
+        plans = cls.__dict__.get("_values_plans")
+        if plans is None:
+            plans = cls._values_plans = {}
+
+        fields = cls(context={"request": request}).fields
+        key = frozenset(fields)
+        if key not in plans:
+            plans[key] = cls.build_values_plan(fields)
+        return plans[key]
+
+
+class BatchSerializer(SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Batch
         fields = "__all__"
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(SparseFieldsMixin, EagerLoadingMixin, ValuesReadMixin, serializers.ModelSerializer):
+    select_related_fields = ("user", "batch")
+
     user_id = serializers.IntegerField(source='user.id', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
     batch_name = serializers.CharField(source='batch.name', read_only=True)
@@ -17,16 +242,22 @@ class StudentProfileSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['user']
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(SparseFieldsMixin, EagerLoadingMixin, ValuesReadMixin, serializers.ModelSerializer):
+    select_related_fields = ("student",)
+
     student_name = serializers.CharField(source='student.first_name', read_only=True)
     student_roll_no = serializers.CharField(source='student.roll_no', read_only=True)
 
     class Meta:
         model = Attendance
-        fields = "__all__"
+        # batch is an internal copy of student.batch
+        exclude = ("batch",)
 
 
-class AssessmentSerializer(serializers.ModelSerializer):
+class AssessmentSerializer(SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ("batch",)
+    deferrable_fields = ("description", "questionnaire", "answer_key")
+
     batch_name = serializers.CharField(source='batch.name', read_only=True)
 
     # extra fields for students
@@ -46,12 +277,20 @@ class AssessmentSerializer(serializers.ModelSerializer):
             return None
         if not hasattr(request.user, "is_student") or not request.user.is_student():
             return None
-        return getattr(request.user, "student_profile", None)
+        return student_profile_of(request.user)
+
+    def _get_own_submission(self, obj, profile):
+        # Precomputed by with_submission_status() on list views
+        if hasattr(obj, "own_submissions"):
+            return obj.own_submissions[0] if obj.own_submissions else None
+        return obj.submissions.filter(student=profile).first()
 
     def get_is_submitted(self, obj):
         profile = self._get_student_profile()
         if not profile:
             return False
+        if hasattr(obj, "is_submitted"):
+            return obj.is_submitted
         return obj.submissions.filter(student=profile).exists()
 
     def get_student_submission(self, obj):
@@ -62,7 +301,7 @@ class AssessmentSerializer(serializers.ModelSerializer):
         profile = self._get_student_profile()
         if not profile:
             return None
-        submission = obj.submissions.filter(student=profile).first()
+        submission = self._get_own_submission(obj, profile)
         if not submission:
             return None
         return AssessmentSubmissionSerializer(submission).data
@@ -119,7 +358,9 @@ class AssessmentSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class AssessmentSubmissionSerializer(serializers.ModelSerializer):
+class AssessmentSubmissionSerializer(SparseFieldsMixin, EagerLoadingMixin, ValuesReadMixin, serializers.ModelSerializer):
+    select_related_fields = ("student", "assessment")
+
     student_name = serializers.CharField(source='student.first_name', read_only=True)
     student_roll_no = serializers.CharField(source='student.roll_no', read_only=True)
     assessment_title = serializers.CharField(source='assessment.title', read_only=True)
@@ -129,3 +370,16 @@ class AssessmentSubmissionSerializer(serializers.ModelSerializer):
         fields = ['id', 'assessment', 'student', 'answers', 'score', 'submitted_at', 
                   'student_name', 'student_roll_no', 'assessment_title']
         read_only_fields = ['score', 'submitted_at']
+
+
+class AssessmentSubmissionRowSerializer(SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """Compact submission row (no answers) for the per-assessment submissions list."""
+    select_related_fields = ("student",)
+
+    student_name = serializers.CharField(source='student.first_name', read_only=True)
+    student_roll_no = serializers.CharField(source='student.roll_no', read_only=True)
+
+    class Meta:
+        model = AssessmentSubmission
+        fields = ['id', 'student', 'student_name', 'student_roll_no', 'score', 'submitted_at']
+        read_only_fields = fields
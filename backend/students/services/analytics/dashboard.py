@@ -0,0 +1,151 @@
+from datetime import date
+from typing import Any, Dict, Optional
+
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from students.models import Assessment, AssessmentSubmission, Attendance, Batch, StudentProfile
+
+
+# Number of most recent assessments shown on the teacher dashboard
+RECENT_ASSESSMENTS = 10
+
+# A student is "at risk" below either threshold. 40 matches the label used
+# by the low-performer predictor; students without any submissions or
+# attendance records are not counted on that criterion.
+AT_RISK_SCORE = 40
+AT_RISK_ATTENDANCE = 75
+
+
+def _count_subquery(queryset, column: str = 'student'):
+    """COUNT(*) of `queryset` rows whose `column` matches the outer row."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{column: OuterRef('pk')})
+            .values(column)
+            .annotate(n=Count('id'))
+            .values('n'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def teacher_batches(user) -> QuerySet:
+    """
+    Batches whose figures `user` sees on the teacher dashboard. Batches are
+    not assigned to teachers, so like BatchView this is every batch for
+    teachers and admins, and none for anyone else. Archived batches are
+    left out: their rows are no longer in the live tables read here.
+    """
+    if user.is_teacher() or user.is_admin():
+        return Batch.objects.filter(archived_at__isnull=True)
+    return Batch.objects.none()
+
+
+def _at_risk_counts(batch_ids) -> Dict[int, int]:
+    """Number of at-risk students per batch id, in one grouped query."""
+    students = StudentProfile.objects.filter(batch_id__in=batch_ids).annotate(
+        avg_score=Subquery(
+            AssessmentSubmission.objects.filter(student=OuterRef('pk'))
+            .values('student')
+            .annotate(avg=Avg('score'))
+            .values('avg')
+        ),
+        attendance_total=_count_subquery(Attendance.objects.all()),
+        attendance_present=_count_subquery(Attendance.objects.filter(status='present')),
+    )
+    # No attendance records means 0 < 0, i.e. not at risk on that criterion
+    at_risk = Q(avg_score__lt=AT_RISK_SCORE) | Q(
+        attendance_present__lt=F('attendance_total') * AT_RISK_ATTENDANCE / 100.0,
+    )
+    rows = (
+        students.values('batch_id')
+        .annotate(at_risk=Count('id', filter=at_risk))
+        .order_by()
+    )
+    return {row['batch_id']: row['at_risk'] for row in rows}
+
+
+def teacher_dashboard(user, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Everything on `user`'s teacher home screen, limited to
+    teacher_batches(user) and built from a fixed number of queries (four)
+    regardless of how many batches, students or assessments exist.
+
+    Args:
+        user: The teacher or admin asking
+        today: Day used for the attendance status; defaults to the current date
+
+    Returns:
+        Dictionary with 'date', 'totals', 'batches' (roster size, today's
+        attendance and at-risk count per batch) and 'recent_assessments'
+        (with submission counts and rates)
+    """
+    today = today or timezone.localdate()
+    # Subquery in each of the queries below, not a separate query
+    batch_ids = teacher_batches(user).values('id')
+
+    batches = list(
+        teacher_batches(user)
+        .annotate(student_count=Count('students'))
+        .order_by('-start_date', 'id')
+        .values('id', 'name', 'start_date', 'end_date', 'student_count')
+    )
+
+    marked = {}
+    for row in (
+        Attendance.objects.filter(date=today, batch_id__in=batch_ids)
+        .values('batch_id', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    ):
+        marked.setdefault(row['batch_id'], {})[row['status']] = row['n']
+
+    at_risk = _at_risk_counts(batch_ids)
+
+    roster = {}
+    for batch in batches:
+        counts = marked.get(batch['id'], {})
+        present = counts.get('present', 0)
+        absent = counts.get('absent', 0)
+        batch['attendance_today'] = {
+            'marked': present + absent > 0,
+            'present': present,
+            'absent': absent,
+            'unmarked': max(batch['student_count'] - present - absent, 0),
+        }
+        batch['at_risk_count'] = at_risk.get(batch['id'], 0)
+        roster[batch['id']] = batch['student_count']
+
+    recent = list(
+        Assessment.objects.filter(batch_id__in=batch_ids)
+        .annotate(submission_count=Count('submissions'))
+        .order_by('-created_at', '-id')
+        .values('id', 'title', 'test_type', 'batch_id', 'batch__name',
+                'total_marks', 'created_at', 'submission_count')
+        [:RECENT_ASSESSMENTS]
+    )
+    for assessment in recent:
+        assessment['batch_name'] = assessment.pop('batch__name')
+        student_count = roster.get(assessment['batch_id'], 0)
+        assessment['student_count'] = student_count
+        assessment['submission_rate'] = (
+            round(assessment['submission_count'] / student_count * 100, 2)
+            if student_count else 0
+        )
+
+    return {
+        'date': today,
+        'totals': {
+            'batches': len(batches),
+            'students': sum(roster.values()),
+            'at_risk': sum(batch['at_risk_count'] for batch in batches),
+            'batches_marked_today': sum(
+                1 for batch in batches if batch['attendance_today']['marked']
+            ),
+        },
+        'batches': batches,
+        'recent_assessments': recent,
+    }
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List
+
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncWeek
+
+
+# Supported `bucket=` values for trend endpoints. A "term" is a calendar quarter.
+TREND_BUCKETS = {
+    "week": TruncWeek,
+    "month": TruncMonth,
+    "term": TruncQuarter,
+}
+
+# Upper bound for `points=` so a single trend payload stays small.
+MAX_TREND_POINTS = 500
+
+
+def _as_number(value: Any) -> float:
+    """Map dates/datetimes onto a numeric axis so they can be compared."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return float(value.toordinal())
+    return float(value or 0)
+
+
+def lttb(
+    rows: List[Dict[str, Any]],
+    threshold: int,
+    x: Callable[[Dict[str, Any]], Any],
+    y: Callable[[Dict[str, Any]], Any],
+) -> List[Dict[str, Any]]:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Reduces `rows` (already ordered along x) to at most `threshold` rows while
+    keeping the visual shape of the series: the first and last points are
+    always kept and, for every bucket in between, the row forming the largest
+    triangle with the previously selected row and the next bucket's average.
+
+    Args:
+        rows: Ordered list of row dicts
+        threshold: Maximum number of rows to return
+        x: Callable returning the x value (number, date or datetime) of a row
+        y: Callable returning the y value of a row
+
+    Returns:
+        A sub-list of `rows` with at most `threshold` entries
+    """
+    length = len(rows)
+    if threshold >= length or threshold <= 0:
+        return list(rows)
+    if threshold < 3:
+        return [rows[0], rows[-1]][:threshold]
+
+    xs = [_as_number(x(r)) for r in rows]
+    ys = [_as_number(y(r)) for r in rows]
+
+    sampled = [rows[0]]
+    every = (length - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average point of the next bucket
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, length)
+        avg_len = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / avg_len
+        avg_y = sum(ys[avg_start:avg_end]) / avg_len
+
+        # Current bucket
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+
+        max_area = -1.0
+        next_a = range_start
+        for j in range(range_start, range_end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a])
+                - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > max_area:
+                max_area = area
+                next_a = j
+
+        sampled.append(rows[next_a])
+        a = next_a
+
+    sampled.append(rows[-1])
+    return sampled
@@ -0,0 +1,180 @@
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Type
+
+from django.db import models
+from django.db.models import Count, Q, QuerySet, Sum
+from django.utils import timezone
+
+from backend.db import immediate_atomic
+from students.models import (
+    Assessment, AssessmentSubmission, ArchivedAttendance, ArchivedSubmission,
+    ArchiveRollup, Attendance, Batch
+)
+from students.services import versioning
+
+
+# Batches whose end_date is older than this are archived by default
+ARCHIVE_AFTER_DAYS = 730
+
+ARCHIVE_CHUNK_SIZE = 5000
+
+# Hot model -> (archive model, copied columns)
+ARCHIVE_TABLES = {
+    Attendance: (ArchivedAttendance, ('id', 'student_id', 'batch_id', 'date', 'status')),
+    AssessmentSubmission: (
+        ArchivedSubmission,
+        ('id', 'assessment_id', 'student_id', 'batch_id', 'answers', 'score', 'submitted_at'),
+    ),
+}
+
+
+def attendance_sources(include_archived: bool = False) -> List[QuerySet]:
+    """Attendance querysets a report reads: the hot table, plus the archive on request."""
+    sources = [Attendance.objects.all()]
+    if include_archived:
+        sources.append(ArchivedAttendance.objects.all())
+    return sources
+
+
+def submission_sources(include_archived: bool = False) -> List[QuerySet]:
+    """Submission querysets a report reads: the hot table, plus the archive on request."""
+    sources = [AssessmentSubmission.objects.all()]
+    if include_archived:
+        sources.append(ArchivedSubmission.objects.all())
+    return sources
+
+
+def archivable_batches(
+    older_than_days: int = ARCHIVE_AFTER_DAYS, today: Optional[date] = None
+) -> QuerySet:
+    """Batches that ended more than `older_than_days` days before `today`."""
+    cutoff = (today or timezone.localdate()) - timedelta(days=older_than_days)
+    return Batch.objects.filter(end_date__lt=cutoff).order_by('end_date', 'id')
+
+
+def pending_rows(batch: Batch) -> Dict[str, int]:
+    """Rows of `batch` still in the hot tables, per model label."""
+    return {
+        model._meta.label: model.objects.filter(batch_id=batch.id).count()
+        for model in ARCHIVE_TABLES
+    }
+
+
+def move_rows(
+    model: Type[models.Model], batch: Batch, chunk_size: int = ARCHIVE_CHUNK_SIZE
+) -> Iterator[int]:
+    """
+    Move `batch`'s rows of `model` into its archive table, one transaction
+    per chunk so writers are never blocked for long.
+
+    Args:
+        model: One of ARCHIVE_TABLES
+        batch: The batch being archived
+        chunk_size: Rows copied and deleted per transaction
+
+    Yields:
+        Rows moved by each chunk
+    """
+    archive_model, fields = ARCHIVE_TABLES[model]
+    while True:
+        with immediate_atomic():
+            rows = list(
+                model.objects.filter(batch_id=batch.id).order_by('id').values(*fields)[:chunk_size]
+            )
+            if not rows:
+                return
+            archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+            model.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        yield len(rows)
+
+
+def rebuild_rollups(batch: Batch) -> int:
+    """
+    Recompute `batch`'s ArchiveRollup rows from its archived rows.
+
+    Returns:
+        Number of rollup rows written
+    """
+    rollups = {}
+
+    def rollup(student_id):
+        if student_id not in rollups:
+            rollups[student_id] = ArchiveRollup(batch=batch, student_id=student_id)
+        return rollups[student_id]
+
+    attendance = (
+        ArchivedAttendance.objects.filter(batch_id=batch.id)
+        .values('student_id')
+        .annotate(total=Count('id'), present=Count('id', filter=Q(status='present')))
+        .order_by()
+    )
+    for row in attendance:
+        item = rollup(row['student_id'])
+        item.attendance_total = row['total']
+        item.attendance_present = row['present']
+
+    submissions = (
+        ArchivedSubmission.objects.filter(batch_id=batch.id)
+        .values('student_id')
+        .annotate(count=Count('id'), score_sum=Sum('score'))
+        .order_by()
+    )
+    for row in submissions:
+        item = rollup(row['student_id'])
+        item.submission_count = row['count']
+        item.score_sum = row['score_sum'] or 0
+
+    with immediate_atomic():
+        ArchiveRollup.objects.filter(batch_id=batch.id).delete()
+        ArchiveRollup.objects.bulk_create(rollups.values())
+    return len(rollups)
+
+
+def archive_batch(batch: Batch, chunk_size: int = ARCHIVE_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Mark a finished batch archived, move its attendance and submissions to
+    the archive tables and refresh its rollups. Safe to re-run: rows added
+    after an earlier run are moved and the rollups are rebuilt from the
+    whole archive.
+
+    Args:
+        batch: The batch to archive
+        chunk_size: Rows moved per transaction
+
+    Returns:
+        Rows moved per model label
+    """
+    # Live assessment views stop reading this batch from here on
+    if batch.archived_at is None:
+        batch.archived_at = timezone.now()
+        batch.save(update_fields=['archived_at'])
+
+    moved = {
+        model._meta.label: sum(move_rows(model, batch, chunk_size))
+        for model in ARCHIVE_TABLES
+    }
+    rebuild_rollups(batch)
+
+    # Live batch and assessment responses no longer include the moved rows
+    assessment_ids = Assessment.objects.filter(batch_id=batch.id).values_list('id', flat=True)
+    versioning.bump(
+        versioning.batch_attendance_key(batch.id),
+        versioning.batch_submissions_key(batch.id),
+        *(versioning.assessment_key(assessment_id) for assessment_id in assessment_ids),
+    )
+    return moved
+
+
+def rollup_totals(**filters) -> Dict[str, float]:
+    """
+    Summed ArchiveRollup counters for e.g. `batch=` or `student=`, as a dict
+    with attendance_total, attendance_present, submission_count and score_sum
+    (zeros when nothing is archived).
+    """
+    totals = ArchiveRollup.objects.filter(**filters).aggregate(
+        attendance_total=Sum('attendance_total'),
+        attendance_present=Sum('attendance_present'),
+        submission_count=Sum('submission_count'),
+        score_sum=Sum('score_sum'),
+    )
+    return {key: value or 0 for key, value in totals.items()}
@@ -1,9 +1,12 @@
 from typing import Dict, List, Optional, Union, Any
 from django.db import models
-from django.db.models import Avg, Sum, QuerySet
+from operator import itemgetter
+from django.db.models import Avg, Count, Exists, OuterRef, Prefetch, Sum, QuerySet
 from django.core.exceptions import ValidationError
 
 from students.models import AssessmentSubmission, StudentProfile, Batch
+from students.services.analytics.downsample import TREND_BUCKETS, lttb
+from students.services.archive_service import rollup_totals, submission_sources
 
 
 def calculate_score(answer_key: dict, answers: dict) -> float:
@@ -83,38 +86,158 @@ def calculate_score(answer_key: dict, answers: dict) -> float:
     return total
 
 
-def get_score_trend(student: StudentProfile) -> List[Dict[str, Any]]:
+def with_submission_status(queryset: QuerySet, student: StudentProfile) -> QuerySet:
+    """
+    Annotate an Assessment queryset with the given student's submission state.
+
+    Adds an `is_submitted` boolean (EXISTS subquery) and prefetches the
+    student's own submission into `own_submissions`, so serializing a page of
+    assessments costs a constant number of queries.
+    
+    Args:
+        queryset: Assessment queryset to annotate
+        student: The student whose submissions are looked up
+        
+    Returns:
+        The annotated queryset
+    """
+    own_submissions = AssessmentSubmission.objects.filter(student=student)
+    return queryset.annotate(
+        is_submitted=Exists(own_submissions.filter(assessment=OuterRef('pk')))
+    ).prefetch_related(
+        Prefetch(
+            'submissions',
+            queryset=own_submissions.select_related('student'),
+            to_attr='own_submissions',
+        )
+    )
+
+
+def submission_summary(assessment, include_archived: bool = False) -> Dict[str, Any]:
+    """
+    Summary counts for an assessment's submissions.
+    
+    Args:
+        assessment: The assessment instance
+        include_archived: Also count submissions moved to the archive
+        
+    Returns:
+        Dictionary with submission count, roster size, submission rate and
+        average / highest / lowest score
+    """
+    parts = [
+        source.filter(assessment=assessment).aggregate(
+            count=Count('id'),
+            score_sum=Sum('score'),
+            highest_score=models.Max('score'),
+            lowest_score=models.Min('score'),
+        )
+        for source in submission_sources(include_archived)
+    ]
+    highest = [part['highest_score'] for part in parts if part['count']]
+    lowest = [part['lowest_score'] for part in parts if part['count']]
+    count = sum(part['count'] for part in parts)
+    stats = {
+        'count': count,
+        'average_score': sum(part['score_sum'] or 0 for part in parts) / count if count else None,
+        'highest_score': max(highest) if highest else None,
+        'lowest_score': min(lowest) if lowest else None,
+    }
+    student_count = StudentProfile.objects.filter(batch_id=assessment.batch_id).count()
+    stats['student_count'] = student_count
+    stats['submission_rate'] = (
+        round(stats['count'] / student_count * 100, 2) if student_count else 0
+    )
+    for key in ('average_score', 'highest_score', 'lowest_score'):
+        if stats[key] is not None:
+            stats[key] = round(stats[key], 2)
+    return stats
+
+
+def get_score_trend(
+    student: StudentProfile,
+    bucket: Optional[str] = None,
+    points: Optional[int] = None,
+    include_archived: bool = False,
+) -> List[Dict[str, Any]]:
     """
     Get score trend data for a student's assessment submissions.
     
     Args:
         student: The student instance
+        bucket: Optional "week", "month" or "term"; when given, submissions
+            are averaged per period in the database
+        points: Optional maximum number of points; longer series are reduced
+            with LTTB
+        include_archived: Also read submissions moved to the archive
         
     Returns:
-        List of dictionaries containing submission data
+        List of dictionaries containing submission data. Bucketed rows have
+        the keys 'period', 'score' and 'submissions'.
     """
-    return list(
-        AssessmentSubmission.objects
-        .filter(student=student)
-        .select_related('assessment')
-        .order_by('submitted_at')
-        .values('submitted_at', 'score', 'assessment__title')
-    )
+    querysets = [source.filter(student=student) for source in submission_sources(include_archived)]
+
+    if bucket:
+        periods = {}
+        for queryset in querysets:
+            rows = (
+                queryset
+                .annotate(period=TREND_BUCKETS[bucket]('submitted_at'))
+                .values('period')
+                .annotate(score_sum=Sum('score'), submissions=Count('id'))
+                .order_by('period')
+            )
+            for row in rows:
+                score_sum, submissions = periods.get(row['period'], (0, 0))
+                periods[row['period']] = (
+                    score_sum + (row['score_sum'] or 0), submissions + row['submissions']
+                )
+        trend = [
+            {
+                'period': period,
+                'score': round(periods[period][0] / periods[period][1], 2),
+                'submissions': periods[period][1],
+            }
+            for period in sorted(periods)
+        ]
+        x_key = 'period'
+    else:
+        trend = []
+        for queryset in querysets:
+            trend.extend(
+                queryset
+                .order_by('submitted_at')
+                .values('submitted_at', 'score', 'assessment__title')
+            )
+        if len(querysets) > 1:
+            trend.sort(key=itemgetter('submitted_at'))
+        x_key = 'submitted_at'
+
+    if points:
+        trend = lttb(trend, points, x=itemgetter(x_key), y=itemgetter('score'))
+    return trend
 
 
-def batch_average_score(batch: Batch) -> Dict[str, Optional[float]]:
+def batch_average_score(batch: Batch, include_archived: bool = False) -> Dict[str, Optional[float]]:
     """
     Calculate the average score for all students in a batch.
     
     Args:
         batch: The batch instance
+        include_archived: Also count archived submissions (from their rollups)
         
     Returns:
         Dictionary with 'avg' key containing the average score
     """
-    return AssessmentSubmission.objects.filter(
-        student__batch=batch
-    ).aggregate(avg=Avg('score'))
+    queryset = AssessmentSubmission.objects.filter(batch=batch)
+    if not include_archived:
+        return queryset.aggregate(avg=Avg('score'))
+
+    stats = queryset.aggregate(score_sum=Sum('score'), count=Count('id'))
+    archived = rollup_totals(batch=batch)
+    count = stats['count'] + archived['submission_count']
+    score_sum = (stats['score_sum'] or 0) + archived['score_sum']
+    return {'avg': score_sum / count if count else None}
 
 
 def top_students(batch: Batch, limit: int = 5) -> QuerySet:
@@ -130,38 +253,48 @@ def top_students(batch: Batch, limit: int = 5) -> QuerySet:
     """
     return (
         AssessmentSubmission.objects
-        .filter(student__batch=batch)
+        .filter(batch=batch)
         .values('student__id', 'student__roll_no', 'student__user__first_name')
         .annotate(avg_score=Avg('score'))
         .order_by('-avg_score')[:limit]
     )
 
 
-def get_avg_score(student: StudentProfile) -> float:
+def get_avg_score(student: StudentProfile, include_archived: bool = False) -> float:
     """
     Calculate the average score for a student across all submissions.
     
     Args:
         student: The student instance
+        include_archived: Also count archived submissions (from their rollups)
         
     Returns:
         float: Average score rounded to 2 decimal places, or 0 if no submissions
     """
-    result = AssessmentSubmission.objects.filter(
-        student=student
-    ).aggregate(avg_score=Avg('score'))
-    
-    return round(result['avg_score'] or 0, 2)
+    queryset = AssessmentSubmission.objects.filter(student=student)
+    if not include_archived:
+        result = queryset.aggregate(avg_score=Avg('score'))
+        return round(result['avg_score'] or 0, 2)
+
+    stats = queryset.aggregate(score_sum=Sum('score'), count=Count('id'))
+    archived = rollup_totals(student=student)
+    count = stats['count'] + archived['submission_count']
+    score_sum = (stats['score_sum'] or 0) + archived['score_sum']
+    return round(score_sum / count, 2) if count else 0
 
 
-def get_total_submissions(student: StudentProfile) -> int:
+def get_total_submissions(student: StudentProfile, include_archived: bool = False) -> int:
     """
     Get the total number of submissions for a student.
     
     Args:
         student: The student instance
+        include_archived: Also count archived submissions (from their rollups)
         
     Returns:
         int: Total number of submissions
     """
-    return AssessmentSubmission.objects.filter(student=student).count()
+    count = AssessmentSubmission.objects.filter(student=student).count()
+    if include_archived:
+        count += rollup_totals(student=student)['submission_count']
+    return count
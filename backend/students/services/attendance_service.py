@@ -1,49 +1,120 @@
 from django.db.models import Count, Q
 from datetime import datetime
+from operator import itemgetter
 from students.models import Attendance
+from students.services.analytics.downsample import TREND_BUCKETS, lttb
+from students.services.archive_service import attendance_sources, rollup_totals
+from students.services.date_window import filter_date_window
 
 
-def get_attendance_trend(student):
-    records = (
-        Attendance.objects
-        .filter(student=student)
-        .values('date__year', 'date__month')
-        .annotate(
-            total=Count('id'),
-            present=Count('id', filter=Q(status="present"))
+def get_attendance_trend(student, bucket=None, points=None, window=(None, None), include_archived=False):
+    """
+    Attendance percentage per period for a student.
+
+    `bucket` is "week", "month" or "term"; without it rows are monthly with
+    just `year`/`month`. Monthly rows keep the `year`/`month` keys; when a
+    bucket or `points` is requested every row also carries the bucket start
+    as `period`. When `points` is given the series is reduced to at most
+    that many rows.
+    `window` is a date_window() range limiting the records considered.
+    `include_archived` also reads rows moved out by `manage.py archive_batches`.
+    """
+    with_period = bool(bucket or points)
+    bucket = bucket or "month"
+    counts = {}
+    for source in attendance_sources(include_archived):
+        records = (
+            filter_date_window(source.filter(student=student), window)
+            .annotate(period=TREND_BUCKETS[bucket]('date'))
+            .values('period')
+            .annotate(
+                total=Count('id'),
+                present=Count('id', filter=Q(status="present"))
+            )
+            .order_by('period')
         )
-        .order_by('date__year', 'date__month')
-    )
+        for r in records:
+            total, present = counts.get(r['period'], (0, 0))
+            counts[r['period']] = (total + r['total'], present + r['present'])
 
     trend = []
-    for r in records:
-        percentage = (r['present'] / r['total']) * 100
-        trend.append({
-            "year": r['date__year'],
-            "month": r['date__month'],
-            "attendance_percentage": round(percentage, 2)
-        })
+    for period in sorted(counts):
+        total, present = counts[period]
+        percentage = (present / total) * 100
+        row = {"period": period} if with_period else {}
+        if bucket == "month":
+            row["year"] = period.year
+            row["month"] = period.month
+        row["attendance_percentage"] = round(percentage, 2)
+        trend.append(row)
+
+    if points:
+        trend = lttb(
+            trend, points,
+            x=itemgetter("period"),
+            y=itemgetter("attendance_percentage"),
+        )
     return trend
 
 
-def batch_attendance_summary(batch):
+def batch_attendance_summary(batch, include_archived=False):
     stats = (
-        Attendance.objects.filter(student__batch=batch)
+        Attendance.objects.filter(batch=batch)
         .aggregate(
             total=Count('id'),
             present=Count('id', filter=Q(status='present'))
         )
     )
+    if include_archived:
+        # Archived rows are only needed as totals
+        archived = rollup_totals(batch=batch)
+        stats['total'] += archived['attendance_total']
+        stats['present'] += archived['attendance_present']
     if stats['total'] == 0:
         return 0
     return round((stats['present'] / stats['total']) * 100, 2)
 
 
-def get_attendance_percentage(student):
+def get_attendance_percentage(student, include_archived=False):
     total_classes = Attendance.objects.filter(student=student).count()
     attended_classes = Attendance.objects.filter(student=student, status='present').count()
+    if include_archived:
+        # Archived batches count through their rollups
+        archived = rollup_totals(student=student)
+        total_classes += archived['attendance_total']
+        attended_classes += archived['attendance_present']
 
     if total_classes == 0:
         return 0  # No classes yet
 
-    return round((attended_classes / total_classes) * 100, 2)
\ No newline at end of file
+    return round((attended_classes / total_classes) * 100, 2)
+
+def attendance_counts(student_ids, window=(None, None), include_archived=False):
+    """
+    Total and present attendance counts per student in one grouped query
+    (one more for the archive).
+
+    Args:
+        student_ids: Students to count for
+        window: date_window() range limiting the records counted
+        include_archived: Also count archived rows
+
+    Returns:
+        Dict of student id -> (total, present); students without records
+        are absent from the dict
+    """
+    counts = {}
+    for source in attendance_sources(include_archived):
+        rows = (
+            filter_date_window(source.filter(student_id__in=student_ids), window)
+            .values('student_id')
+            .annotate(
+                total=Count('id'),
+                present=Count('id', filter=Q(status='present'))
+            )
+            .order_by()
+        )
+        for row in rows:
+            total, present = counts.get(row['student_id'], (0, 0))
+            counts[row['student_id']] = (total + row['total'], present + row['present'])
+    return counts
@@ -0,0 +1,134 @@
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from students.models import StudentProfile
+from students.services import versioning
+
+
+# How often a worker re-reads the STUDENT_PROFILES counter; writes made in
+# this process invalidate immediately through invalidate()
+AUTOCOMPLETE_RECHECK_SECONDS = 2.0
+
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+def normalize(value: str) -> str:
+    """Case- and accent-insensitive form used for keys and queries."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return " ".join(value.casefold().split())
+
+
+class StudentPrefixIndex:
+    """
+    Sorted (key, student id) arrays searched with bisect. Each student is
+    indexed under their roll number, first name, last name and
+    "first last", globally and within their batch.
+    """
+
+    def __init__(self, rows):
+        self.students: Dict[int, Dict[str, Any]] = {}
+        entries = []
+        by_batch = {}
+        for row in rows:
+            self.students[row["id"]] = row
+            keys = {
+                normalize(row["roll_no"]),
+                normalize(row["first_name"]),
+                normalize(row["last_name"]),
+                normalize(f"{row['first_name']} {row['last_name']}"),
+            }
+            for key in keys:
+                if key:
+                    entries.append((key, row["id"]))
+                    by_batch.setdefault(row["batch_id"], []).append((key, row["id"]))
+
+        self.keys, self.ids = self._columns(entries)
+        self.by_batch = {batch_id: self._columns(items) for batch_id, items in by_batch.items()}
+
+    @staticmethod
+    def _columns(entries):
+        entries.sort()
+        return [key for key, _ in entries], [student_id for _, student_id in entries]
+
+    def search(self, query: str, batch_id: Optional[int] = None, limit: int = AUTOCOMPLETE_DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        if batch_id is None:
+            keys, ids = self.keys, self.ids
+        else:
+            keys, ids = self.by_batch.get(batch_id, ([], []))
+
+        results = []
+        seen = set()
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and keys[position].startswith(prefix):
+            student_id = ids[position]
+            if student_id not in seen:
+                seen.add(student_id)
+                results.append(self.students[student_id])
+                if len(results) >= limit:
+                    break
+            position += 1
+        return results
+
+
+_lock = threading.Lock()
+_index: Optional[StudentPrefixIndex] = None
+_version: Optional[int] = None
+_checked_at = float("-inf")
+
+
+def _build() -> StudentPrefixIndex:
+    return StudentPrefixIndex(
+        StudentProfile.objects.values("id", "roll_no", "first_name", "last_name", "batch_id")
+    )
+
+
+def get_index() -> StudentPrefixIndex:
+    """
+    The process-wide index, rebuilt when the STUDENT_PROFILES version has
+    moved. The counter is read at most every AUTOCOMPLETE_RECHECK_SECONDS;
+    in between, lookups do not touch the database.
+    """
+    global _index, _version, _checked_at
+
+    if _index is not None and time.monotonic() - _checked_at < AUTOCOMPLETE_RECHECK_SECONDS:
+        return _index
+
+    with _lock:
+        if _index is not None and time.monotonic() - _checked_at < AUTOCOMPLETE_RECHECK_SECONDS:
+            return _index
+        version = versioning.current_version(versioning.STUDENT_PROFILES)
+        if _index is None or version != _version:
+            _index = _build()
+            _version = version
+        _checked_at = time.monotonic()
+        return _index
+
+
+def invalidate() -> None:
+    """Force the next lookup in this process to re-check the version counter."""
+    global _checked_at
+    _checked_at = float("-inf")
+
+
+def autocomplete_students(query: str, batch_id: Optional[int] = None, limit: int = AUTOCOMPLETE_DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+    """
+    Students whose roll number, first name, last name or full name starts
+    with `query`, optionally limited to one batch.
+
+    Args:
+        query: The typed prefix
+        batch_id: Optional batch to search within
+        limit: Maximum number of students to return
+
+    Returns:
+        List of dicts with id, roll_no, first_name, last_name and batch_id
+    """
+    return get_index().search(query, batch_id=batch_id, limit=limit)
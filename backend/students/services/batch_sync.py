@@ -0,0 +1,89 @@
+from typing import Iterator, Tuple, Type
+
+from django.db import models
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery
+
+from students.models import Attendance, AssessmentSubmission, StudentProfile
+from students.services import versioning
+
+
+# Models carrying a denormalized copy of student.batch
+BATCH_DENORMALIZED_MODELS = (Attendance, AssessmentSubmission)
+
+SYNC_CHUNK_SIZE = 5000
+
+
+def _student_batch():
+    return Subquery(
+        StudentProfile.objects.filter(pk=OuterRef('student_id')).values('batch_id')[:1]
+    )
+
+
+def stale_rows(model: Type[models.Model]) -> QuerySet:
+    """Rows whose batch_id differs from their student's current batch (NULL-aware)."""
+    return model.objects.filter(
+        Q(batch_id__isnull=True, student__batch_id__isnull=False)
+        | Q(batch_id__isnull=False, student__batch_id__isnull=True)
+        | (
+            Q(batch_id__isnull=False, student__batch_id__isnull=False)
+            & ~Q(batch_id=F('student__batch_id'))
+        )
+    )
+
+
+# Version key (students.services.versioning) of each model's per-batch rows
+BATCH_VERSION_KEYS = {
+    Attendance: versioning.batch_attendance_key,
+    AssessmentSubmission: versioning.batch_submissions_key,
+}
+
+
+def sync_student_batch(student: StudentProfile) -> None:
+    """
+    Re-stamp a student's attendance and submission rows after their batch
+    changed. Uses the (student, ...) indexes, so it is cheap when nothing moved.
+
+    update() sends no signals, so the version keys of the batches the rows
+    left and joined are bumped here.
+    """
+    keys = set()
+    for model in BATCH_DENORMALIZED_MODELS:
+        # exclude() on a nullable column also matches NULL rows
+        moved = model.objects.filter(student_id=student.id).exclude(batch_id=student.batch_id)
+        old_batch_ids = set(moved.values_list('batch_id', flat=True).distinct())
+        if not old_batch_ids:
+            continue
+        moved.update(batch_id=student.batch_id)
+        keys.update(
+            BATCH_VERSION_KEYS[model](batch_id)
+            for batch_id in old_batch_ids | {student.batch_id}
+            if batch_id is not None
+        )
+    if keys:
+        versioning.bump(*sorted(keys))
+
+
+def resync_batch_ids(
+    model: Type[models.Model], chunk_size: int = SYNC_CHUNK_SIZE
+) -> Iterator[Tuple[int, int]]:
+    """
+    Backfill / repair `model.batch_id` from the student's batch, one primary
+    key range at a time so no single statement locks the whole table.
+
+    Args:
+        model: One of BATCH_DENORMALIZED_MODELS
+        chunk_size: Primary key range covered by each UPDATE
+
+    Yields:
+        (last primary key processed, rows updated in the chunk)
+    """
+    bounds = model.objects.aggregate(low=models.Min('id'), high=models.Max('id'))
+    if bounds['low'] is None:
+        return
+    start = bounds['low']
+    while start <= bounds['high']:
+        end = start + chunk_size
+        chunk = stale_rows(model).filter(id__gte=start, id__lt=end)
+        updated = model.objects.filter(id__in=chunk.values('id')).update(batch_id=_student_batch())
+        yield end - 1, updated
+        start = end
@@ -0,0 +1,82 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+
+DateWindow = Tuple[Optional[date], Optional[date]]
+
+
+def month_window(year: int, month: int) -> DateWindow:
+    """Half-open [first day, first day of next month) for a calendar month."""
+    if not 1 <= month <= 12:
+        raise ValueError("month must be between 1 and 12")
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def date_window(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> DateWindow:
+    """
+    Combine year / month / from / to filters into one half-open date range.
+
+    Filtering `date >= start AND date < end` can use a plain index on the
+    column, unlike date__month / ExtractMonth predicates.
+
+    Args:
+        year: Calendar year; with `month`, that month only
+        month: Calendar month (1-12); ignored without `year`
+        date_from: Inclusive first day
+        date_to: Inclusive last day (date.max leaves the range open-ended)
+
+    Returns:
+        (start, end) where either bound may be None (unbounded)
+
+    Raises:
+        ValueError: If month is out of range
+    """
+    start = end = None
+    if year is not None:
+        if month is not None:
+            start, end = month_window(year, month)
+        else:
+            start, end = date(year, 1, 1), date(year + 1, 1, 1)
+
+    if date_from is not None:
+        start = max(start, date_from) if start else date_from
+    # date.max has no day after; every date is <= it, so it bounds nothing
+    if date_to is not None and date_to < date.max:
+        day_after = date_to + timedelta(days=1)
+        end = min(end, day_after) if end else day_after
+    return start, end
+
+
+def filter_date_window(queryset: QuerySet, window: DateWindow, field: str = "date") -> QuerySet:
+    """Apply a date_window() range to a DateField."""
+    start, end = window
+    if start is not None:
+        queryset = queryset.filter(**{f"{field}__gte": start})
+    if end is not None:
+        queryset = queryset.filter(**{f"{field}__lt": end})
+    return queryset
+
+
+def filter_datetime_window(queryset: QuerySet, window: DateWindow, field: str) -> QuerySet:
+    """Apply a date_window() range to a DateTimeField, in the current timezone."""
+    tz = timezone.get_current_timezone()
+    start, end = window
+    if start is not None:
+        queryset = queryset.filter(
+            **{f"{field}__gte": timezone.make_aware(datetime.combine(start, time.min), tz)}
+        )
+    if end is not None:
+        queryset = queryset.filter(
+            **{f"{field}__lt": timezone.make_aware(datetime.combine(end, time.min), tz)}
+        )
+    return queryset
@@ -0,0 +1,237 @@
+import csv
+import io
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from backend.db import immediate_atomic
+from students.models import Batch, StudentProfile
+from students.services import autocomplete, versioning
+from users.models import User
+
+
+ENROLL_CHUNK_SIZE = 500
+
+# Largest list the bulk enrollment endpoint accepts in one request; hashing
+# has to finish well inside the worker timeout. Larger lists go through
+# `manage.py enroll_students`.
+BULK_ENROLL_MAX_ROWS = 200
+
+# Below this many passwords a process pool costs more than it saves
+HASH_POOL_MIN_PASSWORDS = 8
+
+# Default pool size cap, so one request cannot claim every core of the host
+HASH_POOL_MAX_WORKERS = 4
+
+REQUIRED_FIELDS = ('username', 'email', 'password', 'first_name', 'last_name', 'roll_no')
+
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+# Every other StudentProfile column may be given per row
+PROFILE_FIELDS = tuple(
+    field.attname for field in StudentProfile._meta.concrete_fields
+    if field.name not in ('id', 'user')
+)
+
+
+def parse_csv(text: str) -> List[Dict[str, str]]:
+    """Rows of a CSV export with a header line (e.g. username,email,...,roll_no)."""
+    return list(csv.DictReader(io.StringIO(text.lstrip('\ufeff'))))
+
+
+def hash_passwords(passwords: List[str], workers: Optional[int] = None) -> List[str]:
+    """
+    make_password() for each password, spread over a process pool.
+
+    Args:
+        passwords: Raw passwords
+        workers: Pool size; defaults to the CPU count, at most
+            HASH_POOL_MAX_WORKERS. 1 hashes in-process.
+
+    Returns:
+        Encoded passwords, in input order
+    """
+    workers = workers or min(os.cpu_count() or 1, HASH_POOL_MAX_WORKERS)
+    if workers <= 1 or len(passwords) < HASH_POOL_MIN_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    # Spawned, not forked: the caller may be a threaded server process, and a
+    # forked child inherits locks other threads hold. make_password needs no
+    # app registry; the children read the hashers from DJANGO_SETTINGS_MODULE.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(passwords)), mp_context=context) as pool:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+    # Blank CSV cells mean "not given"
+    return None if value == '' else value
+
+
+def _error_messages(exc: ValidationError) -> Dict[str, List[str]]:
+    return {field: list(messages) for field, messages in exc.message_dict.items()}
+
+
+def validate_rows(
+    rows: List[Dict[str, Any]], batch_id: Optional[int] = None
+) -> Tuple[List[Tuple[int, User, StudentProfile, str]], List[Dict[str, Any]]]:
+    """
+    Check enrollment rows without writing anything. Field checks run per
+    row in memory; username, roll_no and batch checks run as one query each
+    for the whole list.
+
+    Args:
+        rows: Dicts with REQUIRED_FIELDS and optional PROFILE_FIELDS
+            ("batch" is accepted for batch_id)
+        batch_id: Batch for rows that do not name one
+
+    Returns:
+        (valid, errors): valid is a list of (row index, unsaved User,
+        unsaved StudentProfile, raw password); errors is a list of
+        {"row": index, "errors": {field: [messages]}}
+    """
+    errors = {}
+    candidates = []
+
+    for index, raw in enumerate(rows):
+        if not isinstance(raw, dict):
+            errors[index] = {'non_field_errors': ['Expected an object']}
+            continue
+        row = {key: _clean(value) for key, value in raw.items()}
+        if 'batch_id' not in row and 'batch' in row:
+            row['batch_id'] = row.pop('batch')
+        if row.get('batch_id') is None:
+            row['batch_id'] = batch_id
+
+        missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+        if missing:
+            errors[index] = {field: ['This field is required.'] for field in missing}
+            continue
+
+        user = User(role=User.Roles.STUDENT, **{field: row[field] for field in USER_FIELDS})
+        profile = StudentProfile(**{field: row.get(field) for field in PROFILE_FIELDS if field in row})
+        row_errors = {}
+        # batch existence is checked for the whole list below; full_clean()
+        # would query once per row
+        for instance, exclude in ((user, ['password']), (profile, ['user', 'batch'])):
+            try:
+                instance.full_clean(exclude=exclude, validate_unique=False, validate_constraints=False)
+            except ValidationError as exc:
+                row_errors.update(_error_messages(exc))
+        try:
+            profile.batch_id = Batch._meta.pk.to_python(profile.batch_id)
+        except ValidationError as exc:
+            row_errors['batch_id'] = exc.messages
+        if row_errors:
+            errors[index] = row_errors
+            continue
+        candidates.append((index, user, profile, row['password']))
+
+    # Set-based uniqueness and reference checks
+    usernames = Counter(user.username for _, user, _, _ in candidates)
+    roll_nos = Counter(profile.roll_no for _, _, profile, _ in candidates)
+    taken_usernames = set(
+        User.objects.filter(username__in=list(usernames)).values_list('username', flat=True)
+    )
+    taken_roll_nos = set(
+        StudentProfile.objects.filter(roll_no__in=list(roll_nos)).values_list('roll_no', flat=True)
+    )
+    batch_ids = {profile.batch_id for _, _, profile, _ in candidates if profile.batch_id is not None}
+    known_batches = set(Batch.objects.filter(id__in=batch_ids).values_list('id', flat=True))
+
+    valid = []
+    for index, user, profile, password in candidates:
+        row_errors = {}
+        if user.username in taken_usernames:
+            row_errors['username'] = ['A user with that username already exists.']
+        elif usernames[user.username] > 1:
+            row_errors['username'] = ['Username appears more than once in this upload.']
+        if profile.roll_no in taken_roll_nos:
+            row_errors['roll_no'] = ['A student with this roll number already exists.']
+        elif roll_nos[profile.roll_no] > 1:
+            row_errors['roll_no'] = ['Roll number appears more than once in this upload.']
+        if profile.batch_id is not None and profile.batch_id not in known_batches:
+            row_errors['batch_id'] = [f'Batch {profile.batch_id} does not exist.']
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            valid.append((index, user, profile, password))
+
+    return valid, [{'row': index, 'errors': errors[index]} for index in sorted(errors)]
+
+
+def enroll_students(
+    rows: List[Dict[str, Any]],
+    batch_id: Optional[int] = None,
+    chunk_size: int = ENROLL_CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Create student users and profiles for `rows` in bulk. Invalid rows are
+    reported and skipped; the rest are inserted with bulk_create, one
+    transaction per chunk.
+
+    Args:
+        rows: See validate_rows()
+        batch_id: Batch for rows that do not name one
+        chunk_size: Students inserted per transaction
+        workers: Password hashing processes (see hash_passwords())
+
+    Returns:
+        {"results": [{"row", "id", "user_id", "roll_no"}], "errors": [{"row", "errors"}]}
+    """
+    valid, errors = validate_rows(rows, batch_id)
+    hashes = hash_passwords([password for _, _, _, password in valid], workers)
+
+    results = []
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        users = []
+        for (_, user, _, _), encoded in zip(chunk, hashes[start:start + chunk_size]):
+            user.password = encoded
+            users.append(user)
+        try:
+            with immediate_atomic():
+                User.objects.bulk_create(users)
+                if users[0].pk is None:
+                    # Backends that cannot return ids from bulk inserts
+                    ids = dict(
+                        User.objects.filter(username__in=[user.username for user in users])
+                        .values_list('username', 'id')
+                    )
+                    for user in users:
+                        user.pk = ids[user.username]
+                profiles = []
+                for (_, user, profile, _) in chunk:
+                    profile.user = user
+                    profiles.append(profile)
+                StudentProfile.objects.bulk_create(profiles)
+        except IntegrityError:
+            # A concurrent request took a username or roll number after
+            # validate_rows() checked them
+            errors.extend(
+                {'row': index, 'errors': {'non_field_errors': ['Conflicts with a concurrent enrollment; retry this row.']}}
+                for index, _, _, _ in chunk
+            )
+            continue
+
+        results.extend(
+            {'row': index, 'id': profile.id, 'user_id': user.id, 'roll_no': profile.roll_no}
+            for index, user, profile, _ in chunk
+        )
+
+    if results:
+        # bulk_create() sends no post_save, so do what students.signals would
+        versioning.bump(versioning.STUDENT_PROFILES)
+        transaction.on_commit(autocomplete.invalidate)
+
+    errors.sort(key=lambda error: error['row'])
+    return {'results': results, 'errors': errors}
@@ -0,0 +1,105 @@
+import csv
+from typing import Iterable, Iterator, Optional, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from students.models import Attendance, AssessmentSubmission
+from students.services.date_window import date_window, filter_date_window, filter_datetime_window
+
+
+# Rows fetched per database round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+ATTENDANCE_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('date', 'date'),
+    ('status', 'status'),
+    ('student_id', 'student_id'),
+    ('roll_no', 'student__roll_no'),
+    ('first_name', 'student__first_name'),
+    ('last_name', 'student__last_name'),
+]
+
+SUBMISSION_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('assessment_id', 'assessment_id'),
+    ('assessment_title', 'assessment__title'),
+    ('student_id', 'student_id'),
+    ('roll_no', 'student__roll_no'),
+    ('first_name', 'student__first_name'),
+    ('last_name', 'student__last_name'),
+    ('score', 'score'),
+    ('submitted_at', 'submitted_at'),
+]
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def attendance_export_rows(batch_id, date_from=None, date_to=None) -> QuerySet:
+    """
+    values_list() queryset of attendance rows for a batch, in column order of
+    ATTENDANCE_EXPORT_COLUMNS. `date_from` / `date_to` are inclusive dates.
+    """
+    queryset = filter_date_window(
+        Attendance.objects.filter(batch_id=batch_id),
+        date_window(date_from=date_from, date_to=date_to),
+    )
+    return queryset.order_by('date', 'id').values_list(
+        *[source for _, source in ATTENDANCE_EXPORT_COLUMNS]
+    )
+
+
+def submission_export_rows(batch_id, date_from=None, date_to=None) -> QuerySet:
+    """
+    values_list() queryset of submissions for a batch, in column order of
+    SUBMISSION_EXPORT_COLUMNS. `date_from` / `date_to` are inclusive dates.
+    """
+    queryset = filter_datetime_window(
+        AssessmentSubmission.objects.filter(batch_id=batch_id),
+        date_window(date_from=date_from, date_to=date_to),
+        'submitted_at',
+    )
+    return queryset.order_by('submitted_at', 'id').values_list(
+        *[source for _, source in SUBMISSION_EXPORT_COLUMNS]
+    )
+
+
+def _iterate(rows: QuerySet) -> Iterable[Sequence]:
+    return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(rows: QuerySet, header: Sequence[str]) -> Iterator[str]:
+    """Yield CSV lines (header first) without holding the result set in memory."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in _iterate(rows):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows: QuerySet, header: Sequence[str]) -> Iterator[str]:
+    """Yield one JSON object per line, keyed by `header`."""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in _iterate(rows):
+        yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+}
+
+
+def export_stream(rows: QuerySet, columns, export_format: Optional[str] = 'csv'):
+    """
+    Return (iterator, content_type, file_extension) for a values_list
+    queryset built with one of the *_EXPORT_COLUMNS lists.
+    """
+    streamer, content_type, extension = EXPORT_FORMATS[export_format or 'csv']
+    header = [name for name, _ in columns]
+    return streamer(rows, header), content_type, extension
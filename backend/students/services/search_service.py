@@ -0,0 +1,164 @@
+from typing import List
+
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+
+# FTS5 shadow table kept in sync with students_studentprofile by triggers
+# (SQLite only, see migration 0006_student_search)
+STUDENT_FTS_TABLE = "students_studentprofile_fts"
+
+# Fields matched by the student search box
+STUDENT_SEARCH_FIELDS = ("first_name", "last_name", "roll_no")
+
+# The trigram tokenizer / pg_trgm index cannot serve shorter substrings
+MIN_TRIGRAM_LENGTH = 3
+
+# Triggers keeping STUDENT_FTS_TABLE in sync. SQLite drops them whenever
+# Django remakes students_studentprofile for an ALTER; ensure_search_triggers()
+# recreates them after every migrate.
+STUDENT_FTS_TRIGGERS = {
+    "students_studentprofile_fts_ai": (
+        "CREATE TRIGGER IF NOT EXISTS students_studentprofile_fts_ai "
+        "AFTER INSERT ON students_studentprofile BEGIN "
+        "INSERT INTO students_studentprofile_fts(rowid, first_name, last_name, roll_no) "
+        "VALUES (new.id, new.first_name, new.last_name, new.roll_no); END"
+    ),
+    "students_studentprofile_fts_ad": (
+        "CREATE TRIGGER IF NOT EXISTS students_studentprofile_fts_ad "
+        "AFTER DELETE ON students_studentprofile BEGIN "
+        "INSERT INTO students_studentprofile_fts(students_studentprofile_fts, rowid, first_name, last_name, roll_no) "
+        "VALUES ('delete', old.id, old.first_name, old.last_name, old.roll_no); END"
+    ),
+    "students_studentprofile_fts_au": (
+        "CREATE TRIGGER IF NOT EXISTS students_studentprofile_fts_au "
+        "AFTER UPDATE ON students_studentprofile BEGIN "
+        "INSERT INTO students_studentprofile_fts(students_studentprofile_fts, rowid, first_name, last_name, roll_no) "
+        "VALUES ('delete', old.id, old.first_name, old.last_name, old.roll_no); "
+        "INSERT INTO students_studentprofile_fts(rowid, first_name, last_name, roll_no) "
+        "VALUES (new.id, new.first_name, new.last_name, new.roll_no); END"
+    ),
+}
+
+_fts_available = {}
+
+
+def _has_fts_table(connection) -> bool:
+    """Whether the SQLite FTS5 shadow table exists, cached per connection alias."""
+    if connection.alias not in _fts_available:
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        _fts_available[connection.alias] = STUDENT_FTS_TABLE in tables
+    return _fts_available[connection.alias]
+
+
+def ensure_search_triggers(using="default") -> List[str]:
+    """
+    Recreate missing STUDENT_FTS_TRIGGERS on the `using` database and, if any
+    were missing, rebuild the FTS5 table from students_studentprofile (rows
+    written meanwhile never reached it). A no-op off SQLite or where the FTS5
+    table was never created.
+
+    Returns:
+        Names of the triggers that were recreated
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return []
+    _fts_available.pop(connection.alias, None)
+    if not _has_fts_table(connection):
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in STUDENT_FTS_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(STUDENT_FTS_TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {STUDENT_FTS_TABLE}({STUDENT_FTS_TABLE}) VALUES ('rebuild')"
+            )
+    return missing
+
+
+def recreate_search_triggers(sender, using="default", **kwargs):
+    """post_migrate receiver for ensure_search_triggers()."""
+    ensure_search_triggers(using)
+
+
+def _substring_q(word: str) -> Q:
+    condition = Q()
+    for field in STUDENT_SEARCH_FIELDS:
+        condition |= Q(**{f"{field}__icontains": word})
+    return condition
+
+
+def _fts_match(words: List[str]) -> str:
+    return " AND ".join('"%s"' % word.replace('"', '""') for word in words)
+
+
+def search_students(queryset: QuerySet, term: str) -> QuerySet:
+    """
+    Filter a StudentProfile queryset by a search box term, best matches first.
+
+    Every word of `term` must appear (case-insensitively, anywhere) in the
+    first name, last name or roll number. On PostgreSQL the substring
+    filters are served by the pg_trgm GIN indexes; on SQLite words of three
+    or more characters go through the FTS5 trigram table instead of a
+    LIKE '%x%' scan.
+
+    Args:
+        queryset: StudentProfile queryset to search within
+        term: The raw search string
+
+    Returns:
+        The filtered queryset ordered by relevance: exact roll number, roll
+        number prefix, name prefix, then any other match
+    """
+    words = term.split()
+    if not words:
+        return queryset
+
+    connection = connections[queryset.db]
+    fts_words = []
+    for word in words:
+        if (
+            connection.vendor == "sqlite"
+            and len(word) >= MIN_TRIGRAM_LENGTH
+            and _has_fts_table(connection)
+        ):
+            fts_words.append(word)
+        else:
+            queryset = queryset.filter(_substring_q(word))
+
+    if fts_words:
+        queryset = queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {STUDENT_FTS_TABLE} WHERE {STUDENT_FTS_TABLE} MATCH %s",
+            [_fts_match(fts_words)],
+        ))
+
+    term = " ".join(words)
+    queryset = queryset.annotate(search_rank=Case(
+        When(roll_no__iexact=term, then=Value(0)),
+        When(roll_no__istartswith=term, then=Value(1)),
+        When(
+            Q(first_name__istartswith=words[0]) | Q(last_name__istartswith=words[0]),
+            then=Value(2),
+        ),
+        default=Value(3),
+        output_field=IntegerField(),
+    ))
+    ordering = ["search_rank"]
+
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        queryset = queryset.annotate(search_similarity=Greatest(*[
+            TrigramSimilarity(field, term) for field in STUDENT_SEARCH_FIELDS
+        ]))
+        ordering.append("-search_similarity")
+
+    return queryset.order_by(*ordering, "first_name", "last_name", "id")
@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from students.models import Assessment, AssessmentSubmission, Attendance, Batch, StudentProfile
+from students.services import autocomplete, batch_sync, versioning
+from users.models import User
+
+
+# Attendance and submission rows are only deleted through cascades from their
+# student/assessment/batch, whose receivers bump the affected keys. They get
+# no post_delete receiver so those cascades keep using fast (bulk) deletes.
+
+
+@receiver([post_save, post_delete], sender=Batch)
+def bump_batch_version(sender, instance, **kwargs):
+    # Profiles show batch_name and are SET_NULL when a batch is deleted
+    versioning.bump(versioning.BATCHES, versioning.STUDENT_PROFILES)
+    transaction.on_commit(autocomplete.invalidate)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def bump_student_profile_version(sender, instance, **kwargs):
+    versioning.bump(versioning.STUDENT_PROFILES)
+    transaction.on_commit(autocomplete.invalidate)
+
+
+@receiver([post_save, post_delete], sender=User)
+def bump_user_version(sender, instance, **kwargs):
+    # Profile lists show the username
+    versioning.bump(versioning.USERS)
+
+
+@receiver(post_save, sender=StudentProfile)
+def resync_student_rows(sender, instance, created, update_fields=None, **kwargs):
+    # Attendance/submission rows carry a copy of the student's batch
+    if not created and (update_fields is None or 'batch' in update_fields):
+        batch_sync.sync_student_batch(instance)
+
+
+@receiver([post_save, post_delete], sender=Assessment)
+def bump_assessment_version(sender, instance, **kwargs):
+    versioning.bump(
+        versioning.assessment_key(instance.id),
+        versioning.batch_submissions_key(instance.batch_id),
+    )
+
+
+@receiver(post_save, sender=AssessmentSubmission)
+def bump_submission_version(sender, instance, **kwargs):
+    versioning.bump(
+        versioning.assessment_key(instance.assessment_id),
+        versioning.batch_submissions_key(instance.batch_id),
+    )
+
+
+@receiver(post_save, sender=Attendance)
+def bump_attendance_version(sender, instance, **kwargs):
+    versioning.bump(versioning.batch_attendance_key(instance.batch_id))
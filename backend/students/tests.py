@@ -1,3 +1,1364 @@
-from django.test import TestCase
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from operator import itemgetter
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Count
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from backend.db import immediate_atomic
+from backend.renderers import EnvelopeJSONRenderer, FastJSONRenderer, wrap_response_data
+from students.models import (
+    Assessment, AssessmentSubmission, ArchivedAttendance, ArchivedSubmission, ArchiveRollup,
+    Attendance, Batch, StudentProfile
+)
+from students.serializers import (
+    AssessmentSubmissionSerializer, AttendanceSerializer, StudentProfileSerializer
+)
+from students.services import autocomplete, versioning
+from students.services.analytics.dashboard import teacher_dashboard
+from students.services.analytics.downsample import lttb
+from students.services.attendance_service import attendance_counts, batch_attendance_summary
+from students.services.autocomplete import autocomplete_students
+from students.services.date_window import date_window, filter_date_window, month_window
+from students.services.search_service import STUDENT_FTS_TABLE, STUDENT_FTS_TRIGGERS
+from students.views import MAX_BULK_IDS, AssessmentListCreateView, AssessmentSubmitView, parse_date_window
+from students.services.enrollment_service import (
+    BULK_ENROLL_MAX_ROWS, HASH_POOL_MIN_PASSWORDS, enroll_students, hash_passwords
+)
+from users.models import User
+
+
+def full_table_scans(queryset):
+    """
+    Tables the database reads with a full scan for `queryset`, according to
+    EXPLAIN. Index scans (including covering-index scans) do not count.
+    """
+    plan = queryset.explain()
+    if connection.vendor == "postgresql":
+        return set(re.findall(r"Seq Scan on (\w+)", plan))
+    if connection.vendor == "sqlite":
+        return set(re.findall(r"\bSCAN (\w+)(?! USING)", plan))
+    return set()
+
+
+def sorts_in_memory(queryset):
+    """Whether EXPLAIN shows an explicit sort step instead of an index walk."""
+    plan = queryset.explain()
+    if connection.vendor == "postgresql":
+        return bool(re.search(r"\bSort\b", plan))
+    if connection.vendor == "sqlite":
+        return "TEMP B-TREE FOR ORDER BY" in plan
+    return False
+
+
+class ListQueriesMixin:
+    """Query-count checks for list endpoints."""
+
+    def assertQueriesIndependentOfRows(self, fetch, add_rows):
+        """
+        Fail unless `fetch()` runs as many queries after `add_rows()` as
+        before it. Returns the last response.
+        """
+        def measure():
+            with CaptureQueriesContext(connection) as queries:
+                response = fetch()
+            self.assertEqual(response.status_code, 200)
+            return len(queries), response
+
+        # Warm per-request caches (the user's profile, version counters)
+        fetch()
+        before, _ = measure()
+        add_rows()
+        after, response = measure()
+        self.assertEqual(after, before, "query count grows with the number of rows")
+        return response
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Runs EXPLAIN on the hot querysets against seeded data and fails when one
+    of them falls back to a full table scan of the table it filters.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        start = date(2024, 1, 1)
+        batches = [
+            Batch.objects.create(name=f"Batch {b}", start_date=start) for b in range(3)
+        ]
+        students = []
+        for b, batch in enumerate(batches):
+            for i in range(10):
+                user = User.objects.create(username=f"plan_{b}_{i}", role=User.Roles.STUDENT)
+                students.append(StudentProfile.objects.create(
+                    user=user, first_name=f"First{i}", last_name=f"Last{b}",
+                    roll_no=f"P{b}-{i}", batch=batch,
+                ))
+        Attendance.objects.bulk_create([
+            Attendance(
+                student=student,
+                batch=student.batch,
+                date=start + timedelta(days=d),
+                status="present" if (d + student.id) % 4 else "absent",
+            )
+            for student in students
+            for d in range(90)
+        ])
+        assessments = [
+            Assessment.objects.create(
+                title=f"A{b}-{k}", batch=batch, questionnaire={},
+                test_type="unit" if k % 2 else "monthly",
+            )
+            for b, batch in enumerate(batches)
+            for k in range(6)
+        ]
+        AssessmentSubmission.objects.bulk_create([
+            AssessmentSubmission(
+                assessment=assessment, student=student, batch=student.batch, answers={}, score=50
+            )
+            for assessment in assessments
+            for student in students
+            if student.batch_id == assessment.batch_id
+        ])
+        cls.batch = batches[1]
+        cls.student = students[12]
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Tiny test tables would otherwise always be read sequentially
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertNoFullScan(self, queryset, table):
+        self.assertNotIn(table, full_table_scans(queryset), queryset.explain())
+
+    def test_attendance_counts_per_student(self):
+        # get_attendance_percentage(): total and present counts
+        self.assertNoFullScan(
+            Attendance.objects.filter(student=self.student).values("id"),
+            Attendance._meta.db_table,
+        )
+        self.assertNoFullScan(
+            Attendance.objects.filter(student=self.student, status="present").values("id"),
+            Attendance._meta.db_table,
+        )
+
+    def test_attendance_by_batch_and_month(self):
+        queryset = filter_date_window(
+            Attendance.objects.filter(batch_id=self.batch.id), month_window(2024, 2)
+        )
+        self.assertNoFullScan(queryset, Attendance._meta.db_table)
+        self.assertNotIn(StudentProfile._meta.db_table, str(queryset.query))
+
+    def test_batch_aggregates_are_single_table(self):
+        # batch_attendance_summary / batch_average_score / BatchScoreView
+        for queryset in (
+            Attendance.objects.filter(batch_id=self.batch.id).values("id"),
+            AssessmentSubmission.objects.filter(batch_id=self.batch.id).order_by("-submitted_at"),
+        ):
+            with self.subTest(table=queryset.model._meta.db_table):
+                self.assertNoFullScan(queryset, queryset.model._meta.db_table)
+                self.assertNotIn(StudentProfile._meta.db_table, str(queryset.query))
+
+    def test_attendance_date_window(self):
+        # AttendanceView ?year=&month= / ?from=&to= across all batches
+        window = date_window(date_from=date(2024, 2, 10), date_to=date(2024, 2, 20))
+        queryset = filter_date_window(Attendance.objects.all(), window)
+        self.assertNoFullScan(queryset, Attendance._meta.db_table)
+        self.assertIn(">=", str(queryset.query))
+
+    def test_monthly_report_counts(self):
+        # MonthlyAttendanceReportView: one grouped query for the whole batch
+        queryset = filter_date_window(
+            Attendance.objects.filter(student_id__in=[self.student.id]), month_window(2024, 3)
+        ).values("student_id").annotate(total=Count("id")).order_by()
+        self.assertNoFullScan(queryset, Attendance._meta.db_table)
+
+    def test_attendance_on_day(self):
+        self.assertNoFullScan(
+            Attendance.objects.filter(date=date(2024, 1, 15)),
+            Attendance._meta.db_table,
+        )
+
+    def test_submission_history(self):
+        # StudentScoreHistoryView / get_score_trend
+        queryset = AssessmentSubmission.objects.filter(student=self.student).order_by("-submitted_at")
+        self.assertNoFullScan(queryset, AssessmentSubmission._meta.db_table)
+        self.assertFalse(sorts_in_memory(queryset), queryset.explain())
+
+    def test_assessments_by_batch_and_type(self):
+        self.assertNoFullScan(
+            Assessment.objects.filter(batch_id=self.batch.id, test_type="unit"),
+            Assessment._meta.db_table,
+        )
+
+
+class AssessmentListQueriesTestCase(ListQueriesMixin, TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(name="Lists", start_date=date(2024, 1, 1))
+        self.user = User.objects.create(username="lister", role=User.Roles.STUDENT)
+        self.student = StudentProfile.objects.create(
+            user=self.user, first_name="L", last_name="S", roll_no="LS1", batch=self.batch
+        )
+        self.add_assessments(2)
+
+    def add_assessments(self, count):
+        for _ in range(count):
+            for submitted in (True, False):
+                assessment = Assessment.objects.create(
+                    title="Quiz", batch=self.batch, questionnaire={}, answer_key={"q1": "a"}
+                )
+                if submitted:
+                    AssessmentSubmission.objects.create(
+                        assessment=assessment, student=self.student, answers={"q1": "a"}, score=1
+                    )
+
+    def check_list(self, fetch):
+        results = self.assertQueriesIndependentOfRows(fetch, lambda: self.add_assessments(3)).data["results"]
+        self.assertEqual(len(results), 10)
+        for item in results:
+            self.assertEqual(item["is_submitted"], item["student_submission"] is not None)
+        self.assertEqual(sum(item["is_submitted"] for item in results), 5)
+
+    def test_assessment_view(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.check_list(lambda: client.get("/api/students/assessments/"))
+
+        pending = client.get("/api/students/assessments/?pending=true").data["results"]
+        self.assertEqual(len(pending), 5)
+        self.assertFalse(any(item["is_submitted"] for item in pending))
+
+    def test_assessment_list_create_view(self):
+        def fetch():
+            request = APIRequestFactory().get("/api/students/assessments/")
+            force_authenticate(request, user=self.user)
+            return AssessmentListCreateView.as_view()(request)
+
+        self.check_list(fetch)
+
+
+class AttendanceSubmissionListQueriesTestCase(ListQueriesMixin, TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(name="Rows", start_date=date(2024, 1, 1))
+        self.assessment = Assessment.objects.create(title="Rows", batch=self.batch, questionnaire={})
+        self.teacher = APIClient()
+        self.teacher.force_authenticate(User.objects.create(username="rows-teacher", role=User.Roles.TEACHER))
+        self.students = []
+        self.add_students(2)
+
+    def add_students(self, count):
+        for _ in range(count):
+            n = len(self.students)
+            user = User.objects.create(username=f"rows{n}", role=User.Roles.STUDENT)
+            student = StudentProfile.objects.create(
+                user=user, first_name="R", last_name=str(n), roll_no=f"RW{n}", batch=self.batch
+            )
+            self.students.append(student)
+            Attendance.objects.create(student=student, date=date(2024, 1, 1), status="present")
+            AssessmentSubmission.objects.create(
+                assessment=self.assessment, student=student, answers={}, score=n
+            )
+
+    def test_teacher_lists(self):
+        for path in (
+            f"/api/students/attendance/?batch_id={self.batch.id}",
+            f"/api/students/batch/{self.batch.id}/scores/",
+            f"/api/students/assessments/{self.assessment.id}/",
+            f"/api/students/assessments/{self.assessment.id}/submissions/",
+        ):
+            with self.subTest(path=path):
+                self.assertQueriesIndependentOfRows(lambda: self.teacher.get(path), lambda: self.add_students(3))
+
+    def test_student_history(self):
+        student = self.students[0]
+        client = APIClient()
+        client.force_authenticate(student.user)
+
+        def add_submissions():
+            for _ in range(3):
+                AssessmentSubmission.objects.create(
+                    assessment=Assessment.objects.create(title="More", batch=self.batch, questionnaire={}),
+                    student=student, answers={}, score=1,
+                )
+
+        response = self.assertQueriesIndependentOfRows(
+            lambda: client.get("/api/students/assessments/history/"), add_submissions
+        )
+        self.assertEqual(len(response.data["results"]), 4)
+
+
+class TeacherDashboardQueriesTestCase(ListQueriesMixin, TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create(username="dash-teacher", role=User.Roles.TEACHER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+        self.today = date.today()
+        self.batches = 0
+        self.add_batches(1)
+
+    def add_batches(self, count):
+        for _ in range(count):
+            self.batches += 1
+            n = self.batches
+            batch = Batch.objects.create(name=f"Dash {n}", start_date=date(2024, 1, 1))
+            assessment = Assessment.objects.create(title=f"Dash {n}", batch=batch, questionnaire={})
+            for i, status_ in enumerate(("present", "absent")):
+                user = User.objects.create(username=f"dash{n}-{i}", role=User.Roles.STUDENT)
+                student = StudentProfile.objects.create(
+                    user=user, first_name="D", last_name=str(i), roll_no=f"DA{n}-{i}", batch=batch
+                )
+                Attendance.objects.create(student=student, date=self.today, status=status_)
+                AssessmentSubmission.objects.create(
+                    assessment=assessment, student=student, answers={}, score=20 + 60 * i
+                )
+
+    def test_dashboard_is_four_queries(self):
+        for count in (0, 4):
+            self.add_batches(count)
+            with self.assertNumQueries(4):
+                data = teacher_dashboard(self.teacher, today=self.today)
+        # One student per batch scores 20, the other was absent today
+        self.assertEqual(data["totals"], {
+            "batches": 5, "students": 10, "at_risk": 10, "batches_marked_today": 5,
+        })
+        self.assertEqual(data["batches"][0]["attendance_today"], {
+            "marked": True, "present": 1, "absent": 1, "unmarked": 0,
+        })
+        self.assertEqual([item["submission_rate"] for item in data["recent_assessments"]], [100.0] * 5)
+
+    def test_view_queries_do_not_grow(self):
+        self.assertQueriesIndependentOfRows(
+            lambda: self.client.get("/api/students/analytics/teacher-dashboard/"),
+            lambda: self.add_batches(3),
+        )
+
+
+class ValuesReadPathTestCase(TestCase):
+    """The values() read path must render exactly what the serializer does."""
+
+    def setUp(self):
+        batch = Batch.objects.create(name="Values", start_date=date(2024, 1, 1))
+        assessment = Assessment.objects.create(title="Values", batch=batch, questionnaire={})
+        for n, student_batch in enumerate((batch, None)):  # None: the null-relation guard
+            user = User.objects.create(username=f"values{n}", role=User.Roles.STUDENT)
+            student = StudentProfile.objects.create(
+                user=user, first_name="V", last_name=str(n), roll_no=f"VA{n}", batch=student_batch,
+                date_of_birth=date(2001, 2, 3) if n else None,
+            )
+            Attendance.objects.create(student=student, date=date(2024, 1, 2), status="present")
+            AssessmentSubmission.objects.create(
+                assessment=assessment, student=student, answers={"q": [n, None]}, score=n + 0.5
+            )
+
+    def assertSameJSON(self, serializer_class, queryset, query=""):
+        request = RequestFactory().get(f"/{query}")
+        queryset = queryset.order_by("id")
+        plan = serializer_class.values_plan(request)
+        self.assertIsNotNone(plan)
+
+        objects = serializer_class.setup_eager_loading(queryset, request)
+        expected = FastJSONRenderer().render(
+            serializer_class(objects, many=True, context={"request": request}).data
+        )
+        actual = FastJSONRenderer().render(plan.to_representation(plan.values(queryset)))
+        self.assertEqual(actual, expected)
+
+    def test_values_path_matches_serializer(self):
+        for serializer_class, queryset in (
+            (StudentProfileSerializer, StudentProfile.objects.all()),
+            (AttendanceSerializer, Attendance.objects.all()),
+            (AssessmentSubmissionSerializer, AssessmentSubmission.objects.all()),
+        ):
+            for query in ("", "?fields=id,batch_name,student_name,score", "?exclude=answers,user_id"):
+                with self.subTest(serializer=serializer_class.__name__, query=query):
+                    self.assertSameJSON(serializer_class, queryset, query)
+
+    def test_null_relation_fields_are_omitted(self):
+        request = RequestFactory().get("/")
+        plan = StudentProfileSerializer.values_plan(request)
+        rows = plan.to_representation(plan.values(StudentProfile.objects.order_by("id")))
+        self.assertEqual(rows[0]["batch_name"], "Values")
+        self.assertNotIn("batch_name", rows[1])
+
+
+class TrendTestCase(TestCase):
+
+    def setUp(self):
+        batch = Batch.objects.create(name="Trend", start_date=date(2024, 1, 1))
+        user = User.objects.create(username="trend", role=User.Roles.STUDENT)
+        self.student = StudentProfile.objects.create(
+            user=user, first_name="T", last_name="R", roll_no="TR1", batch=batch
+        )
+        start = date(2024, 1, 1)
+        Attendance.objects.bulk_create([
+            Attendance(
+                student=self.student, batch=batch, date=start + timedelta(days=d),
+                status="present" if d % 3 else "absent",
+            )
+            for d in range(120)
+        ])
+        for d in range(60):
+            submission = AssessmentSubmission.objects.create(
+                assessment=Assessment.objects.create(title=f"Trend {d}", batch=batch, questionnaire={}),
+                student=self.student, answers={}, score=(d * 37) % 100,
+            )
+            AssessmentSubmission.objects.filter(pk=submission.pk).update(
+                submitted_at=submission.submitted_at - timedelta(days=60 - d)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="trend-teacher", role=User.Roles.TEACHER))
+
+    def get(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_lttb_keeps_ends_and_peaks(self):
+        rows = [{"x": i, "y": 100 if i == 50 else 0} for i in range(100)]
+        sampled = lttb(rows, 10, x=itemgetter("x"), y=itemgetter("y"))
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual((sampled[0]["x"], sampled[-1]["x"]), (0, 99))
+        self.assertIn(rows[50], sampled)
+        self.assertEqual(lttb(rows[:5], 10, x=itemgetter("x"), y=itemgetter("y")), rows[:5])
+
+    def test_attendance_trend_shapes(self):
+        path = f"/api/students/analytics/attendance-trend/{self.student.id}/"
+        monthly = self.get(path)
+        self.assertEqual(len(monthly), 4)
+        self.assertEqual(set(monthly[0]), {"year", "month", "attendance_percentage"})
+
+        weekly = self.get(path, bucket="week")
+        self.assertGreater(len(weekly), 16)
+        self.assertEqual(set(weekly[0]), {"period", "attendance_percentage"})
+
+        self.assertEqual(len(self.get(path, bucket="week", points=5)), 5)
+
+    def test_score_trend_points(self):
+        path = f"/api/students/analytics/score-trend/{self.student.id}/"
+        self.assertEqual(len(self.get(path)), 60)
+        reduced = self.get(path, points=12)
+        self.assertEqual(len(reduced), 12)
+        self.assertEqual(reduced[0], self.get(path)[0])
+        self.assertEqual(set(self.get(path, bucket="month")[0]), {"period", "score", "submissions"})
+
+    def test_invalid_params(self):
+        path = f"/api/students/analytics/score-trend/{self.student.id}/"
+        for params in ({"points": "1"}, {"points": "x"}, {"bucket": "day"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(path, params).status_code, 400)
+
+
+class EnvelopeRendererTestCase(SimpleTestCase):
+
+    data = {
+        "message": "Loaded",
+        "results": [{
+            "id": 1, "name": "Zoë", "score": 75.5, "ratio": 1 / 3, "passed": True, "notes": None,
+            "date": date(2024, 2, 29), "created_at": datetime(2024, 2, 29, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "marks": Decimal("12.50"), "token": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "label": gettext_lazy("Present"), "by_week": {1: 2, 3: 4},
+        }],
+    }
+
+    def render(self, renderer, status_code=200):
+        return renderer.render(
+            self.data, "application/json", {"response": Response(status=status_code)}
+        )
+
+    def expected(self, status_code=200):
+        return JSONRenderer().render(wrap_response_data(self.data, status_code), "application/json")
+
+    def test_matches_stock_renderer(self):
+        for encoder in ("orjson", "json"):
+            for status_code in (200, 400):
+                with self.subTest(encoder=encoder, status=status_code), override_settings(API_JSON_ENCODER=encoder):
+                    self.assertEqual(self.render(EnvelopeJSONRenderer(), status_code), self.expected(status_code))
+
+    def test_wrapped_once(self):
+        body = json.loads(self.render(EnvelopeJSONRenderer()))
+        self.assertEqual((body["success"], body["message"]), (True, "Loaded"))
+        self.assertEqual(body["data"]["results"][0]["by_week"], {"1": 2, "3": 4})
+
+
+class KeysetPaginationTestCase(TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(name="Keyset", start_date=date(2024, 1, 1))
+        self.students = []
+        for n in range(3):
+            user = User.objects.create(username=f"keyset{n}", role=User.Roles.STUDENT)
+            self.students.append(StudentProfile.objects.create(
+                user=user, first_name="K", last_name=str(n), roll_no=f"KS{n}", batch=self.batch
+            ))
+        # Several rows share each date, so the id breaks ties
+        for d in range(4):
+            for student in self.students:
+                Attendance.objects.create(student=student, date=date(2024, 1, 10 + d), status="present")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="keyset-teacher", role=User.Roles.TEACHER))
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def expected_ids(self):
+        return list(Attendance.objects.order_by("-date", "-id").values_list("id", flat=True))
+
+    def test_pages_are_stable_across_inserts(self):
+        expected = self.expected_ids()
+        page = self.page(f"/api/students/attendance/?batch_id={self.batch.id}&pagination=cursor&page_size=5")
+        seen = [row["id"] for row in page["results"]]
+        self.assertIsNone(page["previous"])
+        day = 0
+        while page["next"]:
+            # New rows ahead of and behind the cursor must not shift the pages
+            day += 1
+            Attendance.objects.create(student=self.students[0], date=date(2024, 2, day), status="absent")
+            Attendance.objects.create(student=self.students[1], date=date(2023, 12, day), status="absent")
+            page = self.page(page["next"])
+            seen += [row["id"] for row in page["results"] if row["id"] in expected]
+        # Every original row exactly once, in order
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.page(f"/api/students/attendance/?batch_id={self.batch.id}&pagination=cursor&page_size=5")
+        second = self.page(first["next"])
+        self.assertEqual(self.page(second["previous"])["results"], first["results"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/students/attendance/?cursor=bm9wZQ").status_code, 404)
+
+
+class SparseFieldsetTestCase(TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(name="Sparse", start_date=date(2024, 1, 1))
+        user = User.objects.create(username="sparse", role=User.Roles.STUDENT)
+        self.student = StudentProfile.objects.create(
+            user=user, first_name="S", last_name="F", roll_no="SF1", batch=self.batch, address="Long address"
+        )
+        Assessment.objects.create(title="Sparse", batch=self.batch, questionnaire={"pages": []})
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="sparse-teacher", role=User.Roles.TEACHER))
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        return data.get("results", data), " ".join(query["sql"] for query in queries)
+
+    def test_fields_narrow_output_and_columns(self):
+        rows, sql = self.get("/api/students/profile/?fields=id,roll_no")
+        self.assertEqual(rows, [{"id": self.student.id, "roll_no": "SF1"}])
+        self.assertNotIn('"address"', sql)
+        self.assertNotIn(Batch._meta.db_table, sql.split("FROM", 1)[-1])
+
+        data, sql = self.get(f"/api/students/profile/{self.student.id}/?fields=id,batch_name")
+        self.assertEqual(data, {"id": self.student.id, "batch_name": "Sparse"})
+        self.assertNotIn('"address"', sql)
+
+    def test_exclude(self):
+        rows, _ = self.get("/api/students/profile/?exclude=address,user")
+        self.assertNotIn("address", rows[0])
+        self.assertNotIn("user", rows[0])
+        self.assertEqual(rows[0]["roll_no"], "SF1")
+
+        rows, sql = self.get("/api/students/assessments/?exclude=questionnaire,description")
+        self.assertNotIn("questionnaire", rows[0])
+        self.assertIn("batch_name", rows[0])
+        self.assertNotIn('"questionnaire"', sql)
+
+    def test_unknown_fields_are_ignored(self):
+        rows, _ = self.get("/api/students/profile/?fields=id,nope")
+        self.assertEqual(rows, [{"id": self.student.id}])
+
+
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(name="ETag", start_date=date(2024, 1, 1))
+        user = User.objects.create(username="etag", role=User.Roles.STUDENT)
+        self.student = StudentProfile.objects.create(
+            user=user, first_name="E", last_name="T", roll_no="ET1", batch=self.batch
+        )
+        self.assessment = Assessment.objects.create(title="ETag", batch=self.batch, questionnaire={})
+        self.teacher = User.objects.create(username="etag-teacher", role=User.Roles.TEACHER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def etag(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        return response["ETag"]
+
+    def revalidate(self, path, etag):
+        return self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def rename_user(self, username):
+        user = self.student.user
+        user.username = username
+        user.save()
+
+    def test_unchanged_resource_is_304_from_one_query(self):
+        path = "/api/students/profile/"
+        etag = self.etag(path)
+        with self.assertNumQueries(1):  # the version counters
+            self.assertEqual(self.revalidate(path, etag), 304)
+        self.assertEqual(self.revalidate(path, '"stale"'), 200)
+
+    def test_writes_change_the_etag(self):
+        cases = [
+            ("/api/students/profile/", lambda: StudentProfile.objects.filter(pk=self.student.pk).first().save()),
+            ("/api/students/profile/", lambda: Batch.objects.create(name="Another", start_date=date(2024, 1, 1))),
+            ("/api/students/profile/", lambda: self.rename_user("etag-renamed")),
+            (
+                f"/api/students/assessments/{self.assessment.id}/",
+                lambda: AssessmentSubmission.objects.create(
+                    assessment=self.assessment, student=self.student, answers={}, score=1
+                ),
+            ),
+            (
+                "/api/students/analytics/teacher-dashboard/",
+                lambda: self.client.post(
+                    "/api/students/attendance/",
+                    {"student": self.student.id, "date": "2024-01-05", "status": "present"},
+                    format="json",
+                ),
+            ),
+        ]
+        for path, write in cases:
+            with self.subTest(path=path):
+                etag = self.etag(path)
+                write()
+                self.assertEqual(self.revalidate(path, etag), 200)
+
+    def test_etag_depends_on_user_and_query(self):
+        path = "/api/students/profile/"
+        etag = self.etag(path)
+        self.assertNotEqual(self.etag(path + "?fields=id"), etag)
+
+        admin = APIClient()
+        admin.force_authenticate(User.objects.create(username="etag-admin", role=User.Roles.ADMIN))
+        self.assertEqual(admin.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class SubmissionSubresourceTestCase(TestCase):
+
+    def setUp(self):
+        batch = Batch.objects.create(name="Subs", start_date=date(2024, 1, 1))
+        self.assessment = Assessment.objects.create(title="Subs", batch=batch, questionnaire={})
+        self.students = []
+        for n, score in enumerate((30, 90, 60)):
+            user = User.objects.create(username=f"subs{n}", role=User.Roles.STUDENT)
+            student = StudentProfile.objects.create(
+                user=user, first_name=("Ann", "Bob", "Cid")[n], last_name="S", roll_no=f"SB{n}", batch=batch
+            )
+            self.students.append(student)
+            AssessmentSubmission.objects.create(
+                assessment=self.assessment, student=student, answers={"q1": n}, score=score
+            )
+        StudentProfile.objects.create(
+            user=User.objects.create(username="subs-none", role=User.Roles.STUDENT),
+            first_name="Dee", last_name="S", roll_no="SB9", batch=batch,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="subs-teacher", role=User.Roles.TEACHER))
+        self.path = f"/api/students/assessments/{self.assessment.id}/submissions/"
+
+    def rows(self, **params):
+        response = self.client.get(self.path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]["results"]
+
+    def test_list_rows_are_compact_and_filterable(self):
+        rows = self.rows(ordering="-score")
+        self.assertEqual([row["score"] for row in rows], [90, 60, 30])
+        self.assertEqual(
+            set(rows[0]), {"id", "student", "student_name", "student_roll_no", "score", "submitted_at"}
+        )
+        self.assertEqual([row["student_name"] for row in self.rows(min_score="50", ordering="score")], ["Cid", "Bob"])
+        self.assertEqual([row["student_roll_no"] for row in self.rows(search="ann")], ["SB0"])
+        self.assertEqual(len(self.rows(student_id=self.students[1].id)), 1)
+
+        for params in ({"ordering": "answers"}, {"min_score": "high"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.path, params).status_code, 400)
+
+    def test_detail_and_summary(self):
+        row = self.rows(student_id=self.students[2].id)[0]
+        detail = self.client.get(f"{self.path}{row['id']}/").json()["data"]
+        self.assertEqual(detail["answers"], {"q1": 2})
+        self.assertEqual(
+            self.client.get(f"{self.path}{row['id'] + 1000}/").status_code, 404
+        )
+
+        data = self.client.get(f"/api/students/assessments/{self.assessment.id}/").json()["data"]
+        self.assertNotIn("submissions", data)
+        self.assertEqual(data["submission_summary"], {
+            "count": 3, "average_score": 60.0, "highest_score": 90.0, "lowest_score": 30.0,
+            "student_count": 4, "submission_rate": 75.0,
+        })
+
+    def test_students_cannot_list(self):
+        client = APIClient()
+        client.force_authenticate(self.students[0].user)
+        self.assertEqual(client.get(self.path).status_code, 403)
+
+
+class SubmitRaceTestCase(TestCase):
+
+    def setUp(self):
+        batch = Batch.objects.create(name="Race", start_date=date(2024, 1, 1))
+        user = User.objects.create(username="racer", role=User.Roles.STUDENT)
+        self.student = StudentProfile.objects.create(
+            user=user, first_name="R", last_name="C", roll_no="RC1", batch=batch
+        )
+        self.assessment = Assessment.objects.create(
+            title="Race", batch=batch, questionnaire={}, answer_key={"q1": "a"}
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_concurrent_duplicate_is_a_400(self):
+        inserted = []
+
+        def insert_after_check(execute, sql, params, many, context):
+            # Another request's submission lands between the duplicate check
+            # and this request's insert
+            result = execute(sql, params, many, context)
+            if not inserted and sql.startswith('SELECT %s AS "a"') and AssessmentSubmission._meta.db_table in sql:
+                inserted.append(True)
+                AssessmentSubmission.objects.bulk_create([AssessmentSubmission(
+                    assessment=self.assessment, student=self.student, answers={}, score=0,
+                )])
+            return result
+
+        with connection.execute_wrapper(insert_after_check):
+            response = self.client.post(
+                f"/api/students/assessments/{self.assessment.id}/submit/",
+                {"answers": {"q1": "a"}}, format="json",
+            )
+        self.assertEqual(inserted, [True])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "You have already submitted this assessment.")
+        self.assertEqual(AssessmentSubmission.objects.count(), 1)
+
+
+class BulkFetchTestCase(TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(name="Bulk", start_date=date(2024, 1, 1))
+        other = Batch.objects.create(name="Other bulk", start_date=date(2024, 1, 1))
+        self.profiles = []
+        for n in range(4):
+            user = User.objects.create(username=f"bulk{n}", role=User.Roles.STUDENT)
+            self.profiles.append(StudentProfile.objects.create(
+                user=user, first_name="B", last_name=str(n), roll_no=f"BK{n}", batch=self.batch
+            ))
+        self.own = Assessment.objects.create(title="Own", batch=self.batch, questionnaire={})
+        self.foreign = Assessment.objects.create(title="Foreign", batch=other, questionnaire={})
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="bulk-teacher", role=User.Roles.TEACHER))
+
+    def fetch(self, client, path, ids):
+        response = client.get(path, {"ids": ids})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_profiles_in_request_order_with_missing(self):
+        a, b = self.profiles[2].id, self.profiles[0].id
+        # One query for the rows, one for the ETag's resource versions
+        with self.assertNumQueries(2):
+            data = self.fetch(self.client, "/api/students/profile/", f"{a},{b},999999,{a}")
+        self.assertEqual([row["id"] for row in data["results"]], [a, b])
+        self.assertEqual(data["results"][0]["batch_name"], "Bulk")
+        self.assertEqual(data["missing"], [999999])
+
+    def test_assessments_respect_visibility(self):
+        student = APIClient()
+        student.force_authenticate(self.profiles[0].user)
+        data = self.fetch(student, "/api/students/assessments/", f"{self.foreign.id},{self.own.id}")
+        self.assertEqual([row["title"] for row in data["results"]], ["Own"])
+        self.assertEqual(data["missing"], [self.foreign.id])
+
+        self.assertEqual(student.get("/api/students/profile/", {"ids": self.profiles[1].id}).status_code, 403)
+
+    def test_invalid_ids(self):
+        too_many = ",".join(str(n) for n in range(1, MAX_BULK_IDS + 2))
+        for ids in ("1,x", ",", too_many):
+            with self.subTest(ids=ids[:20]):
+                self.assertEqual(self.client.get("/api/students/profile/", {"ids": ids}).status_code, 400)
+
+
+class StudentSearchTestCase(TestCase):
+
+    def setUp(self):
+        batch = Batch.objects.create(name="Search", start_date=date(2024, 1, 1))
+        for roll_no, first_name, last_name in (
+            ("SR10", "Annabel", "Lee"),
+            ("SR1", "Joanna", "Price"),
+            ("XSR1", "Hannah", "Annan"),
+            ("SR2", "Bob", "Stone"),
+        ):
+            user = User.objects.create(username=roll_no.lower(), role=User.Roles.STUDENT)
+            StudentProfile.objects.create(
+                user=user, first_name=first_name, last_name=last_name, roll_no=roll_no, batch=batch
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="search-teacher", role=User.Roles.TEACHER))
+
+    def search(self, term):
+        response = self.client.get("/api/students/profile/", {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [row["roll_no"] for row in response.json()["data"]["results"]]
+
+    def fts_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            return {row[0] for row in cursor.fetchall()} & set(STUDENT_FTS_TRIGGERS)
+
+    def test_results_and_ranking(self):
+        # Exact roll number, roll number prefix, name prefix, other matches
+        self.assertEqual(self.search("sr1"), ["SR1", "SR10", "XSR1"])
+        self.assertEqual(self.search("ann"), ["SR10", "XSR1", "SR1"])
+        self.assertEqual(self.search("ann lee"), ["SR10"])
+        # Shorter than a trigram: LIKE fallback
+        self.assertEqual(self.search("bo"), ["SR2"])
+
+    def test_writes_reach_the_index(self):
+        profile = StudentProfile.objects.get(roll_no="SR2")
+        profile.first_name = "Roberta"
+        profile.save()
+        self.assertEqual(self.search("robert"), ["SR2"])
+        profile.delete()
+        self.assertEqual(self.search("robert"), [])
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite FTS5 triggers")
+    def test_triggers_exist_after_migrate(self):
+        if STUDENT_FTS_TABLE not in connection.introspection.table_names():
+            self.skipTest("SQLite built without FTS5 trigram support")
+        self.assertEqual(self.fts_triggers(), set(STUDENT_FTS_TRIGGERS))
+
+        # As when a migration remakes students_studentprofile
+        with connection.cursor() as cursor:
+            for name in STUDENT_FTS_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {name}")
+        StudentProfile.objects.filter(roll_no="SR2").update(first_name="Roberta")
+
+        call_command("migrate", verbosity=0)
+        self.assertEqual(self.fts_triggers(), set(STUDENT_FTS_TRIGGERS))
+        self.assertEqual(self.search("robert"), ["SR2"])
+
+
+class AutocompleteTestCase(TestCase):
+
+    def setUp(self):
+        # Version counters roll back between tests; drop the process index too
+        autocomplete._index = None
+        self.batch = Batch.objects.create(name="Typeahead", start_date=date(2024, 1, 1))
+        other = Batch.objects.create(name="Other typeahead", start_date=date(2024, 1, 1))
+        for roll_no, first_name, last_name, batch in (
+            ("TA1", "Zoë", "Adams", self.batch),
+            ("TA2", "Zora", "Quinn", self.batch),
+            ("TB1", "Zoe", "Baker", other),
+        ):
+            user = User.objects.create(username=roll_no.lower(), role=User.Roles.STUDENT)
+            StudentProfile.objects.create(
+                user=user, first_name=first_name, last_name=last_name, roll_no=roll_no, batch=batch
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="typeahead-teacher", role=User.Roles.TEACHER))
+
+    def complete(self, q, **params):
+        response = self.client.get("/api/students/autocomplete/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row["roll_no"] for row in response.json()["data"]["results"]]
+
+    def test_prefix_matching(self):
+        self.assertEqual(sorted(self.complete("zoe")), ["TA1", "TB1"])
+        self.assertEqual(self.complete("ZOE A"), ["TA1"])
+        self.assertEqual(self.complete("ta"), ["TA1", "TA2"])
+        self.assertEqual(sorted(self.complete("zo", batch_id=self.batch.id)), ["TA1", "TA2"])
+        self.assertEqual(len(self.complete("z", limit=1)), 1)
+        self.assertEqual(self.complete(" "), [])
+
+    def test_lookups_between_checks_run_no_queries(self):
+        self.complete("zo")
+        with self.assertNumQueries(0):
+            self.assertEqual(autocomplete_students("quinn")[0]["roll_no"], "TA2")
+
+    def test_write_in_this_process_invalidates_at_once(self):
+        self.complete("zo")
+        profile = StudentProfile.objects.get(roll_no="TA2")
+        profile.first_name = "Yara"
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(self.complete("yara"), ["TA2"])
+        self.assertEqual(self.complete("zora"), [])
+
+    def test_write_in_another_worker_applies_after_recheck(self):
+        self.complete("zo")
+        # Another worker's save: the row and the counter change, this
+        # process gets no signal
+        StudentProfile.objects.filter(roll_no="TA2").update(first_name="Yara")
+        versioning.bump(versioning.STUDENT_PROFILES)
+        self.assertEqual(self.complete("yara"), [])
+
+        autocomplete._checked_at -= autocomplete.AUTOCOMPLETE_RECHECK_SECONDS
+        self.assertEqual(self.complete("yara"), ["TA2"])
+
+    def test_students_cannot_autocomplete(self):
+        student = APIClient()
+        student.force_authenticate(User.objects.get(username="ta1"))
+        self.assertEqual(student.get("/api/students/autocomplete/", {"q": "zo"}).status_code, 403)
+
+
+class DateWindowTestCase(SimpleTestCase):
+
+    def test_month(self):
+        self.assertEqual(date_window(2024, 2), (date(2024, 2, 1), date(2024, 3, 1)))
+        self.assertEqual(date_window(2024, 12), (date(2024, 12, 1), date(2025, 1, 1)))
+
+    def test_year(self):
+        self.assertEqual(date_window(2024), (date(2024, 1, 1), date(2025, 1, 1)))
+
+    def test_month_without_year_is_ignored(self):
+        self.assertEqual(date_window(month=5), (None, None))
+
+    def test_from_to_are_inclusive_and_intersect(self):
+        self.assertEqual(
+            date_window(date_from=date(2024, 1, 5), date_to=date(2024, 1, 9)),
+            (date(2024, 1, 5), date(2024, 1, 10)),
+        )
+        self.assertEqual(
+            date_window(2024, 1, date_from=date(2023, 12, 1), date_to=date(2024, 1, 9)),
+            (date(2024, 1, 1), date(2024, 1, 10)),
+        )
+
+    def test_last_representable_day(self):
+        self.assertEqual(date_window(date_to=date.max), (None, None))
+        self.assertEqual(date_window(2024, date_to=date.max), (date(2024, 1, 1), date(2025, 1, 1)))
+
+        window, error = parse_date_window(RequestFactory().get("/", {"to": "9999-12-31"}))
+        self.assertEqual((window, error), ((None, None), None))
+        window, error = parse_date_window(RequestFactory().get("/", {"year": "9999"}))
+        self.assertEqual(error.status_code, 400)
+
+    def test_invalid_month(self):
+        with self.assertRaises(ValueError):
+            date_window(2024, 13)
+
+    def test_impossible_query_dates_are_rejected(self):
+        for value in ("2024-02-30", "2024-13-01", "01/02/2024"):
+            with self.subTest(value=value):
+                window, error = parse_date_window(RequestFactory().get("/", {"from": value}))
+                self.assertIsNone(window)
+                self.assertEqual(error.status_code, 400)
+
+
+class BatchSyncTestCase(TestCase):
+
+    def setUp(self):
+        self.old_batch = Batch.objects.create(name="Old", start_date=date(2024, 1, 1))
+        self.new_batch = Batch.objects.create(name="New", start_date=date(2024, 1, 1))
+        user = User.objects.create(username="mover", role=User.Roles.STUDENT)
+        self.student = StudentProfile.objects.create(
+            user=user, first_name="M", last_name="V", roll_no="MV1", batch=self.old_batch
+        )
+        self.attendance = Attendance.objects.create(
+            student=self.student, date=date(2024, 1, 2), status="present"
+        )
+        assessment = Assessment.objects.create(title="A", batch=self.old_batch, questionnaire={})
+        self.submission = AssessmentSubmission.objects.create(
+            assessment=assessment, student=self.student, answers={}
+        )
+
+    def test_rows_are_stamped_on_save(self):
+        self.assertEqual(self.attendance.batch_id, self.old_batch.id)
+        self.assertEqual(self.submission.batch_id, self.old_batch.id)
+
+    def test_rows_follow_student_moving_batch(self):
+        self.student.batch = self.new_batch
+        self.student.save()
+        self.attendance.refresh_from_db()
+        self.submission.refresh_from_db()
+        self.assertEqual(self.attendance.batch_id, self.new_batch.id)
+        self.assertEqual(self.submission.batch_id, self.new_batch.id)
+
+    def test_move_changes_batch_versions_and_etags(self):
+        teacher = APIClient()
+        teacher.force_authenticate(User.objects.create(username="sync-teacher", role=User.Roles.TEACHER))
+        path = "/api/students/analytics/teacher-dashboard/"
+        etag = teacher.get(path)["ETag"]
+        keys = [
+            key(batch.id)
+            for key in (versioning.batch_attendance_key, versioning.batch_submissions_key)
+            for batch in (self.old_batch, self.new_batch)
+        ]
+        before = [versioning.current_version(key) for key in keys]
+
+        self.student.batch = self.new_batch
+        self.student.save()
+
+        after = [versioning.current_version(key) for key in keys]
+        self.assertTrue(all(new > old for old, new in zip(before, after)), (before, after))
+        self.assertNotEqual(teacher.get(path)["ETag"], etag)
+        self.assertEqual(teacher.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_sync_command_repairs_drift(self):
+        # update() bypasses save() and the profile signal
+        StudentProfile.objects.filter(id=self.student.id).update(batch=self.new_batch)
+        with self.assertRaises(CommandError):
+            call_command("sync_batch_ids", "--check", stdout=StringIO())
+        call_command("sync_batch_ids", stdout=StringIO())
+        call_command("sync_batch_ids", "--check", stdout=StringIO())
+        self.attendance.refresh_from_db()
+        self.assertEqual(self.attendance.batch_id, self.new_batch.id)
+
+
+class SQLiteTuningTestCase(TransactionTestCase):
+
+    def setUp(self):
+        if not hasattr(connection, "begin_immediate"):
+            self.skipTest("not running on the backend.sqlite3 engine")
+
+    def test_pragmas_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_immediate_atomic(self):
+        with CaptureQueriesContext(connection) as queries:
+            with immediate_atomic():
+                Batch.objects.create(name="Immediate", start_date=date(2024, 1, 1))
+            with transaction.atomic():
+                Batch.objects.count()
+        statements = [query["sql"] for query in queries]
+        self.assertEqual(statements[0], "BEGIN IMMEDIATE")
+        self.assertIn("BEGIN", statements[1:])
+        self.assertNotIn("BEGIN IMMEDIATE", statements[1:])
+
+
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """
+    ReplicaRouter against a second SQLite alias: a copy of the test database
+    taken mid-test, so it lags behind `default` like a real replica.
+    """
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("replica snapshot needs SQLite")
+        cache.clear()
+        self.teacher = User.objects.create_user(username="replica", password="pass1234", role=User.Roles.TEACHER)
+        self.batch = Batch.objects.create(name="Replica", start_date=date(2024, 1, 1))
+        self.add_student(1)
+
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        connection.ensure_connection()
+        snapshot = sqlite3.connect(path)
+        connection.connection.backup(snapshot)
+        snapshot.close()
+
+        replica = {**connections.settings["default"], "NAME": path}
+        connections.settings["replica"] = replica
+        self.addCleanup(connections.settings.pop, "replica")
+        self.addCleanup(self.close_replica)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def close_replica(self):
+        connections["replica"].close()
+        del connections["replica"]
+
+    def add_student(self, n):
+        user = User.objects.create(username=f"replica{n}", role=User.Roles.STUDENT)
+        StudentProfile.objects.create(
+            user=user, first_name="R", last_name=str(n), roll_no=f"RP{n}", batch=self.batch
+        )
+
+    def report(self):
+        response = self.client.get(
+            f"/api/students/analytics/monthly-attendance/?batch_id={self.batch.id}"
+        )
+        self.assertEqual(response.status_code, 200)
+        return [row["roll_no"] for row in response.json()["data"]]
+
+    def test_reports_read_the_replica(self):
+        self.add_student(2)  # not replicated yet
+        self.assertEqual(self.report(), ["RP1"])
+        # Views without ReplicaReadMixin stay on the primary
+        self.assertEqual(StudentProfile.objects.filter(batch=self.batch).count(), 2)
+
+    def test_writes_pin_reads_to_primary(self):
+        self.add_student(2)
+        response = self.client.patch("/api/users/users/me/", {"first_name": "T"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(self.report()), ["RP1", "RP2"])
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_writes_go_to_primary(self):
+        response = self.client.patch("/api/users/users/me/", {"first_name": "T"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.using("replica").get(pk=self.teacher.pk).first_name, "")
+        self.assertEqual(User.objects.get(pk=self.teacher.pk).first_name, "T")
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(name="Export", start_date=date(2024, 1, 1))
+        user = User.objects.create(username="exported", role=User.Roles.STUDENT)
+        student = StudentProfile.objects.create(
+            user=user, first_name="E", last_name="P", roll_no="EX1", batch=self.batch
+        )
+        for day in (1, 2, 3):
+            Attendance.objects.create(student=student, date=date(2024, 3, day), status="present")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="exporter", role=User.Roles.TEACHER))
+
+    def export(self, **params):
+        return self.client.get("/api/students/attendance/export/", {"batch_id": self.batch.id, **params})
+
+    def test_csv_export_respects_date_range(self):
+        response = self.export(**{"from": "2024-03-02", "to": "2024-03-02"})
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)  # header + one day
+        self.assertIn("2024-03-02", lines[1])
+
+    def test_invalid_params_are_rejected(self):
+        for params in ({"from": "2024-02-30"}, {"to": "not-a-date"}, {"batch_id": "abc"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.export(**params).status_code, 400)
+
+
+class ArchiveTestCase(TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(
+            name="Done", start_date=date(2020, 1, 1), end_date=date(2020, 12, 31)
+        )
+        self.current = Batch.objects.create(name="Current", start_date=date(2024, 1, 1))
+        user = User.objects.create(username="alumnus", role=User.Roles.STUDENT)
+        self.student = StudentProfile.objects.create(
+            user=user, first_name="A", last_name="L", roll_no="AL1", batch=self.batch
+        )
+        for d in range(4):
+            Attendance.objects.create(
+                student=self.student, date=date(2020, 3, 2 + d),
+                status="present" if d else "absent",
+            )
+        self.assessment = Assessment.objects.create(title="Final", batch=self.batch, questionnaire={})
+        AssessmentSubmission.objects.create(
+            assessment=self.assessment, student=self.student, answers={}, score=80
+        )
+
+    def test_archive_moves_rows_and_keeps_rollups(self):
+        window = month_window(2020, 3)
+        before = attendance_counts([self.student.id], window)
+        call_command("archive_batches", "--chunk-size", "3", stdout=StringIO())
+
+        self.assertFalse(Attendance.objects.filter(batch=self.batch).exists())
+        self.assertFalse(AssessmentSubmission.objects.filter(batch=self.batch).exists())
+        self.assertEqual(ArchivedAttendance.objects.count(), 4)
+        self.assertEqual(ArchivedSubmission.objects.count(), 1)
+
+        rollup = ArchiveRollup.objects.get(batch=self.batch, student=self.student)
+        self.assertEqual((rollup.attendance_total, rollup.attendance_present), (4, 3))
+        self.assertEqual((rollup.submission_count, rollup.score_sum), (1, 80))
+
+        self.assertEqual(attendance_counts([self.student.id], window), {})
+        self.assertEqual(attendance_counts([self.student.id], window, include_archived=True), before)
+        self.assertEqual(batch_attendance_summary(self.batch, include_archived=True), 75.0)
+
+    def test_live_views_after_archive(self):
+        call_command("archive_batches", stdout=StringIO())
+        self.batch.refresh_from_db()
+        self.assertIsNotNone(self.batch.archived_at)
+
+        # Not listed as pending for the student
+        student = APIClient()
+        student.force_authenticate(self.student.user)
+        self.assertEqual(student.get("/api/students/assessments/").json()["data"]["results"], [])
+        self.assertEqual(student.get(f"/api/students/assessments/{self.assessment.id}/").status_code, 404)
+
+        dashboard = student.get("/api/students/analytics/student-dashboard/").json()["data"]
+        self.assertEqual(
+            (dashboard["attendance_percentage"], dashboard["average_score"], dashboard["total_submissions"]),
+            (75.0, 80.0, 1),
+        )
+
+        # No second submission once the first has moved to the archive.
+        # /submit/ resolves to AssessmentSubmissionView; AssessmentSubmitView
+        # is reached directly
+        path = f"/api/students/assessments/{self.assessment.id}/submit/"
+        self.assertEqual(student.post(path, {"answers": {"q1": "a"}}, format="json").status_code, 404)
+        request = APIRequestFactory().post(path, {"answers": {"q1": "a"}}, format="json")
+        force_authenticate(request, self.student.user)
+        self.assertEqual(AssessmentSubmitView.as_view()(request, assessment_id=self.assessment.id).status_code, 404)
+        self.assertFalse(AssessmentSubmission.objects.exists())
+
+        teacher = APIClient()
+        teacher.force_authenticate(User.objects.create(username="archive-teacher", role=User.Roles.TEACHER))
+        summary = teacher.get(f"/api/students/assessments/{self.assessment.id}/").json()["data"]["submission_summary"]
+        self.assertEqual((summary["count"], summary["average_score"], summary["submission_rate"]), (1, 80.0, 100.0))
+
+        dashboard = teacher.get("/api/students/analytics/teacher-dashboard/").json()["data"]
+        self.assertEqual([batch["name"] for batch in dashboard["batches"]], ["Current"])
+        self.assertEqual(dashboard["recent_assessments"], [])
+
+    def test_recent_and_open_batches_are_skipped(self):
+        call_command("archive_batches", "--older-than-days", "100000", stdout=StringIO())
+        self.assertEqual(ArchivedAttendance.objects.count(), 0)
+        with self.assertRaises(CommandError):
+            call_command("archive_batches", "--batch", str(self.current.id), stdout=StringIO())
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class EnrollmentTestCase(TestCase):
+
+    def setUp(self):
+        self.batch = Batch.objects.create(name="Intake", start_date=date(2024, 1, 1))
+        user = User.objects.create(username="existing", role=User.Roles.STUDENT)
+        StudentProfile.objects.create(user=user, first_name="E", last_name="X", roll_no="IN0")
+
+    def row(self, n, **overrides):
+        row = {
+            "username": f"intake{n}", "email": f"intake{n}@example.com", "password": "secret123",
+            "first_name": "I", "last_name": str(n), "roll_no": f"IN{n}",
+        }
+        row.update(overrides)
+        return row
+
+    def test_valid_rows_are_created_in_chunks(self):
+        rows = [self.row(n) for n in range(1, 6)]
+        with CaptureQueriesContext(connection) as queries:
+            result = enroll_students(rows, batch_id=self.batch.id, chunk_size=2, workers=1)
+
+        self.assertEqual(result["errors"], [])
+        self.assertEqual([item["row"] for item in result["results"]], list(range(5)))
+        inserts = [query for query in queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 6)  # users + profiles, per chunk of 2
+
+        profile = StudentProfile.objects.select_related("user").get(roll_no="IN3")
+        self.assertEqual(profile.batch_id, self.batch.id)
+        self.assertEqual(profile.user.role, User.Roles.STUDENT)
+        self.assertTrue(profile.user.check_password("secret123"))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        rows = [
+            self.row(1),
+            self.row(2, roll_no="IN0"),
+            self.row(3, username="existing"),
+            self.row(4, roll_no="IN5"),
+            self.row(5),
+            self.row(6, email="not-an-email"),
+            self.row(7, batch_id=self.batch.id + 100),
+            self.row(8, password=""),
+        ]
+        result = enroll_students(rows, workers=1)
+
+        self.assertEqual([item["row"] for item in result["results"]], [0])
+        self.assertEqual(
+            {error["row"]: sorted(error["errors"]) for error in result["errors"]},
+            {
+                1: ["roll_no"], 2: ["username"], 3: ["roll_no"], 4: ["roll_no"],
+                5: ["email"], 6: ["batch_id"], 7: ["password"],
+            },
+        )
+        self.assertFalse(User.objects.filter(username="intake5").exists())
+
+    def test_view_accepts_json_and_csv(self):
+        teacher = User.objects.create(username="enroller", role=User.Roles.TEACHER)
+        client = APIClient()
+        client.force_authenticate(teacher)
+
+        response = client.post(
+            "/api/students/profile/bulk/",
+            {"batch_id": self.batch.id, "students": [self.row(1), self.row(2, email="bad")]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        data = response.json()["data"]
+        self.assertEqual((data["created"], [error["row"] for error in data["errors"]]), (1, [1]))
+
+        header = "username,email,password,first_name,last_name,roll_no"
+        lines = [",".join(self.row(n)[field] for field in header.split(",")) for n in (3, 4)]
+        upload = SimpleUploadedFile("students.csv", "\n".join([header, *lines]).encode("utf-8-sig"))
+        response = client.post(
+            "/api/students/profile/bulk/", {"batch_id": self.batch.id, "file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            set(StudentProfile.objects.filter(batch=self.batch).values_list("roll_no", flat=True)),
+            {"IN1", "IN3", "IN4"},
+        )
+
+        too_many = [self.row(n) for n in range(BULK_ENROLL_MAX_ROWS + 1)]
+        response = client.post("/api/students/profile/bulk/", {"students": too_many}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("enroll_students", response.json()["message"])
+
+    def test_command_reads_csv(self):
+        header = "username,email,password,first_name,last_name,roll_no"
+        lines = [",".join(self.row(n)[field] for field in header.split(",")) for n in (1, 2)]
+        lines.append("intake3,intake3@example.com,secret123,I,3,IN0")
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write("\n".join([header, *lines]))
+        self.addCleanup(os.remove, handle.name)
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command("enroll_students", handle.name, "--dry-run", stdout=stdout, stderr=stderr)
+        self.assertIn("would enroll 2 student(s), 1 error(s)", stdout.getvalue())
+        self.assertFalse(User.objects.filter(username="intake1").exists())
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "enroll_students", handle.name, "--batch", str(self.batch.id), "--workers", "1",
+            stdout=stdout, stderr=stderr,
+        )
+        self.assertIn("enrolled 2 student(s), 1 error(s)", stdout.getvalue())
+        self.assertIn("row 4: roll_no:", stderr.getvalue())
+        self.assertEqual(StudentProfile.objects.filter(batch=self.batch).count(), 2)
+
+
+class PasswordPoolTestCase(SimpleTestCase):
+
+    def test_pool_hashes_in_order(self):
+        # The spawned workers hash with the configured PASSWORD_HASHERS
+        passwords = [f"secret{n}" for n in range(HASH_POOL_MIN_PASSWORDS)]
+        hashes = hash_passwords(passwords, workers=2)
+        self.assertEqual(len(set(hashes)), len(passwords))
+        for password, encoded in zip(passwords, hashes):
+            self.assertTrue(check_password(password, encoded))
@@ -1,18 +1,23 @@
 from django.urls import path
 from students.views import (
-    AssessmentDetailView, AssessmentListCreateView, AssessmentSubmitView, BulkAttendanceView, StudentDashboardView, StudentsProfileView, BatchView, AttendanceView, 
+    AssessmentDetailView, AssessmentListCreateView, AssessmentSubmitView, BulkAttendanceView, StudentDashboardView, TeacherDashboardView, StudentsProfileView, StudentBulkEnrollView, StudentAutocompleteView, BatchView, AttendanceView, 
     AssessmentView, AssessmentSubmissionView, 
     StudentScoreHistoryView, BatchScoreView,
     AttendanceTrendView, MonthlyAttendanceReportView, ScoreTrendView, 
-    BatchAnalyticsView, LowPerformingPredictionView
+    BatchAnalyticsView, LowPerformingPredictionView,
+    AttendanceExportView, BatchScoreExportView,
+    AssessmentSubmissionListView, AssessmentSubmissionDetailView
 )
 
 urlpatterns = [
     path('profile/', StudentsProfileView.as_view(), name='student_profile'),
     path('profile/<int:student_id>/', StudentsProfileView.as_view(), name='student_profile_detail'),
+    path('profile/bulk/', StudentBulkEnrollView.as_view(), name='student_profile_bulk'),
+    path("autocomplete/", StudentAutocompleteView.as_view(), name="student-autocomplete"),
     path("batches/", BatchView.as_view(), name="batches"),                 # GET (all), POST
     path("batches/<int:batch_id>/", BatchView.as_view(), name="batch-crud"),  # PUT, DELETE
     path("attendance/", AttendanceView.as_view(), name="attendance"),  # GET, POST
+    path("attendance/export/", AttendanceExportView.as_view(), name="attendance-export"),
     path("assessments/", AssessmentView.as_view(), name="assessments"),  # GET (all), POST (create)
     path(
         "assessments/<int:assessment_id>/submit/",
@@ -29,6 +34,11 @@ urlpatterns = [
         BatchScoreView.as_view(),
         name="batch-scores"
     ),
+    path(
+        "batch/<int:batch_id>/scores/export/",
+        BatchScoreExportView.as_view(),
+        name="batch-scores-export"
+    ),
     path('analytics/monthly-attendance/', MonthlyAttendanceReportView.as_view(), name='monthly-attendance'),
     path('analytics/attendance-trend/<int:student_id>/', AttendanceTrendView.as_view(), name='attendance-trend'),
     path('analytics/score-trend/<int:student_id>/', ScoreTrendView.as_view(), name='score-trend'),
@@ -39,10 +49,25 @@ urlpatterns = [
     path("assessments/", AssessmentListCreateView.as_view(), name="assessments-list-create"),
     path("assessments/<int:assessment_id>/", AssessmentDetailView.as_view(), name="assessment-detail"),
     path("assessments/<int:assessment_id>/submit/", AssessmentSubmitView.as_view(), name="assessment-submit"),
+    path(
+        "assessments/<int:assessment_id>/submissions/",
+        AssessmentSubmissionListView.as_view(),
+        name="assessment-submissions"
+    ),
+    path(
+        "assessments/<int:assessment_id>/submissions/<int:submission_id>/",
+        AssessmentSubmissionDetailView.as_view(),
+        name="assessment-submission-detail"
+    ),
     path(
         'analytics/student-dashboard/',
         StudentDashboardView.as_view(),
         name='student-dashboard'
     ),
+    path(
+        'analytics/teacher-dashboard/',
+        TeacherDashboardView.as_view(),
+        name='teacher-dashboard'
+    ),
 
 ]
@@ -1,57 +1,159 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
 from students.models import Batch, StudentProfile, Attendance, Assessment, AssessmentSubmission
+from students.pagination import StandardPagination, get_list_paginator
 from students.serializers import (
     BatchSerializer, StudentProfileSerializer, AttendanceSerializer,
-    AssessmentSerializer, AssessmentSubmissionSerializer
+    AssessmentSerializer, AssessmentSubmissionSerializer, AssessmentSubmissionRowSerializer
 )
 from django.shortcuts import get_object_or_404
 from users.models import User
-from django.db import transaction
-from students.services.assessment_service import calculate_score, get_score_trend, batch_average_score, top_students, get_avg_score, get_total_submissions
-from students.services.attendance_service import get_attendance_trend, batch_attendance_summary, get_attendance_percentage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from students.services.assessment_service import calculate_score, get_score_trend, batch_average_score, top_students, get_avg_score, get_total_submissions, with_submission_status, submission_summary
+from students.services.attendance_service import get_attendance_trend, batch_attendance_summary, get_attendance_percentage, attendance_counts
+from students.services.date_window import date_window, month_window, filter_date_window
 from students.services.analytics.predictor import predict_low_performing
+from students.services.analytics.downsample import TREND_BUCKETS, MAX_TREND_POINTS
+from students.services.analytics.dashboard import teacher_batches, teacher_dashboard
+from students.services import versioning
+from students.services.versioning import conditional_get
+from students.services.search_service import search_students
+from students.services.enrollment_service import BULK_ENROLL_MAX_ROWS, enroll_students, parse_csv
+from students.services.autocomplete import autocomplete_students, AUTOCOMPLETE_DEFAULT_LIMIT, AUTOCOMPLETE_MAX_LIMIT
+from students.services.export_service import (
+    ATTENDANCE_EXPORT_COLUMNS, SUBMISSION_EXPORT_COLUMNS, EXPORT_FORMATS,
+    attendance_export_rows, submission_export_rows, export_stream
+)
+from django.http import StreamingHttpResponse
+from backend.db import immediate_atomic
+from backend.routers import ReplicaReadMixin
+from users.authentication import student_profile_of
+import csv
 from datetime import datetime
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.permissions import AllowAny
 from rest_framework.exceptions import PermissionDenied
 
 # Create your views here.
 
-class StandardPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+def paginated_values_response(request, paginator, queryset, serializer_class, extra_values=()):
+    """
+    Paginate and serialize a list through the serializer's values() read
+    path (see ValuesReadMixin); `extra_values` are fields the paginator
+    orders on. Falls back to the serializer when it has no values plan.
+    """
+    plan = serializer_class.values_plan(request)
+    if plan is None:
+        page = paginator.paginate_queryset(
+            serializer_class.setup_eager_loading(queryset, request), request
+        )
+        serializer = serializer_class(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
+
+    extra = [field.lstrip("-") for field in extra_values]
+    page = paginator.paginate_queryset(plan.values(queryset, *extra), request)
+    return paginator.get_paginated_response(plan.to_representation(page))
+
+
+# Upper bound for ?ids= bulk fetches, in line with the largest page size
+MAX_BULK_IDS = StandardPagination.max_page_size
+
+
+def parse_ids_param(request):
+    """
+    Read the optional `ids=1,2,3` query param used for bulk fetches.
+
+    Returns (ids, error_response); ids is None when the param is absent,
+    otherwise the de-duplicated ids in request order. error_response is a
+    400 Response when the param is invalid, otherwise None.
+    """
+    raw = request.GET.get("ids")
+    if raw is None:
+        return None, None
+
+    ids = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            value = int(part)
+        except ValueError:
+            return None, Response(
+                {"message": "ids must be a comma-separated list of integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if value not in ids:
+            ids.append(value)
+
+    if not ids or len(ids) > MAX_BULK_IDS:
+        return None, Response(
+            {"message": f"ids must contain between 1 and {MAX_BULK_IDS} ids"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return ids, None
+
+
+def bulk_fetch_response(request, queryset, ids, serializer_class):
+    """
+    Serve a ?ids= bulk fetch with a single id__in query. `queryset` must
+    already be limited to what the user may see (and eager-loaded); ids
+    that are not in it are reported under `missing`. Results keep the
+    requested order.
+    """
+    queryset = queryset.filter(id__in=ids)
+    plan = serializer_class.values_plan(request) if hasattr(serializer_class, "values_plan") else None
+    if plan is None:
+        objects = list(queryset)
+        data = serializer_class(objects, many=True, context={"request": request}).data
+        found = {obj.id: item for obj, item in zip(objects, data)}
+    else:
+        rows = list(plan.values(queryset, "id"))
+        found = {row["id"]: item for row, item in zip(rows, plan.to_representation(rows))}
+
+    return Response({
+        "results": [found[i] for i in ids if i in found],
+        "missing": [i for i in ids if i not in found],
+    })
 
 
 class BatchView(APIView):
     pagination_class = StandardPagination
     permission_classes = [AllowAny]
 
+    def version_keys(self, request, *args, **kwargs):
+        if not request.user.is_anonymous and request.user.is_student():
+            return [versioning.BATCHES, versioning.STUDENT_PROFILES]
+        return [versioning.BATCHES]
+
+    @conditional_get(version_keys)
     def get(self, request):
 
         if request.user.is_anonymous:
-            queryset = Batch.objects.all()
+            queryset = BatchSerializer.setup_eager_loading(Batch.objects.all(), request)
             paginator = self.pagination_class()
             page = paginator.paginate_queryset(queryset, request)
-            serializer = BatchSerializer(page, many=True)
+            serializer = BatchSerializer(page, many=True, context={"request": request})
             return paginator.get_paginated_response(serializer.data)
 
         if request.user.is_teacher() or request.user.is_admin():
-            queryset = Batch.objects.all()
+            queryset = BatchSerializer.setup_eager_loading(Batch.objects.all(), request)
             
             # Pagination
             paginator = self.pagination_class()
             page = paginator.paginate_queryset(queryset, request)
-            serializer = BatchSerializer(page, many=True)
+            serializer = BatchSerializer(page, many=True, context={"request": request})
             return paginator.get_paginated_response(serializer.data)
 
         elif request.user.is_student():
             # Return only the student's batch
-            if hasattr(request.user, "student_profile") and request.user.student_profile.batch:
-                batch = request.user.student_profile.batch
-                serializer = BatchSerializer(batch)
+            profile = student_profile_of(request.user)
+            if profile and profile.batch:
+                batch = profile.batch
+                serializer = BatchSerializer(batch, context={"request": request})
                 return Response(serializer.data)
             return Response({"message": "No batch assigned."})
 
@@ -100,19 +202,34 @@ class BatchView(APIView):
 class StudentsProfileView(APIView):
     pagination_class = StandardPagination
 
+    def version_keys(self, request, *args, **kwargs):
+        return [versioning.STUDENT_PROFILES, versioning.BATCHES, versioning.USERS]
+
+    @conditional_get(version_keys)
     def get(self, request, student_id=None):
         # If a student_id is provided in the URL, return that single profile (teachers/admins only)
         if student_id is not None:
             if not (request.user.is_teacher() or request.user.is_admin()):
                 return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
-            profile = get_object_or_404(StudentProfile, id=student_id)
-            serializer = StudentProfileSerializer(profile)
+            profile = get_object_or_404(
+                StudentProfileSerializer.setup_eager_loading(StudentProfile.objects.all(), request),
+                id=student_id
+            )
+            serializer = StudentProfileSerializer(profile, context={"request": request})
             return Response(serializer.data)
 
+        ids, error = parse_ids_param(request)
+        if error:
+            return error
+
         # No student_id -> list or current student's profile
         if request.user.is_teacher() or request.user.is_admin():
             queryset = StudentProfile.objects.all()
 
+            # Bulk fetch: ?ids=1,2,3
+            if ids is not None:
+                return bulk_fetch_response(request, queryset, ids, StudentProfileSerializer)
+
             # Filtering
             batch_id = request.GET.get('batch_id')
             course = request.GET.get('course')
@@ -123,23 +240,21 @@ class StudentsProfileView(APIView):
             if course:
                 queryset = queryset.filter(course__icontains=course)
             if search:
-                queryset = queryset.filter(
-                    first_name__icontains=search
-                ) | queryset.filter(
-                    last_name__icontains=search
-                ) | queryset.filter(
-                    roll_no__icontains=search
-                )
+                queryset = search_students(queryset, search)
 
             # Pagination
-            paginator = self.pagination_class()
-            page = paginator.paginate_queryset(queryset, request)
-            serializer = StudentProfileSerializer(page, many=True)
-            return paginator.get_paginated_response(serializer.data)
+            return paginated_values_response(
+                request, self.pagination_class(), queryset, StudentProfileSerializer
+            )
 
         elif request.user.is_student():
-            profile = get_object_or_404(StudentProfile, user=request.user)
-            serializer = StudentProfileSerializer(profile)
+            if ids is not None:
+                return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+            profile = get_object_or_404(
+                StudentProfileSerializer.setup_eager_loading(StudentProfile.objects.all(), request),
+                user=request.user
+            )
+            serializer = StudentProfileSerializer(profile, context={"request": request})
             return Response(serializer.data)
 
         return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
@@ -173,7 +288,7 @@ class StudentsProfileView(APIView):
         }
         
         try:
-            with transaction.atomic():
+            with immediate_atomic():
                 user = User.objects.create_user(
                     username=user_data['username'],
                     email=user_data['email'],
@@ -236,40 +351,125 @@ class StudentsProfileView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
+class StudentBulkEnrollView(APIView):
+    """
+    POST (Admin/Teacher only), either
+      {"batch_id": 1, "students": [{"username": ..., "email": ..., "password": ...,
+                                    "first_name": ..., "last_name": ..., "roll_no": ...}, ...]}
+    or a multipart CSV upload in `file` with the same columns (plus an
+    optional batch_id form field).
+
+    Valid rows are created, invalid ones are reported per row index.
+    """
+    def post(self, request):
+        if not (request.user.is_teacher() or request.user.is_admin()):
+            return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get("file")
+        if upload is not None:
+            try:
+                rows = parse_csv(upload.read().decode("utf-8"))
+            except (UnicodeDecodeError, csv.Error) as e:
+                return Response({"message": f"Invalid CSV file: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data.get("students")
+            if not isinstance(rows, list):
+                return Response(
+                    {"message": "Provide a `students` list or a CSV `file`"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        if not rows:
+            return Response({"message": "No students to enroll"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > BULK_ENROLL_MAX_ROWS:
+            return Response(
+                {"message": (
+                    f"At most {BULK_ENROLL_MAX_ROWS} students per request; "
+                    "use `manage.py enroll_students` for larger lists"
+                )},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        batch_id = request.data.get("batch_id") or None
+        result = enroll_students(rows, batch_id=batch_id)
+        return Response({
+            "created": len(result["results"]),
+            "results": result["results"],
+            "errors": result["errors"],
+        }, status=status.HTTP_201_CREATED if result["results"] else status.HTTP_400_BAD_REQUEST)
+
+
+class StudentAutocompleteView(APIView):
+    """
+    GET /autocomplete/?q=<prefix>&batch_id=&limit= -> teacher/admin only
+    Typeahead on roll number / name, answered from an in-process prefix
+    index instead of the database.
+    """
+
+    def get(self, request):
+        if not (request.user.is_teacher() or request.user.is_admin()):
+            return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            batch_id = int(request.GET["batch_id"]) if request.GET.get("batch_id") else None
+            limit = int(request.GET.get("limit") or AUTOCOMPLETE_DEFAULT_LIMIT)
+        except ValueError:
+            return Response(
+                {"message": "batch_id and limit must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+
+        results = autocomplete_students(request.GET.get("q", ""), batch_id=batch_id, limit=limit)
+        return Response({"results": results})
+
+
+def filter_month_of_any_year(queryset, request):
+    """
+    ?month= without ?year= keeps its original meaning (that month in every
+    year), which cannot be expressed as a single date range.
+    """
+    month = request.GET.get("month")
+    if month and not request.GET.get("year"):
+        queryset = queryset.filter(date__month=month)
+    return queryset
+
+
 class AttendanceView(APIView):
     pagination_class = StandardPagination
+    cursor_ordering = ('-date', '-id')
 
     def get(self, request):
         """Teachers/Admin → all attendance
            Student → only own attendance
-           Supports filtering: ?batch_id=&year=&month=&date=
+           Supports filtering: ?batch_id=&year=&month=&date=&from=&to=
+           ?pagination=cursor switches to keyset pages ordered by (date, id)
         """
 
         if request.user.is_teacher() or request.user.is_admin():
             queryset = Attendance.objects.all()
 
             batch_id = request.GET.get("batch_id")
-            year = request.GET.get("year")
-            month = request.GET.get("month")
             date = request.GET.get("date")
             student_id = request.GET.get("student_id")
 
+            window, error = parse_date_window(request)
+            if error:
+                return error
+
             if batch_id:
-                queryset = queryset.filter(student__batch_id=batch_id)
+                queryset = queryset.filter(batch_id=batch_id)
             if student_id:
                 queryset = queryset.filter(student_id=student_id)
-            if year:
-                queryset = queryset.filter(date__year=year)
-            if month:
-                queryset = queryset.filter(date__month=month)
+            queryset = filter_month_of_any_year(filter_date_window(queryset, window), request)
             if date:
                 queryset = queryset.filter(date=date)
 
             # Pagination
-            paginator = self.pagination_class()
-            page = paginator.paginate_queryset(queryset, request)
-            serializer = AttendanceSerializer(page, many=True)
-            return paginator.get_paginated_response(serializer.data)
+            paginator = get_list_paginator(request, self.cursor_ordering)
+            return paginated_values_response(
+                request, paginator, queryset, AttendanceSerializer, self.cursor_ordering
+            )
 
         # Student view — only own attendance
         if request.user.is_student():
@@ -277,18 +477,16 @@ class AttendanceView(APIView):
             queryset = Attendance.objects.filter(student=profile)
             
             # Filtering for students
-            year = request.GET.get("year")
-            month = request.GET.get("month")
-            if year:
-                queryset = queryset.filter(date__year=year)
-            if month:
-                queryset = queryset.filter(date__month=month)
+            window, error = parse_date_window(request)
+            if error:
+                return error
+            queryset = filter_month_of_any_year(filter_date_window(queryset, window), request)
             
             # Pagination
-            paginator = self.pagination_class()
-            page = paginator.paginate_queryset(queryset, request)
-            serializer = AttendanceSerializer(page, many=True)
-            return paginator.get_paginated_response(serializer.data)
+            paginator = get_list_paginator(request, self.cursor_ordering)
+            return paginated_values_response(
+                request, paginator, queryset, AttendanceSerializer, self.cursor_ordering
+            )
 
         return Response({"message": "Permission denied."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -303,7 +501,8 @@ class AttendanceView(APIView):
 
         serializer = AttendanceSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with immediate_atomic():
+            serializer.save()
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -322,13 +521,32 @@ class AssessmentView(APIView):
         return Response(serializer.data, status=201)
 
     def get(self, request):
-        queryset = Assessment.objects.all()
+        """
+        Supports filtering: ?batch_id=&test_type= (teachers/admins)
+        and ?pending=true (students: only assessments not yet submitted).
+        ?ids=1,2,3 returns just those assessments, unpaginated.
+        """
+        ids, error = parse_ids_param(request)
+        if error:
+            return error
+
+        queryset = AssessmentSerializer.setup_eager_loading(Assessment.objects.all(), request)
 
         # If student → only their batch assessments
         if request.user.is_student():
-            profile = getattr(request.user, "student_profile", None)
+            profile = student_profile_of(request.user)
             if profile and profile.batch_id:
-                queryset = queryset.filter(batch_id=profile.batch_id, answer_key__isnull=False)
+                # Submissions of archived batches are no longer in the live
+                # table; their assessments would all read as pending
+                queryset = with_submission_status(
+                    queryset.filter(
+                        batch_id=profile.batch_id, batch__archived_at__isnull=True,
+                        answer_key__isnull=False,
+                    ),
+                    profile,
+                )
+                if request.GET.get("pending") in ("1", "true", "True"):
+                    queryset = queryset.filter(is_submitted=False)
             else:
                 queryset = Assessment.objects.none()
         else:
@@ -341,6 +559,10 @@ class AssessmentView(APIView):
             if test_type:
                 queryset = queryset.filter(test_type=test_type)
 
+        # Bulk fetch: ?ids=1,2,3 within the same visibility rules
+        if ids is not None:
+            return bulk_fetch_response(request, queryset, ids, AssessmentSerializer)
+
         # Pagination
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(queryset, request)
@@ -349,6 +571,23 @@ class AssessmentView(APIView):
         )
         return paginator.get_paginated_response(serializer.data)
     
+def already_submitted_response(assessment, student):
+    """
+    400 for a second submission to `assessment`, or None if `student` has
+    not submitted it.
+    """
+    existing = AssessmentSubmission.objects.filter(assessment=assessment, student=student).first()
+    if existing is None:
+        return None
+    return Response(
+        {
+            "message": "You have already submitted this assessment.",
+            "data": AssessmentSubmissionSerializer(existing).data,
+        },
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
 class AssessmentSubmissionView(APIView):
 
     def post(self, request, assessment_id):
@@ -356,8 +595,9 @@ class AssessmentSubmissionView(APIView):
         if not request.user.is_student():
             return Response({"message": "Students only"}, status=403)
 
-        assessment = get_object_or_404(Assessment, id=assessment_id)
-        student = request.user.student_profile
+        # Archived batches' submissions are no longer in the live table
+        assessment = get_object_or_404(Assessment, id=assessment_id, batch__archived_at__isnull=True)
+        student = student_profile_of(request.user)
 
         submission_data = {
             "assessment": assessment.id,
@@ -375,18 +615,29 @@ class AssessmentSubmissionView(APIView):
         )
 
 
-        submission = serializer.save(score=score)
+        try:
+            with immediate_atomic():
+                submission = serializer.save(score=score)
+        except IntegrityError:
+            # A concurrent request submitted it after validation
+            duplicate = already_submitted_response(assessment, student)
+            if duplicate is None:
+                raise
+            return duplicate
 
         return Response(AssessmentSubmissionSerializer(submission).data, status=201)
     
 
 class StudentScoreHistoryView(APIView):
+    cursor_ordering = ('-submitted_at', '-id')
 
     def get(self, request):
         if not request.user.is_student():
             return Response({"message": "Students only"}, status=403)
 
-        queryset = AssessmentSubmission.objects.filter(student=request.user.student_profile)
+        queryset = AssessmentSubmissionSerializer.setup_eager_loading(
+            AssessmentSubmission.objects.filter(student=student_profile_of(request.user)), request
+        )
         
         # Filtering
         assessment_id = request.GET.get('assessment_id')
@@ -394,21 +645,20 @@ class StudentScoreHistoryView(APIView):
             queryset = queryset.filter(assessment_id=assessment_id)
         
         # Pagination
-        paginator = StandardPagination()
+        paginator = get_list_paginator(request, self.cursor_ordering)
         page = paginator.paginate_queryset(queryset, request)
-        serializer = AssessmentSubmissionSerializer(page, many=True)
+        serializer = AssessmentSubmissionSerializer(page, many=True, context={"request": request})
         return paginator.get_paginated_response(serializer.data)
 
 
-class BatchScoreView(APIView):
+class BatchScoreView(ReplicaReadMixin, APIView):
+    cursor_ordering = ('-submitted_at', '-id')
 
     def get(self, request, batch_id):
         if not (request.user.is_teacher() or request.user.is_admin()):
             return Response({"message": "Permission denied"}, status=403)
 
-        queryset = AssessmentSubmission.objects.filter(
-            student__batch_id=batch_id
-        )
+        queryset = AssessmentSubmission.objects.filter(batch_id=batch_id)
         
         # Filtering
         assessment_id = request.GET.get('assessment_id')
@@ -416,28 +666,207 @@ class BatchScoreView(APIView):
             queryset = queryset.filter(assessment_id=assessment_id)
         
         # Pagination
-        paginator = StandardPagination()
-        page = paginator.paginate_queryset(queryset, request)
-        serializer = AssessmentSubmissionSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        paginator = get_list_paginator(request, self.cursor_ordering)
+        return paginated_values_response(
+            request, paginator, queryset, AssessmentSubmissionSerializer, self.cursor_ordering
+        )
+
+
+def parse_trend_params(request):
+    """
+    Read the optional `bucket=week|month|term` and `points=<n>` query params
+    shared by the trend endpoints.
+
+    Returns (bucket, points, error_response); error_response is a 400
+    Response when a parameter is invalid, otherwise None.
+    """
+    bucket = request.GET.get("bucket") or None
+    points = request.GET.get("points") or None
+
+    if bucket and bucket not in TREND_BUCKETS:
+        return None, None, Response(
+            {"message": f"bucket must be one of: {', '.join(TREND_BUCKETS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if points is not None:
+        try:
+            points = int(points)
+        except ValueError:
+            points = 0
+        if not 2 <= points <= MAX_TREND_POINTS:
+            return None, None, Response(
+                {"message": f"points must be an integer between 2 and {MAX_TREND_POINTS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    return bucket, points, None
+
 
+def include_archived(request):
+    """
+    Whether ?include_archived=true asks a historical report to also read the
+    rows `manage.py archive_batches` moved out of the hot tables.
+    """
+    return request.GET.get("include_archived") in ("1", "true", "True")
 
-class AttendanceTrendView(APIView):
+
+def parse_date_param(value):
+    """
+    A YYYY-MM-DD query param as a date, or None when it is malformed or not
+    a real calendar date (parse_date raises for e.g. 2024-02-30).
+    """
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def parse_date_window(request):
+    """
+    Read the optional `year=`, `month=`, `from=YYYY-MM-DD` and `to=YYYY-MM-DD`
+    (inclusive) query params into one half-open date range, so views filter
+    with index-friendly `date >= start AND date < end` predicates.
+    `month` only narrows the range together with `year`.
+
+    Returns (window, error_response); error_response is a 400 Response when
+    a parameter is invalid, otherwise None.
+    """
+    try:
+        year = int(request.GET["year"]) if request.GET.get("year") else None
+        month = int(request.GET["month"]) if request.GET.get("month") else None
+    except ValueError:
+        return None, Response(
+            {"message": "year and month must be integers"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    bounds = {}
+    for param in ("from", "to"):
+        value = request.GET.get(param)
+        if value:
+            bounds[param] = parse_date_param(value)
+            if bounds[param] is None:
+                return None, Response(
+                    {"message": "Invalid date format. Use YYYY-MM-DD."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+    try:
+        window = date_window(year, month, bounds.get("from"), bounds.get("to"))
+    except ValueError as e:
+        return None, Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return window, None
+
+
+def export_response(request, batch_id, rows_func, columns, name):
+    """
+    Stream an export for `batch_id` as CSV (default) or NDJSON (?output=ndjson),
+    optionally limited to ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive).
+    """
+    if not (request.user.is_teacher() or request.user.is_admin()):
+        return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+    # `format` is reserved by DRF for renderer selection
+    export_format = request.GET.get("output") or "csv"
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {"message": f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    date_range = {}
+    for param in ("from", "to"):
+        value = request.GET.get(param)
+        if value:
+            date_range[param] = parse_date_param(value)
+            if date_range[param] is None:
+                return Response(
+                    {"message": "Invalid date format. Use YYYY-MM-DD."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+    rows = rows_func(batch_id, date_range.get("from"), date_range.get("to"))
+    # Bind the alias now; the stream is consumed after the view (and its
+    # replica routing) has returned
+    rows = rows.using(rows.db)
+    stream, content_type, extension = export_stream(rows, columns, export_format)
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{name}-batch-{batch_id}.{extension}"'
+    return response
+
+
+class AttendanceExportView(ReplicaReadMixin, APIView):
+    """
+    GET /attendance/export/?batch_id=&from=&to=&output=csv|ndjson
+    Streams every matching attendance row (teachers/admins only).
+    """
+
+    def get(self, request):
+        batch_id = request.GET.get("batch_id")
+        if not batch_id:
+            return Response({"message": "batch_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            batch_id = int(batch_id)
+        except ValueError:
+            return Response({"message": "batch_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        batch = get_object_or_404(Batch, id=batch_id)
+        return export_response(
+            request, batch.id, attendance_export_rows, ATTENDANCE_EXPORT_COLUMNS, "attendance"
+        )
+
+
+class BatchScoreExportView(ReplicaReadMixin, APIView):
+    """
+    GET /batch/<batch_id>/scores/export/?from=&to=&output=csv|ndjson
+    Streams every matching submission (teachers/admins only).
+    """
+
+    def get(self, request, batch_id):
+        batch = get_object_or_404(Batch, id=batch_id)
+        return export_response(
+            request, batch.id, submission_export_rows, SUBMISSION_EXPORT_COLUMNS, "scores"
+        )
+
+
+class AttendanceTrendView(ReplicaReadMixin, APIView):
+    """
+    Attendance percentage per month for a student.
+    Supports ?bucket=week|month|term and ?points=<n> to bound the series,
+    ?from=&to= (or ?year=&month=) to limit the date range and
+    ?include_archived=true for archived batches.
+    """
 
     def get(self, request, student_id):
         student = get_object_or_404(StudentProfile, id=student_id)
-        trend = get_attendance_trend(student)
+        bucket, points, error = parse_trend_params(request)
+        if error:
+            return error
+        window, error = parse_date_window(request)
+        if error:
+            return error
+        trend = get_attendance_trend(
+            student, bucket=bucket, points=points, window=window,
+            include_archived=include_archived(request),
+        )
         return Response(trend)
 
 
-class MonthlyAttendanceReportView(APIView):
-    """Monthly attendance report for batch or student"""
+class MonthlyAttendanceReportView(ReplicaReadMixin, APIView):
+    """Monthly attendance report for batch or student (?include_archived=true reads archived batches)"""
 
     def get(self, request):
         batch_id = request.GET.get('batch_id')
         student_id = request.GET.get('student_id')
-        year = request.GET.get('year', datetime.now().year)
-        month = request.GET.get('month', datetime.now().month)
+        try:
+            year = int(request.GET.get('year', datetime.now().year))
+            month = int(request.GET.get('month', datetime.now().month))
+            window = month_window(year, month)
+        except ValueError:
+            return Response(
+                {"message": "year and month must be a valid calendar month"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         if batch_id:
             if not (request.user.is_teacher() or request.user.is_admin()):
@@ -449,7 +878,8 @@ class MonthlyAttendanceReportView(APIView):
             students = StudentProfile.objects.filter(batch=batch)
         elif student_id:
             student = get_object_or_404(StudentProfile, id=student_id)
-            if request.user.is_student() and request.user.student_profile.id != student.id:
+            own = student_profile_of(request.user)
+            if request.user.is_student() and (own is None or own.id != student.id):
                 return Response(
                     {"message": "Permission denied"},
                     status=status.HTTP_403_FORBIDDEN
@@ -457,22 +887,28 @@ class MonthlyAttendanceReportView(APIView):
             students = [student]
         else:
             if request.user.is_student():
-                students = [request.user.student_profile]
+                own = student_profile_of(request.user)
+                if own is None:
+                    return Response(
+                        {"message": "No student profile for this user"},
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+                # Only the id comes from the token; names and roll_no need the row
+                students = StudentProfile.objects.filter(id=own.id)
             else:
                 return Response(
                     {"message": "batch_id or student_id is required"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+        students = list(students)
+        counts = attendance_counts(
+            [student.id for student in students], window, include_archived=include_archived(request)
+        )
+
         report = []
         for student in students:
-            attendance_records = Attendance.objects.filter(
-                student=student,
-                date__year=year,
-                date__month=month
-            )
-            total_days = attendance_records.count()
-            present_days = attendance_records.filter(status='present').count()
+            total_days, present_days = counts.get(student.id, (0, 0))
             absent_days = total_days - present_days
             percentage = (present_days / total_days * 100) if total_days > 0 else 0
 
@@ -480,8 +916,8 @@ class MonthlyAttendanceReportView(APIView):
                 "student_id": student.id,
                 "student_name": f"{student.first_name} {student.last_name}",
                 "roll_no": student.roll_no,
-                "year": int(year),
-                "month": int(month),
+                "year": year,
+                "month": month,
                 "total_days": total_days,
                 "present_days": present_days,
                 "absent_days": absent_days,
@@ -491,28 +927,43 @@ class MonthlyAttendanceReportView(APIView):
         return Response(report)
 
 
-class ScoreTrendView(APIView):
+class ScoreTrendView(ReplicaReadMixin, APIView):
+    """
+    Score per submission for a student.
+    Supports ?bucket=week|month|term (averaged per period), ?points=<n> and
+    ?include_archived=true.
+    """
 
     def get(self, request, student_id):
         student = get_object_or_404(StudentProfile, id=student_id)
-        trend = get_score_trend(student)
+        bucket, points, error = parse_trend_params(request)
+        if error:
+            return error
+        trend = get_score_trend(
+            student, bucket=bucket, points=points, include_archived=include_archived(request)
+        )
         return Response(trend)
 
 
-class BatchAnalyticsView(APIView):
+class BatchAnalyticsView(ReplicaReadMixin, APIView):
+    """
+    Batch averages and top students. ?include_archived=true adds archived
+    rows to the averages (from their rollups); top students stay live-only.
+    """
 
     def get(self, request, batch_id):
         batch = get_object_or_404(Batch, id=batch_id)
+        archived = include_archived(request)
 
         data = {
-            "average_attendance": batch_attendance_summary(batch),
-            "average_score": batch_average_score(batch),
+            "average_attendance": batch_attendance_summary(batch, include_archived=archived),
+            "average_score": batch_average_score(batch, include_archived=archived),
             "top_students": list(top_students(batch))
         }
         return Response(data)
 
 
-class LowPerformingPredictionView(APIView):
+class LowPerformingPredictionView(ReplicaReadMixin, APIView):
 
     def get(self, request, student_id):
         student = get_object_or_404(StudentProfile, id=student_id)
@@ -524,22 +975,56 @@ class LowPerformingPredictionView(APIView):
         })
 
 
-class StudentDashboardView(APIView):
+class StudentDashboardView(ReplicaReadMixin, APIView):
+
+    def version_keys(self, request):
+        profile = student_profile_of(request.user)
+        if profile is None:
+            return None
+        return [
+            versioning.batch_attendance_key(profile.batch_id),
+            versioning.batch_submissions_key(profile.batch_id),
+            versioning.STUDENT_PROFILES,
+        ]
 
+    @conditional_get(version_keys)
     def get(self, request):
-        student = request.user.student_profile
+        student = student_profile_of(request.user)
 
+        # Figures from archived batches come from their rollups
         data = {
-            "attendance_percentage": get_attendance_percentage(student),
-            "average_score": get_avg_score(student),
-            "total_submissions": get_total_submissions(student),
+            "attendance_percentage": get_attendance_percentage(student, include_archived=True),
+            "average_score": get_avg_score(student, include_archived=True),
+            "total_submissions": get_total_submissions(student, include_archived=True),
         }
 
         return Response(data)
     
 
-# students/views.py — add near AttendanceView (imports at top)
-from django.utils.dateparse import parse_date
+class TeacherDashboardView(ReplicaReadMixin, APIView):
+    """
+    GET /analytics/teacher-dashboard/ -> teacher/admin only
+    Batches with roster counts, today's attendance status and at-risk
+    counts, plus recent assessments with submission rates, in one response
+    built from a fixed number of queries.
+    """
+
+    def version_keys(self, request):
+        if not (request.user.is_teacher() or request.user.is_admin()):
+            return None
+        keys = [versioning.BATCHES, versioning.STUDENT_PROFILES, versioning.day_key(timezone.localdate())]
+        for batch_id in teacher_batches(request.user).values_list("id", flat=True):
+            keys.append(versioning.batch_attendance_key(batch_id))
+            keys.append(versioning.batch_submissions_key(batch_id))
+        return keys
+
+    @conditional_get(version_keys)
+    def get(self, request):
+        if not (request.user.is_teacher() or request.user.is_admin()):
+            return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        return Response(teacher_dashboard(request.user))
+
 
 class BulkAttendanceView(APIView):
     """
@@ -575,22 +1060,24 @@ class BulkAttendanceView(APIView):
         created_or_updated = []
         errors = []
 
-        for student in students:
-            status_val = "present" if student.id in present_ids else "absent"
-            try:
-                obj, created = Attendance.objects.update_or_create(
-                    student=student,
-                    date=date_obj,
-                    defaults={"status": status_val}
-                )
-                created_or_updated.append({
-                    "student_id": student.id,
-                    "roll_no": student.roll_no,
-                    "status": obj.status,
-                    "created": created
-                })
-            except Exception as e:
-                errors.append({"student_id": student.id, "error": str(e)})
+        # One write transaction for the whole batch instead of one per student
+        with immediate_atomic():
+            for student in students:
+                status_val = "present" if student.id in present_ids else "absent"
+                try:
+                    obj, created = Attendance.objects.update_or_create(
+                        student=student,
+                        date=date_obj,
+                        defaults={"status": status_val}
+                    )
+                    created_or_updated.append({
+                        "student_id": student.id,
+                        "roll_no": student.roll_no,
+                        "status": obj.status,
+                        "created": created
+                    })
+                except Exception as e:
+                    errors.append({"student_id": student.id, "error": str(e)})
 
         return Response({
             "batch_id": batch_id,
@@ -602,19 +1089,31 @@ class BulkAttendanceView(APIView):
 
 class AssessmentListCreateView(APIView):
     """
-    GET: list assessments (teachers/admins see all; students see PENDING assessments for their batch)
+    GET: list assessments (teachers/admins see all; students see their batch's assessments,
+         only PENDING ones with ?pending=true); ?ids=1,2,3 fetches several at once
     POST: create an assessment (teacher/admin only)
     """
     pagination_class = StandardPagination
 
     def get(self, request):
-        queryset = Assessment.objects.all()
+        ids, error = parse_ids_param(request)
+        if error:
+            return error
+
+        queryset = AssessmentSerializer.setup_eager_loading(Assessment.objects.all(), request)
 
         # If student → only their batch assessments
         if request.user.is_student():
-            profile = getattr(request.user, "student_profile", None)
+            profile = student_profile_of(request.user)
             if profile and profile.batch_id:
-                queryset = queryset.filter(batch_id=profile.batch_id)
+                # Submissions of archived batches are no longer in the live
+                # table; their assessments would all read as pending
+                queryset = with_submission_status(
+                    queryset.filter(batch_id=profile.batch_id, batch__archived_at__isnull=True),
+                    profile,
+                )
+                if request.GET.get("pending") in ("1", "true", "True"):
+                    queryset = queryset.filter(is_submitted=False)
             else:
                 queryset = Assessment.objects.none()
         else:
@@ -627,6 +1126,10 @@ class AssessmentListCreateView(APIView):
             if test_type:
                 queryset = queryset.filter(test_type=test_type)
 
+        # Bulk fetch: ?ids=1,2,3 within the same visibility rules
+        if ids is not None:
+            return bulk_fetch_response(request, queryset, ids, AssessmentSerializer)
+
         # Pagination
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(queryset, request)
@@ -647,30 +1150,39 @@ class AssessmentListCreateView(APIView):
 
 class AssessmentDetailView(APIView):
     """
-    GET /assessments/<id>/          -> anyone (students only if assessment.batch matches)
+    GET /assessments/<id>/          -> anyone (students only if assessment.batch matches);
+                                       teachers/admins also get submission_summary
     PUT /assessments/<id>/          -> teacher/admin only
     DELETE /assessments/<id>/       -> teacher/admin only
     """
     def get_object(self, assessment_id):
         return get_object_or_404(Assessment, id=assessment_id)
 
+    def version_keys(self, request, assessment_id):
+        return [versioning.assessment_key(assessment_id), versioning.STUDENT_PROFILES]
+
+    @conditional_get(version_keys)
     def get(self, request, assessment_id):
-        assessment = self.get_object(assessment_id)
+        queryset = AssessmentSerializer.setup_eager_loading(Assessment.objects.all(), request)
+        if request.user.is_student():
+            # Like the list, archived batches' assessments are not shown to students
+            queryset = queryset.filter(batch__archived_at__isnull=True)
+        assessment = get_object_or_404(queryset, id=assessment_id)
         # students should only fetch if it's their batch
         if request.user.is_student():
-            profile = getattr(request.user, "student_profile", None)
+            profile = student_profile_of(request.user)
             if not profile or assessment.batch_id != profile.batch_id:
                 return Response({"message": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = AssessmentSerializer(assessment, context={"request": request})
         data = serializer.data
 
-        # For teachers/admins include all submissions for this assessment
+        # For teachers/admins include submission counts; the rows themselves
+        # are paged from /assessments/<id>/submissions/
         if request.user.is_authenticated and (request.user.is_teacher() or request.user.is_admin()):
-            from students.serializers import AssessmentSubmissionSerializer
-
-            submissions = assessment.submissions.all()
-            data["submissions"] = AssessmentSubmissionSerializer(submissions, many=True).data
+            data["submission_summary"] = submission_summary(
+                assessment, include_archived=assessment.batch.archived_at is not None
+            )
 
         return Response(data)
 
@@ -692,6 +1204,85 @@ class AssessmentDetailView(APIView):
         assessment.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+class AssessmentSubmissionListView(APIView):
+    """
+    GET /assessments/<id>/submissions/ -> teacher/admin only
+    Compact, paginated submission rows for one assessment.
+    Supports filtering: ?student_id=&search=&min_score=&max_score=
+    and ?ordering=submitted_at|-submitted_at|score|-score (default -submitted_at)
+    """
+    ordering_fields = ('submitted_at', '-submitted_at', 'score', '-score')
+
+    def get(self, request, assessment_id):
+        if not (request.user.is_teacher() or request.user.is_admin()):
+            return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        assessment = get_object_or_404(Assessment.objects.only("id"), id=assessment_id)
+        queryset = AssessmentSubmissionRowSerializer.setup_eager_loading(
+            AssessmentSubmission.objects.filter(assessment=assessment), request
+        )
+
+        student_id = request.GET.get("student_id")
+        search = request.GET.get("search")
+        min_score = request.GET.get("min_score")
+        max_score = request.GET.get("max_score")
+        ordering = request.GET.get("ordering") or "-submitted_at"
+
+        if ordering not in self.ordering_fields:
+            return Response(
+                {"message": f"ordering must be one of: {', '.join(self.ordering_fields)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if student_id:
+            queryset = queryset.filter(student_id=student_id)
+        if search:
+            queryset = queryset.filter(
+                Q(student__first_name__icontains=search)
+                | Q(student__last_name__icontains=search)
+                | Q(student__roll_no__icontains=search)
+            )
+        try:
+            if min_score:
+                queryset = queryset.filter(score__gte=float(min_score))
+            if max_score:
+                queryset = queryset.filter(score__lte=float(max_score))
+        except ValueError:
+            return Response(
+                {"message": "min_score and max_score must be numbers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = queryset.order_by(ordering, "-id")
+
+        # Pagination
+        paginator = get_list_paginator(request, (ordering, "-id"))
+        page = paginator.paginate_queryset(queryset, request)
+        serializer = AssessmentSubmissionRowSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class AssessmentSubmissionDetailView(APIView):
+    """
+    GET /assessments/<id>/submissions/<submission_id>/ -> teacher/admin only
+    One full submission, including the student's answers.
+    """
+
+    def get(self, request, assessment_id, submission_id):
+        if not (request.user.is_teacher() or request.user.is_admin()):
+            return Response({"message": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        submission = get_object_or_404(
+            AssessmentSubmissionSerializer.setup_eager_loading(
+                AssessmentSubmission.objects.all(), request
+            ),
+            id=submission_id,
+            assessment_id=assessment_id,
+        )
+        serializer = AssessmentSubmissionSerializer(submission, context={"request": request})
+        return Response(serializer.data)
+
+
 class AssessmentSubmitView(APIView):
     """
     POST /assessments/<id>/submit/
@@ -702,8 +1293,10 @@ class AssessmentSubmitView(APIView):
         if not request.user.is_student():
             return Response({"message": "Students only"}, status=status.HTTP_403_FORBIDDEN)
 
-        assessment = get_object_or_404(Assessment, id=assessment_id)
-        student = request.user.student_profile
+        # Like the student lists, archived batches' assessments are not
+        # shown; their submissions moved out of the duplicate check's table
+        assessment = get_object_or_404(Assessment, id=assessment_id, batch__archived_at__isnull=True)
+        student = student_profile_of(request.user)
 
         # ensure student belongs to the assessment batch (if assessment is batch-scoped)
         if assessment.batch_id and student.batch_id != assessment.batch_id:
@@ -712,37 +1305,38 @@ class AssessmentSubmitView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # prevent multiple submissions
-        existing = AssessmentSubmission.objects.filter(
-            assessment=assessment, student=student
-        ).first()
-        if existing:
-            return Response(
-                {
-                    "message": "You have already submitted this assessment.",
-                    "data": AssessmentSubmissionSerializer(existing).data,
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        submission_payload = {
-            "assessment": assessment.id,
-            "student": student.id,
-            "answers": request.data.get("answers", {}),
-        }
-
-        serializer = AssessmentSubmissionSerializer(data=submission_payload)
-        serializer.is_valid(raise_exception=True)
-
-        # ---- IMPORTANT: calculate and store score ----
-        score = calculate_score(
-            assessment.answer_key,  # use stored answer key
-            serializer.validated_data["answers"],
-        )
-
+        # On the backend.sqlite3 engine the write lock serializes the check
+        # and the insert. Elsewhere immediate_atomic() is a plain atomic(), so
+        # concurrent requests can both pass the check; the unique constraint
+        # then rejects all but one.
+        try:
+            with immediate_atomic():
+                # prevent multiple submissions
+                duplicate = already_submitted_response(assessment, student)
+                if duplicate is not None:
+                    return duplicate
+
+                submission_payload = {
+                    "assessment": assessment.id,
+                    "student": student.id,
+                    "answers": request.data.get("answers", {}),
+                }
+
+                serializer = AssessmentSubmissionSerializer(data=submission_payload)
+                serializer.is_valid(raise_exception=True)
 
+                # ---- IMPORTANT: calculate and store score ----
+                score = calculate_score(
+                    assessment.answer_key,  # use stored answer key
+                    serializer.validated_data["answers"],
+                )
 
-        submission = serializer.save(score=score)
+                submission = serializer.save(score=score)
+        except IntegrityError:
+            duplicate = already_submitted_response(assessment, student)
+            if duplicate is None:
+                raise
+            return duplicate
         return Response(
             AssessmentSubmissionSerializer(submission).data,
             status=status.HTTP_201_CREATED,
@@ -15,9 +15,9 @@ class UserAdmin(DjangoUserAdmin):
 
 @admin.register(Invitation)
 class InvitationAdmin(admin.ModelAdmin):
-	list_display = ("email", "role", "invited_by", "batch", "is_used", "created_at")
+	list_display = ("email", "role", "invited_by", "batch", "is_used", "email_status", "created_at")
 	search_fields = ("email", "invited_by__username")
-	list_filter = ("role", "is_used", "batch")
+	list_filter = ("role", "is_used", "email_status", "batch")
 	readonly_fields = ("token", "created_at")
 
 
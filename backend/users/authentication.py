@@ -0,0 +1,183 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from students.models import StudentProfile
+from users.models import User
+from users.tokens import (
+    BATCH_CLAIM, CLAIMS_AT_CLAIM, ROLE_CLAIM, STUDENT_PROFILE_CLAIM, SUPERUSER_CLAIM
+)
+
+
+def _user_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def _stale_key(user_id):
+    return f"auth-claims-stale:{user_id}"
+
+
+def _stale_marker_seconds():
+    return int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+
+def load_user(user_id):
+    """
+    Full User row for `user_id`, through a cache entry that lives
+    AUTH_USER_CACHE_SECONDS. The password hash is deferred and never cached.
+    Inactive users are rejected like JWTAuthentication does.
+    """
+    user = cache.get(_user_key(user_id))
+    if user is None:
+        user = User.objects.defer("password").filter(pk=user_id).first()
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        cache.set(_user_key(user_id), user, getattr(settings, "AUTH_USER_CACHE_SECONDS", 30))
+    return user
+
+
+def mark_claims_stale(user_id):
+    """
+    Stop trusting claims in access tokens issued to `user_id` up to now (and
+    drop their cached row); those tokens authenticate against the database
+    until they expire. The time is recorded on the User row, so it holds
+    even when the cache drops the marker.
+    """
+    now = timezone.now()
+    User.objects.filter(pk=user_id).update(claims_stale_at=now)
+    cache.delete(_user_key(user_id))
+    cache.set(_stale_key(user_id), now.timestamp(), _stale_marker_seconds())
+
+
+def claims_stale_since(user_id):
+    """
+    Timestamp from which `user_id`'s token claims are not trusted: 0 if
+    never, None if the user no longer exists. Read from the cache marker, or
+    from User.claims_stale_at (one query) when the cache does not have it.
+    """
+    stale_since = cache.get(_stale_key(user_id))
+    if stale_since is not None:
+        return stale_since
+
+    rows = list(User.objects.filter(pk=user_id).values_list("claims_stale_at", flat=True))
+    if not rows:
+        return None
+    stale_since = rows[0].timestamp() if rows[0] else 0
+    # add(): never overwrite a marker mark_claims_stale() set meanwhile
+    cache.add(_stale_key(user_id), stale_since, _stale_marker_seconds())
+    return stale_since
+
+
+def remember_claims_stale_at(user):
+    """
+    Cache `user.claims_stale_at` (already loaded when tokens are issued) as
+    the staleness marker, so the first requests with the new tokens do not
+    read it from the database.
+    """
+    stale_since = user.claims_stale_at.timestamp() if user.claims_stale_at else 0
+    cache.add(_stale_key(user.pk), stale_since, _stale_marker_seconds())
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    request.user built from access-token claims. The id, role checks and the
+    student scoping claims need no query; any other attribute loads the full
+    User once via load_user().
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        # simplejwt stores the id as a string
+        user_id = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        super().__init__(lambda: load_user(user_id))
+        # LazyObject forwards attribute writes to the wrapped user
+        self.__dict__["claims"] = {
+            "id": user_id,
+            ROLE_CLAIM: token[ROLE_CLAIM],
+            SUPERUSER_CLAIM: token.get(SUPERUSER_CLAIM, False),
+            STUDENT_PROFILE_CLAIM: token.get(STUDENT_PROFILE_CLAIM),
+            BATCH_CLAIM: token.get(BATCH_CLAIM),
+        }
+
+    def __bool__(self):
+        return True
+
+    @property
+    def id(self):
+        return self.claims["id"]
+
+    pk = id
+
+    @property
+    def role(self):
+        return self.claims[ROLE_CLAIM]
+
+    @property
+    def is_superuser(self):
+        return self.claims[SUPERUSER_CLAIM]
+
+    def is_admin(self):
+        return self.role == User.Roles.ADMIN or self.is_superuser
+
+    def is_teacher(self):
+        return self.role == User.Roles.TEACHER
+
+    def is_student(self):
+        return self.role == User.Roles.STUDENT
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request User query: tokens carrying
+    users.tokens claims authenticate as a ClaimsUser.
+
+    Tokens issued before claims existed, or before the user / their student
+    profile last changed (see mark_claims_stale), load the user from the
+    database as usual. The marker is read from the shared cache
+    (settings.CACHES), falling back to User.claims_stale_at when the cache
+    has dropped it, so deactivating or demoting a user takes effect at once
+    in every worker; otherwise claims are trusted until the access token
+    expires. Writes that bypass model signals (QuerySet.update()) must call
+    mark_claims_stale().
+    """
+
+    def get_user(self, validated_token):
+        if ROLE_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        stale_since = claims_stale_since(validated_token[api_settings.USER_ID_CLAIM])
+        if stale_since is None or validated_token.get(CLAIMS_AT_CLAIM, 0) <= stale_since:
+            return super().get_user(validated_token)
+
+        return ClaimsUser(validated_token)
+
+
+def student_profile_of(user):
+    """
+    The user's StudentProfile for scoping queries (id, batch_id), or None.
+
+    For a ClaimsUser it is built from the token without a query; its other
+    fields are deferred and load on first access. Otherwise this is
+    `user.student_profile`.
+    """
+    claims = getattr(user, "claims", None)
+    if claims is None:
+        return getattr(user, "student_profile", None)
+    if claims[STUDENT_PROFILE_CLAIM] is None:
+        return None
+    return StudentProfile.from_db(
+        None,
+        ["id", "user_id", "batch_id"],
+        [claims[STUDENT_PROFILE_CLAIM], claims["id"], claims[BATCH_CLAIM]],
+    )
@@ -0,0 +1,193 @@
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from backend.db import immediate_atomic
+from users.models import Invitation
+from users.services import build_invitation_message, build_invitation_url
+
+logger = logging.getLogger(__name__)
+
+
+# Invitations claimed and sent over one SMTP connection at a time
+DELIVERY_BATCH_SIZE = 100
+
+
+def _max_attempts():
+    return getattr(settings, "INVITATION_EMAIL_MAX_ATTEMPTS", 3)
+
+
+def _retry_delay(attempts):
+    # Exponential backoff: base, 2 * base, 4 * base, ...
+    base = getattr(settings, "INVITATION_EMAIL_RETRY_SECONDS", 60)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def queue_invitations(invitations):
+    """Mark unsaved `invitations` for background delivery."""
+    for invitation in invitations:
+        invitation.email_status = Invitation.EmailStatus.QUEUED
+        invitation.email_next_attempt_at = None
+
+
+def due_invitations(now=None):
+    """Queued invitations whose next attempt is due."""
+    now = now or timezone.now()
+    return Invitation.objects.filter(
+        Q(email_next_attempt_at__isnull=True) | Q(email_next_attempt_at__lte=now),
+        email_status=Invitation.EmailStatus.QUEUED,
+    )
+
+
+def claim_batch(limit=DELIVERY_BATCH_SIZE):
+    """
+    Move up to `limit` due invitations to SENDING and return them, so two
+    workers never send the same one. email_next_attempt_at records the
+    claim time until the outcome is saved.
+    """
+    with immediate_atomic():
+        ids = list(
+            due_invitations()
+            .select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Invitation.objects.filter(id__in=ids).update(
+            email_status=Invitation.EmailStatus.SENDING, email_next_attempt_at=timezone.now()
+        )
+    return list(Invitation.objects.filter(id__in=ids).select_related("invited_by").order_by("id"))
+
+
+def release_stuck(older_than=timedelta(minutes=15)):
+    """
+    Re-queue invitations a worker claimed but never finished (it died
+    mid-batch).
+
+    Returns:
+        Number of invitations re-queued
+    """
+    return Invitation.objects.filter(
+        email_status=Invitation.EmailStatus.SENDING,
+        email_next_attempt_at__lte=timezone.now() - older_than,
+    ).update(email_status=Invitation.EmailStatus.QUEUED)
+
+
+def _record_failure(invitation, error, now):
+    invitation.email_attempts += 1
+    invitation.email_error = str(error)[:1000]
+    if invitation.email_attempts >= _max_attempts():
+        invitation.email_status = Invitation.EmailStatus.FAILED
+        invitation.email_next_attempt_at = None
+    else:
+        invitation.email_status = Invitation.EmailStatus.QUEUED
+        invitation.email_next_attempt_at = now + _retry_delay(invitation.email_attempts)
+
+
+def send_batch(invitations, connection=None):
+    """
+    Send `invitations` over one SMTP connection and record each outcome.
+    A failed message counts as a failed attempt for that invitation only; a
+    failed send closes the connection and the next message reopens it.
+    Outcomes are saved even if the batch is cut short; invitations it never
+    reached stay SENDING until release_stuck() re-queues them.
+
+    Returns:
+        Counter of resulting email_status values
+    """
+    connection = connection or get_connection(fail_silently=False)
+    now = timezone.now()
+    try:
+        for invitation in invitations:
+            try:
+                url = build_invitation_url(invitation, invitation.frontend_url or None)
+                message = build_invitation_message(invitation, url, connection=connection)
+                # send_messages() closes connections it opened itself, so
+                # (re)open it here to keep it for the next message
+                connection.open()
+                connection.send_messages([message])
+            except Exception as exc:
+                logger.warning("Invitation %s: email failed: %s", invitation.id, exc)
+                connection.close()
+                _record_failure(invitation, exc, now)
+            else:
+                invitation.email_attempts += 1
+                invitation.email_status = Invitation.EmailStatus.SENT
+                invitation.email_sent_at = timezone.now()
+                invitation.email_next_attempt_at = None
+                invitation.email_error = ""
+    finally:
+        try:
+            Invitation.objects.bulk_update(
+                invitations,
+                ["email_status", "email_attempts", "email_sent_at", "email_next_attempt_at", "email_error"],
+            )
+        finally:
+            connection.close()
+    return Counter(invitation.email_status for invitation in invitations)
+
+
+def deliver_pending(batch_size=DELIVERY_BATCH_SIZE, connection=None):
+    """
+    Send every due invitation, one batch (and SMTP connection) at a time.
+
+    Returns:
+        Counter of resulting email_status values
+    """
+    release_stuck()
+    outcome = Counter()
+    while True:
+        invitations = claim_batch(batch_size)
+        if not invitations:
+            return outcome
+        outcome.update(send_batch(invitations, connection))
+
+
+class DeliveryWorker:
+    """
+    Process-wide daemon thread draining the invitation queue. wake() after
+    queueing starts it on first use; it also re-checks every
+    INVITATION_EMAIL_RETRY_SECONDS for retries that came due. Deployments
+    without it (INVITATION_EMAIL_WORKER_THREAD=False) run
+    `manage.py send_invitations --loop` instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def wake(self):
+        if not getattr(settings, "INVITATION_EMAIL_WORKER_THREAD", True):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="invitation-delivery", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        interval = getattr(settings, "INVITATION_EMAIL_RETRY_SECONDS", 60)
+        while True:
+            self._wakeup.wait(timeout=interval)
+            self._wakeup.clear()
+            try:
+                deliver_pending()
+            except Exception:
+                logger.exception("Invitation delivery failed")
+            finally:
+                # This thread's own database connection
+                connections.close_all()
+
+
+worker = DeliveryWorker()
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from users.delivery import DELIVERY_BATCH_SIZE, deliver_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued invitation emails (from /invitations/bulk/), one SMTP "
+        "connection per batch, retrying failures with backoff. Runs once, or "
+        "keeps polling with --loop when the in-process worker thread is "
+        "disabled (INVITATION_EMAIL_WORKER_THREAD=False)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=DELIVERY_BATCH_SIZE,
+            help="Invitations sent per SMTP connection"
+        )
+        parser.add_argument("--loop", action="store_true", help="Keep polling for queued invitations")
+        parser.add_argument(
+            "--interval", type=float, default=5.0,
+            help="Seconds between polls with --loop"
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        while True:
+            close_old_connections()
+            outcome = deliver_pending(options["batch_size"])
+            if outcome or not options["loop"]:
+                summary = ", ".join(f"{status}: {count}" for status, count in sorted(outcome.items()))
+                self.stdout.write(self.style.SUCCESS(summary or "No invitations due"))
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.26 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invitation',
+            name='email_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='invitation',
+            name='email_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='invitation',
+            name='email_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invitation',
+            name='email_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invitation',
+            name='email_status',
+            field=models.CharField(blank=True, choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='invitation',
+            name='frontend_url',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['email_status', 'email_next_attempt_at'], name='invitation_delivery_idx'),
+        ),
+    ]
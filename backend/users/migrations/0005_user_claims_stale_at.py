@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_invitation_delivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='claims_stale_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
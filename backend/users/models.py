@@ -19,6 +19,8 @@ class User(AbstractUser):
 
     role = models.CharField(max_length=10, choices=Roles.choices, default=Roles.STUDENT)
     avatar = models.ImageField(upload_to="avatars/", null=True, blank=True)
+    # Access-token claims issued before this are not trusted (users.authentication)
+    claims_stale_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def is_admin(self):
         return self.role == self.Roles.ADMIN or self.is_superuser
@@ -51,11 +53,31 @@ class Invitation(models.Model):
         related_name="invitations"
     )
 
+    class EmailStatus(models.TextChoices):
+        # Blank: sent inline (or not at all) by the single-invite endpoint
+        QUEUED = 'queued', 'Queued'
+        SENDING = 'sending', 'Sending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
     token = models.UUIDField(default=uuid.uuid4, unique=True)
 
     is_used = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Background delivery (users/delivery.py)
+    frontend_url = models.CharField(max_length=200, blank=True)
+    email_status = models.CharField(max_length=10, choices=EmailStatus.choices, blank=True)
+    email_attempts = models.PositiveSmallIntegerField(default=0)
+    email_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    email_sent_at = models.DateTimeField(null=True, blank=True)
+    email_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['email_status', 'email_next_attempt_at'], name='invitation_delivery_idx'),
+        ]
+
     def __str__(self):
         return f"Invite {self.email} - {self.role}"
 
@@ -1,13 +1,15 @@
 from rest_framework import serializers
-from students.models import StudentProfile
+from students.models import Batch, StudentProfile
 from users.models import Invitation, AdminProfile, TeacherProfile
 from users.models import User
 from django.db import transaction
-from students.serializers import StudentProfileSerializer
+from students.serializers import StudentProfileSerializer, SparseFieldsMixin, EagerLoadingMixin
 from django.utils import timezone
+from users.delivery import queue_invitations
+from users.services import get_profile
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "first_name", "last_name", "username", "email", "role"]
@@ -37,7 +39,26 @@ class SignupSerializer(serializers.ModelSerializer):
 
 
 
-class InvitationSerializer(serializers.ModelSerializer):
+# Largest list accepted by the bulk invitation endpoint
+BULK_INVITE_MAX_EMAILS = 500
+
+
+def check_can_invite(user, role):
+    # Admin can invite anyone
+    if user.role == User.Roles.ADMIN or user.is_superuser:
+        return
+
+    # Teacher can invite only student
+    if user.role == User.Roles.TEACHER and role == Invitation.Roles.STUDENT:
+        return
+
+    # Student cannot invite
+    raise serializers.ValidationError("You are not allowed to invite this role.")
+
+
+class InvitationSerializer(SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ("batch",)
+
     invited_by = serializers.HiddenField(default=serializers.CurrentUserDefault())
     batch_name = serializers.CharField(source='batch.name', read_only=True)
 
@@ -47,19 +68,53 @@ class InvitationSerializer(serializers.ModelSerializer):
         read_only_fields = ["token", "is_used", "created_at"]
 
     def validate(self, data):
-        user = self.context["request"].user
-        role = data["role"]
+        check_can_invite(self.context["request"].user, data["role"])
+        return data
+
+
+class BulkInvitationSerializer(serializers.Serializer):
+    """Many invitations sharing one role and batch: {"emails": [...], "role": ..., "batch": ...}"""
+    emails = serializers.ListField(
+        child=serializers.EmailField(), allow_empty=False, max_length=BULK_INVITE_MAX_EMAILS
+    )
+    role = serializers.ChoiceField(choices=Invitation.Roles.choices)
+    batch = serializers.PrimaryKeyRelatedField(
+        queryset=Batch.objects.all(), required=False, allow_null=True
+    )
+    # Stored on each invitation for background delivery
+    frontend_url = serializers.CharField(
+        required=False, allow_blank=True,
+        max_length=Invitation._meta.get_field("frontend_url").max_length,
+    )
+
+    def validate(self, data):
+        check_can_invite(self.context["request"].user, data["role"])
+        # Drop repeats, keeping the first spelling
+        seen = set()
+        emails = []
+        for email in data["emails"]:
+            if email.lower() not in seen:
+                seen.add(email.lower())
+                emails.append(email)
+        data["emails"] = emails
+        return data
 
-        # Admin can invite anyone
-        if user.role == User.Roles.ADMIN or user.is_superuser:
-            return data
-        
-        # Teacher can invite only student
-        if user.role == User.Roles.TEACHER and role == Invitation.Roles.STUDENT:
-            return data
+    def create(self, validated_data):
+        invitations = [
+            Invitation(
+                email=email,
+                role=validated_data["role"],
+                batch=validated_data.get("batch"),
+                invited_by=self.context["request"].user,
+                frontend_url=validated_data.get("frontend_url", ""),
+            )
+            for email in validated_data["emails"]
+        ]
+        if validated_data.get("queue"):
+            queue_invitations(invitations)
+        with transaction.atomic():
+            return Invitation.objects.bulk_create(invitations)
 
-        # Student cannot invite
-        raise serializers.ValidationError("You are not allowed to invite this role.")
 
 class AcceptInvitationSerializer(serializers.Serializer):
     # Required fields
@@ -203,7 +258,7 @@ class AcceptInvitationSerializer(serializers.Serializer):
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Base user fields
     id = serializers.IntegerField(read_only=True)
     email = serializers.EmailField(read_only=True)
@@ -232,45 +287,47 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         """
-        Build a unified profile shape based on user.role
+        Build a unified profile shape based on user.role, from the cached
+        composed profile (users.services.get_profile)
         """
-        user = instance
+        profile = get_profile(instance.pk)
         data = {
-            "id": user.id,
-            "email": user.email,
-            "role": user.role,
-            "first_name": user.first_name or "",
-            "last_name": user.last_name or "",
+            "id": profile["id"],
+            "email": profile["email"],
+            "role": profile["role"],
+            "first_name": profile["first_name"] or "",
+            "last_name": profile["last_name"] or "",
             "phone": None,
             "batch_id": None,
             "batch_name": "",
             "subject": "",
             "department": "",
-            "avatar": user.avatar.url if user.avatar else None,
+            "avatar": profile["avatar"],
         }
+        role = profile["role"]
 
         # Student
-        if user.is_student() and hasattr(user, "student_profile"):
-            sp: StudentProfile = user.student_profile
+        sp = profile["student_profile"]
+        if role == User.Roles.STUDENT and sp:
             # Prefer StudentProfile name if present
-            data["first_name"] = sp.first_name or data["first_name"]
-            data["last_name"] = sp.last_name or data["last_name"]
-            data["phone"] = sp.phone
-            if sp.batch:
-                data["batch_id"] = sp.batch.id
-                data["batch_name"] = sp.batch.name
+            data["first_name"] = sp["first_name"] or data["first_name"]
+            data["last_name"] = sp["last_name"] or data["last_name"]
+            data["phone"] = sp["phone"]
+            if sp["batch_id"]:
+                data["batch_id"] = sp["batch_id"]
+                data["batch_name"] = sp["batch_name"]
 
         # Teacher
-        if user.is_teacher() and hasattr(user, "teacher_profile"):
-            tp: TeacherProfile = user.teacher_profile
-            data["subject"] = tp.subject or ""
+        tp = profile["teacher_profile"]
+        if role == User.Roles.TEACHER and tp:
+            data["subject"] = tp["subject"] or ""
 
         # Admin
-        if user.is_admin() and hasattr(user, "admin_profile"):
-            ap: AdminProfile = user.admin_profile
-            data["department"] = ap.department or ""
+        ap = profile["admin_profile"]
+        if (role == User.Roles.ADMIN or profile["is_superuser"]) and ap:
+            data["department"] = ap["department"] or ""
 
-        return data
+        return self.filter_sparse(data)
 
     def update(self, instance, validated_data):
         """
@@ -285,23 +342,34 @@ class UserProfileSerializer(serializers.ModelSerializer):
         last_name = validated_data.get("last_name", None)
         phone = validated_data.get("phone", None)
 
-        # Update names on User
+        # Update names on User. `user` may be a cached copy (see
+        # users.authentication.load_user), so only the fields changed here
+        # are written; a full save would put back a stale role or is_active.
+        user_fields = []
         if first_name is not None:
             user.first_name = first_name
+            user_fields.append("first_name")
         if last_name is not None:
             user.last_name = last_name
-        user.save()
+            user_fields.append("last_name")
+        if user_fields:
+            user.save(update_fields=user_fields)
 
         # Student: keep StudentProfile in sync
         if user.is_student() and hasattr(user, "student_profile"):
             sp: StudentProfile = user.student_profile
+            profile_fields = []
             if first_name is not None:
                 sp.first_name = first_name
+                profile_fields.append("first_name")
             if last_name is not None:
                 sp.last_name = last_name
+                profile_fields.append("last_name")
             if phone is not None:
                 sp.phone = phone
-            sp.save()
+                profile_fields.append("phone")
+            if profile_fields:
+                sp.save(update_fields=profile_fields)
 
         # OPTIONAL: You can allow teachers/admins to update subject/department
         # subject = validated_data.get("subject", None)
@@ -1,31 +1,167 @@
 # users/services.py
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
+from django.db import transaction
 from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.utils.html import escape
 import logging
+import re
+
+from users.models import User
 
 logger = logging.getLogger(__name__)
 
-def send_invitation_email(invitation, frontend_url=None):
+# Every relation /users/me and /users/current read, fetched in one query
+PROFILE_RELATIONS = ("student_profile__batch", "teacher_profile", "admin_profile")
+
+
+def _profile_key(user_id):
+    return f"user-profile:{user_id}"
+
+
+def compose_profile(user):
     """
-    Build the invitation URL and (optionally) send the email.
+    Plain-dict snapshot of `user` and its profiles, as read by
+    UserProfileSerializer and /users/current. `user` should come from a
+    queryset with select_related(*PROFILE_RELATIONS); missing profiles are None.
+    """
+    student = getattr(user, "student_profile", None)
+    teacher = getattr(user, "teacher_profile", None)
+    admin = getattr(user, "admin_profile", None)
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "role": user.role,
+        "is_superuser": user.is_superuser,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "avatar": user.avatar.url if user.avatar else None,
+        "student_profile": student and {
+            "id": student.id,
+            "first_name": student.first_name,
+            "last_name": student.last_name,
+            "phone": student.phone,
+            "roll_no": student.roll_no,
+            "batch_id": student.batch_id,
+            "batch_name": student.batch.name if student.batch_id else "",
+        },
+        "teacher_profile": teacher and {"id": teacher.id, "subject": teacher.subject},
+        "admin_profile": admin and {"id": admin.id, "department": admin.department},
+    }
 
-    - Always returns (email_sent_bool, invitation_url)
-    - Actual sending is controlled by settings.INVITATION_EMAIL_ENABLED
+
+def get_profile(user_id):
     """
-    subject = f'Invitation to join {getattr(settings, "SITE_NAME", "Student Tracking Platform")}'
+    compose_profile() for `user_id`, cached for USER_PROFILE_CACHE_SECONDS.
+    users.signals drops the entry when the user, one of its profiles or the
+    student's batch is saved.
+
+    Raises:
+        User.DoesNotExist: No such user
+    """
+    profile = cache.get(_profile_key(user_id))
+    if profile is None:
+        user = User.objects.select_related(*PROFILE_RELATIONS).get(pk=user_id)
+        profile = compose_profile(user)
+        cache.set(
+            _profile_key(user_id), profile, getattr(settings, "USER_PROFILE_CACHE_SECONDS", 300)
+        )
+    return profile
+
+
+def forget_profiles(user_ids):
+    """
+    Drop cached profiles for `user_ids`, now and again once the current
+    transaction commits (a concurrent read may re-cache the old rows).
+    """
+    keys = [_profile_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
 
-    # Use override if provided, otherwise settings.FRONTEND_URL
+def build_invitation_url(invitation, frontend_url=None):
+    """Accept link for `invitation`; `frontend_url` defaults to settings.FRONTEND_URL."""
     frontend_url = frontend_url or getattr(settings, 'FRONTEND_URL', 'http://localhost:4200')
-    # invitation_url = f"{frontend_url.rstrip('/')}/accept-invitation?token={invitation.token}"
-    invitation_url = (
+    return (
         f"{frontend_url.rstrip('/')}/accept-invitation?"
         f"token={invitation.token}"
         f"&role={invitation.role}"
         f"&email={invitation.email or ''}"
     )
 
+
+# Per-invitation values; the invitation templates may only use these, as
+# bare {{ name }} references (no filters or tags on them)
+INVITATION_FIELDS = ("invitation_url", "invited_by", "role")
+
+_PLACEHOLDER = "__invitation_field_{}__"
+_PLACEHOLDER_RE = re.compile(_PLACEHOLDER.format(r"(\w+)"))
+
+_prerendered = {}
+
+
+def prerender(template_name, fields):
+    """
+    Render `template_name` once with placeholders for `fields` and split
+    it around them: a list alternating literal text and field names.
+    Cached per process (except with DEBUG, so template edits show up).
+    """
+    parts = _prerendered.get(template_name)
+    if parts is None or settings.DEBUG:
+        rendered = render_to_string(template_name, {field: _PLACEHOLDER.format(field) for field in fields})
+        parts = _PLACEHOLDER_RE.split(rendered)
+        _prerendered[template_name] = parts
+    return parts
+
+
+def fill(parts, values, escape_values=True):
+    """Substitute `values` into prerender() output, HTML-escaping them unless told not to."""
+    pieces = list(parts)
+    for i in range(1, len(pieces), 2):
+        value = values[pieces[i]]
+        pieces[i] = escape(value) if escape_values else str(value)
+    return "".join(pieces)
+
+
+def build_invitation_message(invitation, invitation_url, connection=None):
+    """
+    The invitation email (plain text with an HTML alternative), ready to
+    send over `connection` (default: a new one from settings). Both bodies
+    come from templates rendered once per process.
+    """
+    subject = f'Invitation to join {getattr(settings, "SITE_NAME", "Student Tracking Platform")}'
+    values = {
+        'invitation_url': invitation_url,
+        'invited_by': invitation.invited_by.get_full_name() or invitation.invited_by.username,
+        'role': invitation.get_role_display(),
+    }
+
+    html_message = fill(prerender('emails/invitation.html', INVITATION_FIELDS), values)
+    plain_message = fill(prerender('emails/invitation.txt', INVITATION_FIELDS), values, escape_values=False)
+
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=plain_message,
+        from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', settings.EMAIL_HOST_USER),
+        to=[invitation.email],
+        connection=connection,
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
+def send_invitation_email(invitation, frontend_url=None):
+    """
+    Build the invitation URL and (optionally) send the email.
+
+    - Always returns (email_sent_bool, invitation_url)
+    - Actual sending is controlled by settings.INVITATION_EMAIL_ENABLED
+    """
+    invitation_url = build_invitation_url(invitation, frontend_url)
+
     # If email sending is disabled via env/setting, skip send_mail
     if not getattr(settings, "INVITATION_EMAIL_ENABLED", False):
         logger.info(
@@ -35,25 +171,8 @@ def send_invitation_email(invitation, frontend_url=None):
         # We still return the URL so the frontend can show/copy it
         return False, invitation_url
 
-    context = {
-        'invitation': invitation,
-        'invitation_url': invitation_url,
-        'invited_by': invitation.invited_by.get_full_name() or invitation.invited_by.username,
-        'role': invitation.get_role_display(),
-    }
-
-    html_message = render_to_string('emails/invitation.html', context)
-    plain_message = strip_tags(html_message)
-
     try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', settings.EMAIL_HOST_USER),
-            recipient_list=[invitation.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        build_invitation_message(invitation, invitation_url).send(fail_silently=False)
         return True, invitation_url
     except Exception as e:
         logger.exception("Error sending invitation email: %s", e)
@@ -0,0 +1,51 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from students.models import Batch, StudentProfile
+from users.authentication import mark_claims_stale
+from users.models import AdminProfile, TeacherProfile, User
+from users.services import forget_profiles
+
+
+# Access tokens carry role / student profile / batch claims (users/tokens.py).
+# Marked after commit, so claims read from then on are current.
+# Cached /users/me profiles (users.services.get_profile) are dropped too.
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_claims(sender, instance, created=False, **kwargs):
+    forget_profiles([instance.pk])
+    # A new user has no tokens yet
+    if not created:
+        transaction.on_commit(partial(mark_claims_stale, instance.pk))
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def invalidate_student_claims(sender, instance, **kwargs):
+    forget_profiles([instance.user_id])
+    transaction.on_commit(partial(mark_claims_stale, instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=TeacherProfile)
+@receiver([post_save, post_delete], sender=AdminProfile)
+def invalidate_staff_profile(sender, instance, **kwargs):
+    forget_profiles([instance.user_id])
+
+
+@receiver(post_save, sender=Batch)
+def invalidate_batch_profiles(sender, instance, created=False, **kwargs):
+    # Profiles show the batch name
+    if not created:
+        forget_profiles(StudentProfile.objects.filter(batch_id=instance.pk).values_list("user_id", flat=True))
+
+
+@receiver(pre_delete, sender=Batch)
+def invalidate_batch_students(sender, instance, **kwargs):
+    # Deleting a batch clears its students' batch with a bulk update, which
+    # sends no StudentProfile signals
+    user_ids = list(StudentProfile.objects.filter(batch_id=instance.pk).values_list("user_id", flat=True))
+    forget_profiles(user_ids)
+    for user_id in user_ids:
+        transaction.on_commit(partial(mark_claims_stale, user_id))
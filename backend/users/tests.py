@@ -1,3 +1,327 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from students.models import Batch, StudentProfile
+from users.authentication import load_user
+from users.delivery import deliver_pending
+from users.models import Invitation, User
+from users.services import build_invitation_message
+
+
+def send_user_saved_elsewhere(user_id):
+    """
+    Send User post_save for `user_id` from a separate Django process, as the
+    gunicorn worker that handled the write would. Nothing but the shared
+    cache connects that process to this one.
+    """
+    script = (
+        "import django; django.setup()\n"
+        "from django.core.management import call_command\n"
+        "call_command('migrate', verbosity=0)\n"
+        "from django.db.models.signals import post_save\n"
+        "from users.models import User\n"
+        f"post_save.send(sender=User, instance=User(pk={user_id}), created=False)\n"
+    )
+    env = {
+        **{name: value for name, value in os.environ.items() if name != "REDIS_URL"},
+        # The cache directory the test runner set up
+        "CACHE_DIR": settings.CACHES["default"]["LOCATION"],
+        # Receivers that write rows find none here; keep the child off the
+        # real database
+        "DATABASE_URL": "sqlite:///:memory:",
+    }
+    subprocess.run(
+        [sys.executable, "-c", script], cwd=settings.BASE_DIR, env=env,
+        check=True, capture_output=True, timeout=60,
+    )
+
+
+class ClaimsAuthenticationTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.batch = Batch.objects.create(name="Claims", start_date=date(2024, 1, 1))
+        self.user = User.objects.create_user(username="claims", password="pass1234", role=User.Roles.STUDENT)
+        self.profile = StudentProfile.objects.create(
+            user=self.user, first_name="C", last_name="L", roll_no="CL1", batch=self.batch
+        )
+        response = APIClient().post(
+            "/api/users/auth/login/", {"username": "claims", "password": "pass1234"}, format="json"
+        )
+        self.tokens = response.json()["data"]["data"]["tokens"]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def user_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query["sql"] for query in queries
+            if User._meta.db_table in query["sql"]
+            or f'{StudentProfile._meta.db_table}"."user_id" =' in query["sql"]
+        ]
+
+    def test_access_token_carries_claims(self):
+        claims = jwt.decode(self.tokens["access"], options={"verify_signature": False})
+        self.assertEqual(claims["role"], User.Roles.STUDENT)
+        self.assertEqual(claims["student_profile_id"], self.profile.id)
+        self.assertEqual(claims["batch_id"], self.batch.id)
+
+    def test_student_endpoints_skip_user_queries(self):
+        for path in ("/api/students/assessments/", "/api/students/analytics/student-dashboard/"):
+            with self.subTest(path=path):
+                self.assertEqual(self.user_queries(path), [])
+
+    def test_own_monthly_report_uses_token_profile(self):
+        response = self.client.get("/api/students/analytics/monthly-attendance/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["roll_no"] for row in response.json()["data"]], ["CL1"])
+
+        User.objects.create_user(username="noprofile", password="pass1234", role=User.Roles.STUDENT)
+        response = self.login("noprofile").get("/api/students/analytics/monthly-attendance/")
+        self.assertEqual(response.status_code, 404)
+
+    def login(self, username):
+        response = APIClient().post(
+            "/api/users/auth/login/", {"username": username, "password": "pass1234"}, format="json"
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['data']['data']['tokens']['access']}")
+        return client
+
+    def test_demotion_in_another_worker_applies_here(self):
+        teacher = User.objects.create_user(username="demoted", password="pass1234", role=User.Roles.TEACHER)
+        client = self.login("demoted")
+        path = f"/api/students/profile/?ids={self.profile.id}"
+        self.assertEqual(client.get(path).status_code, 200)
+
+        # update() sends no signal here; the other worker's save does
+        User.objects.filter(pk=teacher.pk).update(role=User.Roles.STUDENT)
+        send_user_saved_elsewhere(teacher.pk)
+        self.assertEqual(client.get(path).status_code, 403)
+
+    def test_demotion_survives_a_culled_marker(self):
+        teacher = User.objects.create_user(username="culled", password="pass1234", role=User.Roles.TEACHER)
+        client = self.login("culled")
+        path = f"/api/students/profile/?ids={self.profile.id}"
+        self.assertEqual(client.get(path).status_code, 200)
+
+        teacher.role = User.Roles.STUDENT
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher.save()
+        # The cache dropped every entry, staleness markers included
+        cache.clear()
+        self.assertEqual(client.get(path).status_code, 403)
+
+    def test_deactivation_in_another_worker_applies_here(self):
+        self.assertEqual(self.client.get("/api/students/assessments/").status_code, 200)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        send_user_saved_elsewhere(self.user.pk)
+        self.assertEqual(self.client.get("/api/students/assessments/").status_code, 401)
+
+    def test_profile_patch_keeps_changes_made_elsewhere(self):
+        teacher = User.objects.create_user(username="promoted", password="pass1234", role=User.Roles.TEACHER)
+        client = self.login("promoted")
+        load_user(teacher.pk)
+
+        # An admin's change this worker's cached row has not seen yet
+        User.objects.filter(pk=teacher.pk).update(role=User.Roles.ADMIN)
+        response = client.patch("/api/users/users/me/", {"first_name": "New"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        teacher.refresh_from_db()
+        self.assertEqual((teacher.first_name, teacher.role), ("New", User.Roles.ADMIN))
+
+    def test_avatar_upload_keeps_changes_made_elsewhere(self):
+        teacher = User.objects.create_user(username="pictured", password="pass1234", role=User.Roles.TEACHER)
+        client = self.login("pictured")
+        load_user(teacher.pk)
+
+        # An admin's change this worker's cached row has not seen yet
+        User.objects.filter(pk=teacher.pk).update(role=User.Roles.ADMIN)
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(
+                    "/api/users/users/avatar/",
+                    {"avatar": SimpleUploadedFile("me.gif", b"GIF89a", content_type="image/gif")},
+                    format="multipart",
+                )
+        self.assertEqual(response.status_code, 200)
+
+        teacher.refresh_from_db()
+        self.assertEqual(teacher.role, User.Roles.ADMIN)
+        self.assertTrue(teacher.avatar.name.startswith("avatars/me"))
+        self.assertEqual(load_user(teacher.pk).role, User.Roles.ADMIN)
+
+    def test_profile_change_falls_back_to_database(self):
+        self.profile.batch = Batch.objects.create(name="Other", start_date=date(2024, 1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+        self.assertNotEqual(self.user_queries("/api/students/assessments/"), [])
+
+        response = APIClient().post(
+            "/api/users/auth/token/refresh/", {"refresh": self.tokens["refresh"]}, format="json"
+        )
+        claims = jwt.decode(response.json()["data"]["access"], options={"verify_signature": False})
+        self.assertEqual(claims["batch_id"], self.profile.batch_id)
+
+
+class ProfileCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.batch = Batch.objects.create(name="Profile", start_date=date(2024, 1, 1))
+        self.user = User.objects.create_user(username="profile", password="pass1234", role=User.Roles.STUDENT)
+        StudentProfile.objects.create(
+            user=self.user, first_name="P", last_name="C", roll_no="PC1", batch=self.batch, phone="123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_profile_is_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            data = self.client.get("/api/users/users/me/").json()["data"]
+        self.assertEqual((data["batch_id"], data["batch_name"], data["phone"]), (self.batch.id, "Profile", "123"))
+
+        with self.assertNumQueries(0):
+            current = self.client.get("/api/users/users/current/").json()["data"]["data"]
+        self.assertEqual(current["student_profile"]["roll_no"], "PC1")
+
+    def test_batch_rename_invalidates_profile(self):
+        self.client.get("/api/users/users/me/")
+        self.batch.name = "Renamed"
+        self.batch.save()
+        self.assertEqual(self.client.get("/api/users/users/me/").json()["data"]["batch_name"], "Renamed")
+
+    def test_save_in_another_worker_invalidates_profile(self):
+        self.client.get("/api/users/users/me/")
+
+        # update() sends no signal here; the other worker's save does
+        User.objects.filter(pk=self.user.pk).update(email="new@example.com")
+        send_user_saved_elsewhere(self.user.pk)
+        self.assertEqual(self.client.get("/api/users/users/me/").json()["data"]["email"], "new@example.com")
+
+
+class BouncingEmailBackend(EmailBackend):
+    """locmem backend that refuses recipients at bounce.example."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.endswith("@bounce.example") for address in message.to):
+                raise OSError("550 no such user")
+        return super().send_messages(messages)
+
+
+class InterruptedEmailBackend(EmailBackend):
+    """locmem backend whose process is stopped when sending to halt.example."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.endswith("@halt.example") for address in message.to):
+                raise KeyboardInterrupt
+        return super().send_messages(messages)
+
+
+@override_settings(INVITATION_EMAIL_ENABLED=True, INVITATION_EMAIL_WORKER_THREAD=False)
+class BulkInvitationTestCase(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="inviter", password="pass1234", role=User.Roles.TEACHER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def invite(self, emails, role=User.Roles.STUDENT):
+        return self.client.post(
+            "/api/users/invitations/bulk/", {"emails": emails, "role": role}, format="json"
+        )
+
+    def test_bulk_invitations_are_queued_and_sent(self):
+        response = self.invite(["a@example.com", "b@example.com", "A@example.com"])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["data"]["invitations"]), 2)
+        self.assertEqual(mail.outbox, [])
+
+        outcome = deliver_pending()
+        self.assertEqual(outcome, {Invitation.EmailStatus.SENT: 2})
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["a@example.com", "b@example.com"])
+        self.assertFalse(Invitation.objects.exclude(email_status=Invitation.EmailStatus.SENT).exists())
+        self.assertEqual(deliver_pending(), {})
+
+    @override_settings(
+        EMAIL_BACKEND="users.tests.BouncingEmailBackend",
+        INVITATION_EMAIL_MAX_ATTEMPTS=2,
+        INVITATION_EMAIL_RETRY_SECONDS=0,
+    )
+    def test_failed_sends_are_retried_then_marked_failed(self):
+        self.invite(["ok@example.com", "gone@bounce.example"])
+
+        deliver_pending()
+        bounced = Invitation.objects.get(email="gone@bounce.example")
+        self.assertEqual(bounced.email_status, Invitation.EmailStatus.FAILED)
+        self.assertEqual(bounced.email_attempts, 2)
+        self.assertIn("550", bounced.email_error)
+        self.assertEqual(Invitation.objects.get(email="ok@example.com").email_status, Invitation.EmailStatus.SENT)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_BACKEND="users.tests.InterruptedEmailBackend")
+    def test_interrupted_batch_keeps_outcomes_so_far(self):
+        self.invite(["a@example.com", "stop@halt.example", "c@example.com"])
+
+        with self.assertRaises(KeyboardInterrupt):
+            deliver_pending()
+        self.assertEqual(
+            dict(Invitation.objects.values_list("email", "email_status")),
+            {
+                "a@example.com": Invitation.EmailStatus.SENT,
+                "stop@halt.example": Invitation.EmailStatus.SENDING,
+                "c@example.com": Invitation.EmailStatus.SENDING,
+            },
+        )
+
+    def test_frontend_url_length_is_validated(self):
+        response = self.client.post(
+            "/api/users/invitations/bulk/",
+            {"emails": ["a@example.com"], "role": User.Roles.STUDENT, "frontend_url": "https://" + "x" * 200},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Invitation.objects.exists())
+
+    def test_students_cannot_bulk_invite(self):
+        self.teacher.role = User.Roles.STUDENT
+        self.teacher.save()
+        self.assertEqual(self.invite(["a@example.com"]).status_code, 403)
+        self.assertFalse(Invitation.objects.exists())
+
+
+class InvitationEmailTestCase(TestCase):
+
+    def test_prerendered_bodies_match_the_templates(self):
+        inviter = User.objects.create_user(username="inviter", first_name='Ann & "Bo"', last_name="<O'Neil>")
+        invitation = Invitation.objects.create(email="new@example.com", role="teacher", invited_by=inviter)
+        url = "https://app.example/accept-invitation?token=abc&role=teacher"
+        context = {"invitation_url": url, "invited_by": inviter.get_full_name(), "role": "Teacher"}
+
+        for _ in range(2):  # compiled on the first call, reused on the second
+            message = build_invitation_message(invitation, url)
+            self.assertEqual(message.alternatives, [(render_to_string("emails/invitation.html", context), "text/html")])
+            self.assertEqual(message.body, render_to_string("emails/invitation.txt", context))
+        self.assertIn(f"by Ann & \"Bo\" <O'Neil> to join", message.body)
+        self.assertIn(url, message.body)
@@ -0,0 +1,74 @@
+import time
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+
+
+# Claims read by users.authentication.ClaimsJWTAuthentication
+ROLE_CLAIM = "role"
+SUPERUSER_CLAIM = "is_superuser"
+STUDENT_PROFILE_CLAIM = "student_profile_id"
+BATCH_CLAIM = "batch_id"
+# When the claims were read; finer-grained than "iat" for mark_claims_stale()
+CLAIMS_AT_CLAIM = "claims_at"
+
+
+def user_claims(user):
+    """Role and student scoping claims for `user` (one query unless the profile is cached)."""
+    # users.authentication imports the claim names above
+    from users.authentication import remember_claims_stale_at
+
+    remember_claims_stale_at(user)
+    profile = getattr(user, "student_profile", None)
+    return {
+        CLAIMS_AT_CLAIM: time.time(),
+        ROLE_CLAIM: user.role,
+        SUPERUSER_CLAIM: user.is_superuser,
+        STUDENT_PROFILE_CLAIM: profile.id if profile else None,
+        BATCH_CLAIM: profile.batch_id if profile else None,
+    }
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token carrying user_claims(); access tokens derived from it copy them."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Issues the new access token with claims re-read from the database, so a
+    role or batch change reaches clients at their next refresh at the latest.
+    """
+    token_class = ClaimsRefreshToken
+
+    default_error_messages = {
+        "no_active_account": _("No active account found for the given token.")
+    }
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = (
+            User.objects.select_related("student_profile")
+            .filter(**{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)})
+            .first()
+        )
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+
+        access = refresh.access_token
+        for claim, value in user_claims(user).items():
+            access[claim] = value
+        return {"access": str(access)}
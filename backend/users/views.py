@@ -2,6 +2,7 @@
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import authenticate
+from django.db import transaction
 
 from rest_framework import status, viewsets, mixins
 from rest_framework.decorators import action
@@ -9,7 +10,6 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from users.permissions import IsAdmin, IsTeacher
@@ -19,9 +19,12 @@ from users.serializers import (
     UserSerializer,
     InvitationSerializer,
     AcceptInvitationSerializer,
+    BulkInvitationSerializer,
     SignupSerializer,
 )
-from users.services import send_invitation_email
+from users import delivery
+from users.services import build_invitation_url, get_profile, send_invitation_email
+from users.tokens import ClaimsRefreshToken
 
 
 class AuthViewSet(viewsets.ViewSet):
@@ -38,7 +41,7 @@ class AuthViewSet(viewsets.ViewSet):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         return Response(
             {
                 "message": "User created successfully",
@@ -71,7 +74,7 @@ class AuthViewSet(viewsets.ViewSet):
                 status=status.HTTP_401_UNAUTHORIZED,
             )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         return Response(
             {
                 "message": "Login successful",
@@ -113,12 +116,18 @@ class InvitationViewSet(
 ):
     """
     /invitations/          -> GET (list), POST (create)
+    /invitations/bulk/     -> POST (many emails, delivered in the background)
     /invitations/{id}/resend/ -> POST
     """
     queryset = Invitation.objects.all()
     serializer_class = InvitationSerializer
     permission_classes = [IsAdmin | IsTeacher]
 
+    def get_queryset(self):
+        return InvitationSerializer.setup_eager_loading(
+            super().get_queryset(), self.request
+        )
+
     def get_serializer_context(self):
         # So InvitationSerializer still sees request.user
         context = super().get_serializer_context()
@@ -158,6 +167,34 @@ class InvitationViewSet(
         headers = self.get_success_headers(serializer.data)
         return Response(response_data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        POST {"emails": [...], "role": "student", "batch": 1, "frontend_url": optional}
+
+        Creates all invitations in one transaction. Emails are queued and
+        sent in the background (users/delivery.py); each invitation's
+        email_status tracks delivery.
+        """
+        email_enabled = getattr(settings, "INVITATION_EMAIL_ENABLED", False)
+
+        serializer = BulkInvitationSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        frontend_url = serializer.validated_data.get("frontend_url", "")
+        invitations = serializer.save(queue=email_enabled)
+        if email_enabled:
+            transaction.on_commit(delivery.worker.wake)
+
+        results = []
+        for invitation, data in zip(invitations, InvitationSerializer(invitations, many=True).data):
+            data["invitation_url"] = build_invitation_url(invitation, frontend_url or None)
+            data["email_status"] = invitation.email_status
+            results.append(data)
+        return Response(
+            {"invitations": results, "email_enabled": email_enabled},
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(detail=True, methods=["post"], url_path="resend")
     def resend(self, request, pk=None):
         invite = self.get_object()
@@ -223,24 +260,26 @@ class UserViewSet(
         """
         Mirror your CurrentUserView logic.
         """
-        user = request.user
+        profile = get_profile(request.user.pk)
         data = {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "role": getattr(user, "role", None),
+            "id": profile["id"],
+            "username": profile["username"],
+            "email": profile["email"],
+            "role": profile["role"],
         }
 
-        if hasattr(user, "student_profile"):
+        sp = profile["student_profile"]
+        if sp:
             data["student_profile"] = {
-                "id": user.student_profile.id,
-                "batch": user.student_profile.batch_id,
-                "roll_no": user.student_profile.roll_no,
+                "id": sp["id"],
+                "batch": sp["batch_id"],
+                "roll_no": sp["roll_no"],
             }
 
-        if hasattr(user, "teacher_profile"):
+        tp = profile["teacher_profile"]
+        if tp:
             data["teacher_profile"] = {
-                "id": user.teacher_profile.id,
+                "id": tp["id"],
             }
 
         return Response({"data": data})
@@ -260,6 +299,9 @@ class UserViewSet(
                 {"detail": "No avatar file provided."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        # request.user may be the cached row (users.authentication): save
+        # only the avatar so stale fields are not written back. post_save
+        # drops the cached row.
         user.avatar = avatar
-        user.save()
+        user.save(update_fields=["avatar"])
         return Response({"avatar": user.avatar.url}, status=status.HTTP_200_OK)
@@ -73,6 +73,7 @@ export default function AssessmentTake() {
   const [assessment, setAssessment] = useState(null);
   const [model, setModel] = useState(null);
   const [submissions, setSubmissions] = useState([]);
+  const [submissionsNext, setSubmissionsNext] = useState(null);
   const [viewingSubmission, setViewingSubmission] = useState(null);
   const [loading, setLoading] = useState(true);
   const [submitting, setSubmitting] = useState(false);
@@ -108,11 +109,6 @@ export default function AssessmentTake() {
           setViewingSubmission(payload.student_submission);
         }
 
-        // For teachers/admins: backend may include a `submissions` list
-        if (payload.submissions && Array.isArray(payload.submissions)) {
-          setSubmissions(payload.submissions);
-        }
-
         setAssessment(payload);
         setModel(m);
         setQuestionnaireRaw(JSON.stringify(questionnaire, null, 2));
@@ -131,6 +127,27 @@ export default function AssessmentTake() {
     };
   }, [id]);
 
+  // Teachers/admins: submissions are a paginated sub-resource
+  async function loadSubmissions(url) {
+    try {
+      const res = await API.get(
+        url || `students/assessments/${id}/submissions/?page_size=100`
+      );
+      const page = res.data?.data ?? res.data ?? {};
+      setSubmissions((prev) =>
+        url ? [...prev, ...(page.results || [])] : page.results || []
+      );
+      setSubmissionsNext(page.next || null);
+    } catch (err) {
+      console.error("Failed to load submissions", err);
+    }
+  }
+
+  useEffect(() => {
+    if (isTeacherOrAdmin) loadSubmissions();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [id, isTeacherOrAdmin]);
+
   // Build new-style answer key from current survey data
   function buildAnswerKeyFromModel(m) {
     const data = m?.data || {};
@@ -218,9 +235,14 @@ export default function AssessmentTake() {
   }
 
   // Teacher: view a particular student submission in read-only mode
-  function viewSubmission(sub) {
-    if (!sub || !assessment) return;
+  async function viewSubmission(row) {
+    if (!row || !assessment) return;
     try {
+      // List rows are compact; fetch the answers for this one
+      const res = await API.get(
+        `students/assessments/${id}/submissions/${row.id}/`
+      );
+      const sub = res.data?.data ?? res.data ?? row;
       const questionnaire = assessment.questionnaire || {};
       const m = new Model(questionnaire);
       m.data = sub.answers || {};
@@ -496,6 +518,14 @@ export default function AssessmentTake() {
                   </tbody>
                 </table>
               </div>
+              {submissionsNext && (
+                <button
+                  className="btn btn-sm btn-outline-secondary"
+                  onClick={() => loadSubmissions(submissionsNext)}
+                >
+                  Load more
+                </button>
+              )}
             </div>
           )}
 